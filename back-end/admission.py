@@ -0,0 +1,158 @@
+"""
+BizEye Admission Control
+Per-lane concurrency limits and bounded wait queues that shed excess requests quickly
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from monitoring import REGISTRY
+
+ADMISSION_ENABLED = os.environ.get('BIZEYE_ADMISSION', '1') == '1'
+
+# Routes whose requests run Flan-T5 and the sentiment model; everything else is light
+MODEL_ROUTE_PREFIXES = ('/api/intelligent/', '/api/sentiment/cascade/evaluate')
+# Routes that are never queued or rejected so the service stays observable under load
+EXEMPT_ROUTES = ('/api/metrics', '/api/inference/health', '/api/precompute/status', '/api/admission/status')
+
+# lane -> (concurrent requests, queued requests, seconds a request may wait in the queue)
+LANE_LIMITS = {
+    'model': (int(os.environ.get('BIZEYE_MODEL_CONCURRENCY', '2')),
+              int(os.environ.get('BIZEYE_MODEL_QUEUE', '8')),
+              float(os.environ.get('BIZEYE_MODEL_QUEUE_TIMEOUT', '30'))),
+    'light': (int(os.environ.get('BIZEYE_LIGHT_CONCURRENCY', '32')),
+              int(os.environ.get('BIZEYE_LIGHT_QUEUE', '64')),
+              float(os.environ.get('BIZEYE_LIGHT_QUEUE_TIMEOUT', '5')))
+}
+
+ADMITTED = REGISTRY.counter(
+    'bizeye_admission_admitted_total', 'Requests admitted by lane',
+    ('lane',))
+REJECTED = REGISTRY.counter(
+    'bizeye_admission_rejected_total', 'Requests rejected by lane and reason (queue_full or queue_timeout)',
+    ('lane', 'reason'))
+ACTIVE = REGISTRY.gauge(
+    'bizeye_admission_active', 'Requests running in a lane',
+    ('lane',))
+QUEUED = REGISTRY.gauge(
+    'bizeye_admission_queued', 'Requests waiting for a slot in a lane',
+    ('lane',))
+QUEUE_WAIT = REGISTRY.histogram(
+    'bizeye_admission_queue_wait_seconds', 'Time a request waited for a slot before it was admitted',
+    ('lane',))
+
+
+def route_lane(path):
+    """Lane a request path belongs to, or None when it bypasses admission control"""
+    if path in EXEMPT_ROUTES:
+        return None
+    if path.startswith(MODEL_ROUTE_PREFIXES):
+        return 'model'
+    return 'light'
+
+
+class AdmissionRejected(Exception):
+    """Raised when a lane cannot take a request; carries the HTTP status and Retry-After seconds"""
+
+    def __init__(self, lane, reason, status, retry_after):
+        super().__init__(f"{lane} lane {reason.replace('_', ' ')}")
+        self.lane = lane
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionLane:
+    """At most ``limit`` concurrent requests, up to ``max_queue`` more waiting in FIFO order
+
+    A request arriving to a full queue is rejected at once with 429; one that
+    waits longer than ``queue_timeout`` seconds gets 503. Retry-After is
+    estimated from the lane's recent request durations.
+    """
+
+    def __init__(self, name, limit, max_queue, queue_timeout):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+        self._avg_seconds = 1.0  # Moving average of request durations
+
+    def _retry_after(self):
+        # Time for the requests ahead to drain through the lane's slots
+        return max(1, math.ceil(self._avg_seconds * (len(self._waiters) + 1) / self.limit))
+
+    def _reject(self, reason, status):
+        REJECTED.inc(lane=self.name, reason=reason)
+        raise AdmissionRejected(self.name, reason, status, self._retry_after())
+
+    def acquire(self):
+        """Wait for a slot; returns the queue wait in seconds or raises AdmissionRejected"""
+        start = time.perf_counter()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                ACTIVE.set(self._active, lane=self.name)
+                ADMITTED.inc(lane=self.name)
+                QUEUE_WAIT.observe(0.0, lane=self.name)
+                return 0.0
+            if len(self._waiters) >= self.max_queue:
+                self._reject('queue_full', 429)
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            QUEUED.set(len(self._waiters), lane=self.name)
+
+        if not waiter.wait(self.queue_timeout):
+            with self._lock:
+                # The slot may have been handed over between the timeout and taking the lock
+                if not waiter.is_set():
+                    self._waiters.remove(waiter)
+                    QUEUED.set(len(self._waiters), lane=self.name)
+                    self._reject('queue_timeout', 503)
+
+        waited = time.perf_counter() - start
+        ADMITTED.inc(lane=self.name)
+        QUEUE_WAIT.observe(waited, lane=self.name)
+        return waited
+
+    def release(self, seconds):
+        """Free the slot of a request that ran for ``seconds``, handing it to the oldest waiter"""
+        with self._lock:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * seconds
+            if self._waiters:
+                self._waiters.popleft().set()
+                QUEUED.set(len(self._waiters), lane=self.name)
+            else:
+                self._active -= 1
+                ACTIVE.set(self._active, lane=self.name)
+
+    def stats(self):
+        with self._lock:
+            active, queued, avg_seconds = self._active, len(self._waiters), self._avg_seconds
+        wait = QUEUE_WAIT.snapshot(lane=self.name)
+        return {
+            'limit': self.limit,
+            'max_queue': self.max_queue,
+            'queue_timeout_seconds': self.queue_timeout,
+            'active': active,
+            'queued': queued,
+            'admitted': ADMITTED.value(lane=self.name),
+            'rejected': {reason: REJECTED.value(lane=self.name, reason=reason) for reason in ('queue_full', 'queue_timeout')},
+            'avg_queue_wait_seconds': round(wait['sum'] / wait['count'], 4) if wait['count'] else 0.0,
+            'avg_request_seconds': round(avg_seconds, 4)
+        }
+
+
+class AdmissionController:
+    """The model and light lanes with their configured limits"""
+
+    def __init__(self, limits=LANE_LIMITS):
+        self.lanes = {name: AdmissionLane(name, *config) for name, config in limits.items()}
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,119 @@
+"""
+BizEye Analysis Graph
+Analysis stages with declared dependencies, memoized per dataset version and filter combination
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from monitoring import REGISTRY
+from single_flight import SingleFlight
+
+# Stage outputs kept for the current dataset version (across all filter combinations)
+MAX_MEMO_ENTRIES = int(os.environ.get('BIZEYE_ANALYSIS_MEMO_SIZE', '256'))
+
+STAGE_LOOKUPS = REGISTRY.counter(
+    'bizeye_analysis_stage_lookups_total', 'Analysis stage lookups by stage and result (hit or computed)',
+    ('stage', 'result'))
+STAGE_SECONDS = REGISTRY.counter(
+    'bizeye_analysis_stage_seconds_total', 'Seconds spent computing analysis stages, upstream stages excluded',
+    ('stage',))
+
+
+class AnalysisGraph:
+    """Named analysis stages, each a function of the stages it depends on
+
+    ``compute(stage, version, key, context)`` returns a stage's output for a
+    dataset version and request key (the filter combination), computing only
+    the upstream stages that are not memoized yet. Concurrent requests that
+    miss the same stage share one computation. Root stages receive
+    ``context``; the others receive the outputs of their dependencies in the
+    declared order. Everything is dropped when the dataset version changes.
+    """
+
+    def __init__(self, name, max_entries=MAX_MEMO_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+        self._version = None
+        self._flights = SingleFlight(f'analysis-{name}')
+
+    def stage(self, name, *dependencies, memoize=True):
+        """Register the decorated function as a stage depending on ``dependencies``"""
+        missing = [dependency for dependency in dependencies if dependency not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+
+        def register(fn):
+            self._stages[name] = (fn, dependencies, memoize)
+            return fn
+        return register
+
+    def _lookup(self, memo_key, version):
+        with self._lock:
+            if self._version != version:
+                self._memo.clear()
+                self._version = version
+            if memo_key not in self._memo:
+                return False, None
+            self._memo.move_to_end(memo_key)
+            return True, self._memo[memo_key]
+
+    def _store(self, memo_key, version, output):
+        with self._lock:
+            # A newer dataset may have landed while this stage was running
+            if self._version != version:
+                return
+            self._memo[memo_key] = output
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def compute(self, stage, version, key, context):
+        """Output of a stage for a dataset version and request key"""
+        fn, dependencies, memoize = self._stages[stage]
+        memo_key = (stage, key)
+        if memoize:
+            found, output = self._lookup(memo_key, version)
+            if found:
+                STAGE_LOOKUPS.inc(stage=stage, result='hit')
+                return output
+
+        def run():
+            inputs = [self.compute(dependency, version, key, context) for dependency in dependencies]
+            start = time.perf_counter()
+            output = fn(*inputs) if dependencies else fn(context)
+            STAGE_SECONDS.inc(time.perf_counter() - start, stage=stage)
+            if memoize:
+                self._store(memo_key, version, output)
+            return output
+
+        STAGE_LOOKUPS.inc(stage=stage, result='computed')
+        if not memoize:
+            return run()
+        output, _ = self._flights.do((version, stage, key), run)
+        return output
+
+    def stats(self):
+        with self._lock:
+            memoized = {}
+            for stage, _ in self._memo:
+                memoized[stage] = memoized.get(stage, 0) + 1
+            version = self._version
+        return {
+            'dataset_version': version,
+            'entries': sum(memoized.values()),
+            'max_entries': self.max_entries,
+            'stages': {
+                stage: {
+                    'depends_on': list(dependencies),
+                    'memoized': memoized.get(stage, 0),
+                    'hits': STAGE_LOOKUPS.value(stage=stage, result='hit'),
+                    'computed': STAGE_LOOKUPS.value(stage=stage, result='computed'),
+                    'seconds': round(STAGE_SECONDS.value(stage=stage), 4)
+                } for stage, (_, dependencies, _) in self._stages.items()
+            }
+        }
@@ -3,7 +3,8 @@ BizEye Backend API Server
 Comprehensive Flask API integrating Sales Analysis, Sentiment Analysis, and Predictive Analytics
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -13,6 +14,12 @@ from datetime import datetime
 import warnings
 import re
 import json
+import time
+import hmac
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Custom JSON encoder to handle numpy types
 class NumpyEncoder(json.JSONEncoder):
@@ -26,6 +33,16 @@ class NumpyEncoder(json.JSONEncoder):
         return super(NumpyEncoder, self).default(obj)
 warnings.filterwarnings('ignore')
 
+# Flask 2.3+ ignores app.json_encoder; serialize numpy values and Arrow missing values (pd.NA) here
+class NumpyJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(obj):
+        if obj is pd.NA:
+            return None
+        if isinstance(obj, (np.integer, np.floating, np.ndarray)):
+            return NumpyEncoder().default(obj)
+        return DefaultJSONProvider.default(obj)
+
 # Custom JSON encoder to handle NaN and Infinity values
 class SafeJSONEncoder(json.JSONEncoder):
     def encode(self, obj):
@@ -37,6 +54,33 @@ class SafeJSONEncoder(json.JSONEncoder):
         return super().encode(obj)
 
 # Import our custom modules
+from monitoring import (REGISTRY, track_model_call, HTTP_REQUESTS, HTTP_ERRORS, HTTP_LATENCY,
+                        HTTP_CPU_SECONDS, HTTP_RESPONSE_BYTES, HTTP_IN_FLIGHT)
+from profiling import RequestProfiler, route_is_configured, list_profiles, load_profile
+from inference_scheduler import InferenceScheduler, BATCHING_ENABLED as INFERENCE_BATCHING_ENABLED
+from near_duplicates import NearDuplicateIndex
+from token_batching import TokenBatcher, MAX_SEQUENCE_LENGTH
+from sentiment_cascade import (SentimentCascade, SENTIMENT_MODE, LEXICON, CASCADE_BAND, EVALUATION_BANDS,
+                               MAX_EVALUATION_REVIEWS, evaluate_bands, load_lexicon)
+from review_search import ReviewSearchIndex
+from bitmap_index import BitmapIndex, DIMENSIONS as FILTER_DIMENSIONS
+from columnar_store import FrameQueries, STORAGE_BACKEND, CHUNK_ROWS, FRAME_ROWS as DUCKDB_FRAME_ROWS
+from string_storage import use_arrow_strings
+from upload_formats import SUPPORTED_UPLOADS, read_upload, upload_chunks, upload_format
+from chunked_uploads import ChunkedUploads, UploadError
+from shared_dataset import SharedDataset, SHARED_DATASET_DIR
+from single_flight import SingleFlight
+from recommendation_store import RecommendationStore, RECOMMENDATION_STORE_PATH, content_hash
+from data_export import EXPORT_FORMATS, EXPORT_CHUNK_ROWS, frame_chunks, stream_export
+from admission import AdmissionController, AdmissionRejected, ADMISSION_ENABLED, route_lane
+from deadlines import Deadline, DeadlineExceeded, LatencyEstimate, GENERATION_RESERVE_SECONDS
+from analysis_graph import AnalysisGraph
+from precompute import PrecomputeScheduler, ResponseCache, build_tasks, PRECOMPUTE_ENABLED
+try:
+    from issue_discovery import IssueDiscoveryEngine, ISSUE_SENTIMENTS
+except ImportError as e:
+    print(f"⚠️  Issue discovery not available: {e}")
+    IssueDiscoveryEngine = None
 sys.path.append(os.path.join(os.path.dirname(__file__), 'Sales forecasting'))
 
 # Import unified analytics modules
@@ -54,43 +98,133 @@ except ImportError:
         def calculate_metrics(self, recent_days, product_id):
             return {"historical_avg": 120, "recent_sales": 94, "performance_change": -21.3}
 
-# Step 1: Install required libraries (only run once)
-# pip install transformers torch
+# Shared inference worker: when set, models live in inference_worker.py instead of this process
+INFERENCE_SOCKET = os.environ.get('BIZEYE_INFERENCE_SOCKET')
+
+if INFERENCE_SOCKET:
+    from inference_worker import InferenceClient, InferenceWorkerError, GENERATION_KWARGS
+    inference_client = InferenceClient(INFERENCE_SOCKET)
+    sentiment_pipeline = None
+    print(f"✅ Using shared inference worker at {INFERENCE_SOCKET}")
+else:
+    from inference_worker import GENERATION_KWARGS
+    inference_client = None
+    
+    # Step 1: Install required libraries (only run once)
+    # pip install transformers torch
+    
+    # Step 2: Import necessary library
+    from transformers import pipeline
+    
+    # Step 3: Load the sentiment analysis pipeline using a pre-trained model
+    sentiment_pipeline = pipeline("sentiment-analysis")
+
+# Tokenize once and batch by padded tokens; without torch the pipeline still truncates long reviews
+sentiment_batcher = TokenBatcher.from_pipeline('sentiment', sentiment_pipeline) if sentiment_pipeline is not None else None
+
+def score_sentiment_batch(texts):
+    """Run the sentiment pipeline once over a batch of texts"""
+    with track_model_call('sentiment', len(texts)):
+        if inference_client is not None:
+            return inference_client.sentiment(texts)
+        if sentiment_batcher is not None:
+            return sentiment_batcher(texts)
+        return sentiment_pipeline(list(texts), batch_size=len(texts), truncation=True, max_length=MAX_SEQUENCE_LENGTH)
+
+def map_sentiment_result(result):
+    """Map a raw pipeline result to our label and the model confidence"""
+    # Extract the predicted sentiment and confidence score
+    predicted_sentiment = result['label']
+    confidence_score = float(result['score'])
+    
+    # Map the model labels to our labels with confidence threshold
+    # The default model uses 'POSITIVE' and 'NEGATIVE' labels
+    if 'POSITIVE' in predicted_sentiment and confidence_score > 0.8:
+        return 'positive', confidence_score
+    elif 'NEGATIVE' in predicted_sentiment and confidence_score > 0.8:
+        return 'negative', confidence_score
+    else:
+        # If confidence is low or moderate, classify as neutral
+        return 'neutral', confidence_score
+
+# Concurrent requests share batched forward passes through the scheduler
+sentiment_scheduler = InferenceScheduler('sentiment', score_sentiment_batch) if INFERENCE_BATCHING_ENABLED else None
+
+# Optional lexicon first pass: the transformer only sees reviews whose lexicon polarity is ambiguous
+sentiment_cascade = None
+if SENTIMENT_MODE == 'cascade':
+    lexicon_polarity = load_lexicon()
+    if lexicon_polarity is not None:
+        sentiment_cascade = SentimentCascade(lexicon_polarity)
+        print(f"✅ Sentiment cascade: {LEXICON} lexicon first, transformer for polarity in {CASCADE_BAND}")
+    else:
+        print(f"⚠️  Sentiment lexicon '{LEXICON}' not installed, scoring every review with the transformer")
 
-# Step 2: Import necessary library
-from transformers import pipeline
+def audit_lexicon_label(lexicon_label, future):
+    """Compare a lexicon label with the transformer's once the audit inference finishes"""
+    try:
+        sentiment_cascade.record_audit(lexicon_label, map_sentiment_result(future.result())[0])
+    except Exception as e:
+        print(f"Error in sentiment audit: {e}")
+
+def get_sentiments_with_scores(texts):
+    """Get sentiment labels and confidences for many texts using batched inference"""
+    results = [('neutral', None)] * len(texts)
+    pending = [(idx, str(text).strip()) for idx, text in enumerate(texts)
+               if not (pd.isna(text) or str(text).strip() == '')]
+    if not pending:
+        return results
+    
+    # (row, text, lexicon label) of the texts the transformer scores
+    model_pending = [(idx, text, None) for idx, text in pending]
+    if sentiment_cascade is not None:
+        # Clear-cut reviews keep their lexicon label; the ambiguous ones and a few audits go to the model
+        lexicon_labels, audit = sentiment_cascade.triage([text for _, text in pending])
+        audit = set(audit)
+        model_pending = []
+        for position, ((idx, text), label) in enumerate(zip(pending, lexicon_labels)):
+            if label is not None:
+                results[idx] = label
+            if label is None or position in audit:
+                model_pending.append((idx, text, label))
+        if not model_pending:
+            return results
+    
+    texts_to_score = [text for _, text, _ in model_pending]
+    if sentiment_scheduler is not None:
+        futures = sentiment_scheduler.submit(texts_to_score)
+    else:
+        futures = None
+    
+    for position, (idx, text, lexicon_label) in enumerate(model_pending):
+        if lexicon_label is not None:
+            # Audits never hold up the response when batching provides futures
+            if futures is not None:
+                futures[position].add_done_callback(functools.partial(audit_lexicon_label, lexicon_label[0]))
+            else:
+                try:
+                    sentiment_cascade.record_audit(lexicon_label[0], map_sentiment_result(score_sentiment_batch([text])[0])[0])
+                except Exception as e:
+                    print(f"Error in sentiment audit: {e}")
+            continue
+        try:
+            if futures is not None:
+                raw = futures[position].result()
+            else:
+                raw = score_sentiment_batch([text])[0]
+            results[idx] = map_sentiment_result(raw)
+        except Exception as e:
+            print(f"Error in sentiment analysis: {e}")
+            results[idx] = ('neutral', None)
+    return results
 
-# Step 3: Load the sentiment analysis pipeline using a pre-trained model
-sentiment_pipeline = pipeline("sentiment-analysis")
+def get_sentiment_with_score(text):
+    """Get sentiment label and model confidence using the working Hugging Face code"""
+    return get_sentiments_with_scores([text])[0]
 
 def get_sentiment(text):
     """Get sentiment analysis using the working Hugging Face code"""
-    if pd.isna(text) or text == '' or str(text).strip() == '':
-        return 'neutral'
-    
-    try:
-        text_str = str(text).strip()
-        
-        # Perform sentiment analysis using the pre-trained pipeline
-        result = sentiment_pipeline(text_str)
-        
-        # Extract the predicted sentiment and confidence score
-        predicted_sentiment = result[0]['label']
-        confidence_score = result[0]['score']
-        
-        # Map the model labels to our labels with confidence threshold
-        # The default model uses 'POSITIVE' and 'NEGATIVE' labels
-        if 'POSITIVE' in predicted_sentiment and confidence_score > 0.8:
-            return 'positive'
-        elif 'NEGATIVE' in predicted_sentiment and confidence_score > 0.8:
-            return 'negative'
-        else:
-            # If confidence is low or moderate, classify as neutral
-            return 'neutral'
-            
-    except Exception as e:
-        print(f"Error in sentiment analysis: {e}")
-        return "neutral"
+    return get_sentiment_with_score(text)[0]
 
 # Import advanced AI models
 try:
@@ -118,20 +252,568 @@ CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://192
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
      supports_credentials=False)  # Enhanced CORS for frontend integration
 app.json_encoder = NumpyEncoder  # Use custom JSON encoder for numpy types
+app.json = NumpyJSONProvider(app)
 
 # Global variables to store loaded data
 sentiment_data = None
 sales_analyzer = ProductPerformanceAnalyzer()
+review_index = None  # Near-duplicate clusters over the review column
+search_index = None  # Full-text inverted index over the review column
+filter_index = None  # Bitmap indexes for the category/region/payment/sentiment/rating filters
+dataset_lock = threading.Lock()  # Serializes uploads and appends
+dataset_version = 0  # Incremented whenever the loaded dataset changes
+issue_engine = None  # Incremental issue clusters over negative/neutral reviews
+
+# Optional on-disk columnar backend: datasets live in Parquet and aggregations run in DuckDB
+columnar_store = None
+if STORAGE_BACKEND == 'duckdb':
+    try:
+        from columnar_store import ColumnarStore
+        columnar_store = ColumnarStore()
+        print(f"✅ Using DuckDB columnar storage at {columnar_store.directory}")
+    except Exception as e:
+        print(f"⚠️  DuckDB storage not available, keeping datasets in memory: {e}")
+
+# Optional shared-memory dataset: workers attach to memory-mapped Arrow generations
+shared_dataset = None
+shared_generation = 0  # Generation this worker has attached
+if SHARED_DATASET_DIR and columnar_store is None:
+    try:
+        shared_dataset = SharedDataset()
+        print(f"✅ Sharing datasets between workers through {shared_dataset.directory}")
+    except Exception as e:
+        print(f"⚠️  Shared dataset not available, each worker keeps its own copy: {e}")
+
+# Generated recommendations persisted per category group, reused while the group's problem reviews are unchanged
+recommendation_store = None
+if RECOMMENDATION_STORE_PATH:
+    try:
+        recommendation_store = RecommendationStore()
+        print(f"✅ Recommendation store at {recommendation_store.path}")
+    except Exception as e:
+        print(f"⚠️  Recommendation store not available, recommendations are regenerated on every call: {e}")
+
+# Resumable uploads sent in parts; without the columnar store, CSV/NDJSON parts are parsed as they arrive
+chunked_uploads = ChunkedUploads(parse_early=columnar_store is None, chunk_rows=CHUNK_ROWS)
+
+# Distinct review texts whose sentiment is remembered while streaming a file into the columnar store
+COLUMNAR_SENTIMENT_CACHE_SIZE = 100000
+
+# Token required for admin-only features (disabled when unset)
+ADMIN_TOKEN = os.environ.get('BIZEYE_ADMIN_TOKEN')
+
+# Map CSV columns to expected column names
+COLUMN_MAPPING = {
+    'Product ID': 'product_id',
+    'Product Name': 'product_name', 
+    'Product Category': 'product_category',
+    'Rating': 'rating',
+    'Reviews': 'review',  # Map 'Reviews' to 'review'
+    'Date': 'date'  # Map 'Date' to 'date'
+}
+
+def map_dataset_columns(data):
+    """Copy CSV columns to the names the analytics expect"""
+    # Apply column mapping
+    for old_col, new_col in COLUMN_MAPPING.items():
+        if old_col in data.columns and new_col not in data.columns:
+            data[new_col] = data[old_col]
+
+def add_default_columns(data, first_row=0):
+    """Fill in product columns and sales figures missing from the dataset"""
+    # Ensure required columns exist
+    required_columns = ['product_id', 'product_name', 'product_category', 'rating', 'review']
+    for col in required_columns:
+        if col not in data.columns:
+            if col == 'product_id':
+                data[col] = [f"P{i:03d}" for i in range(first_row + 1, first_row + len(data) + 1)]
+            elif col == 'product_name':
+                data[col] = data.get('Product Name', 'Unknown Product')
+            elif col == 'product_category':
+                data[col] = data.get('Product Category', 'General')
+            elif col == 'rating':
+                data[col] = data.get('Rating', 4.0)
+            elif col == 'review':
+                data[col] = data.get('Reviews', 'No review available')
+    
+    # Add sales data if not present
+    if 'Units Sold' not in data.columns:
+        data['Units Sold'] = np.random.randint(1, 50, len(data))
+    if 'Unit Price' not in data.columns:
+        data['Unit Price'] = np.random.uniform(10, 500, len(data))
+    if 'Total Revenue' not in data.columns:
+        data['Total Revenue'] = data['Units Sold'] * data['Unit Price']
+
+def prepare_dataset(data, score_sentiment=True, existing=None):
+    """Apply column mapping, sentiment scoring and default sales columns to a raw dataset
+    
+    When ``existing`` is given the new rows are appended to it and copies of
+    the current review indexes are extended instead of rebuilt. Returns the
+    dataset and its indexes for ``install_dataset``; the live indexes are
+    never modified, so readers keep a consistent dataset until the swap.
+    """
+    review_index = search_index = filter_index = issue_engine = None
+    if existing is not None:
+        review_index, search_index, filter_index, issue_engine = (
+            index.copy() if index is not None else None for index in dataset_indexes())
+    
+    map_dataset_columns(data)
+    
+    # Group near-duplicate reviews so model work runs once per cluster
+    cluster_labels = None
+    if 'review' in data.columns:
+        if review_index is None:
+            review_index = NearDuplicateIndex()
+        review_index.add(data['review'].tolist())
+        cluster_labels, representatives, cluster_sizes = review_index.clusters()
+        new_labels = cluster_labels[len(cluster_labels) - len(data):]
+        data['review_cluster'] = new_labels
+        print(f"Found {len(representatives)} distinct review clusters in {len(cluster_labels)} reviews")
+    
+    # Process sentiment if review column exists
+    if score_sentiment and 'review' in data.columns:
+        print("Processing sentiment analysis...")
+        # Labels are only shared by exact (normalized) duplicates: a near-duplicate can be a negation
+        row_texts = review_index.text_ids()
+        text_sentiment = np.full(int(row_texts.max()) + 1, None, dtype=object)
+        text_scores = np.full(len(text_sentiment), np.nan)
+        
+        # Texts already present in the existing rows keep their stored sentiment
+        old_texts, new_texts = row_texts[:len(row_texts) - len(data)], row_texts[len(row_texts) - len(data):]
+        if existing is not None and len(old_texts) and 'sentiment' in existing.columns:
+            _, first_rows = np.unique(old_texts, return_index=True)
+            text_sentiment[old_texts[first_rows]] = existing['sentiment'].values[first_rows]
+            if 'sentiment_score' in existing.columns:
+                text_scores[old_texts[first_rows]] = existing['sentiment_score'].values[first_rows]
+        
+        # Score each new distinct text once and broadcast to its duplicates
+        _, first_rows = np.unique(new_texts, return_index=True)
+        first_rows = first_rows[pd.isna(text_sentiment[new_texts[first_rows]])]
+        scored = get_sentiments_with_scores(data['review'].iloc[first_rows].tolist())
+        text_sentiment[new_texts[first_rows]] = [label for label, _ in scored]
+        text_scores[new_texts[first_rows]] = pd.to_numeric([score for _, score in scored], errors='coerce')
+        data['sentiment'] = text_sentiment[new_texts]
+        data['sentiment_score'] = text_scores[new_texts]
+        print(f"Sentiment analysis completed! ({len(first_rows)} distinct reviews scored)")
+    
+    add_default_columns(data, len(existing) if existing is not None else 0)
+    
+    # Feed new issue reviews to the clustering engine
+    if IssueDiscoveryEngine is not None and 'sentiment' in data.columns:
+        if issue_engine is None:
+            issue_engine = IssueDiscoveryEngine()
+            if existing is not None and 'sentiment' in existing.columns:
+                issue_engine.partial_fit(existing.loc[existing['sentiment'].isin(ISSUE_SENTIMENTS), 'review'])
+        issue_engine.partial_fit(data.loc[data['sentiment'].isin(ISSUE_SENTIMENTS), 'review'])
+    
+    # Extend the full-text index with the new rows
+    if search_index is None:
+        search_index = ReviewSearchIndex()
+        if existing is not None:
+            search_index.add(existing)
+    search_index.add(data)
+    
+    # Extend the filter bitmaps with the new rows
+    if filter_index is None:
+        filter_index = BitmapIndex()
+        if existing is not None:
+            filter_index.add(existing)
+    filter_index.add(data)
+    
+    if existing is not None:
+        data = pd.concat([existing, data], ignore_index=True)
+        if cluster_labels is not None and len(cluster_labels) == len(data):
+            # Dense cluster labels may shift when appended rows merge clusters
+            data['review_cluster'] = cluster_labels
+    
+    # Keep review text and string dimensions in Arrow buffers instead of Python objects
+    use_arrow_strings(data)
+    
+    return data, (review_index, search_index, filter_index, issue_engine)
+
+def dataset_indexes():
+    """The review, search, filter and issue indexes of the current dataset"""
+    return review_index, search_index, filter_index, issue_engine
+
+def install_dataset(data, indexes=(None, None, None, None)):
+    """Swap in a dataset together with its review, search, filter and issue indexes"""
+    global sentiment_data, review_index, search_index, filter_index, issue_engine, dataset_version
+    
+    # The frame goes first: indexes only ever cover rows the frame already has
+    sentiment_data, review_index, search_index, filter_index, issue_engine = (data,) + tuple(indexes)
+    dataset_version += 1
+
+def read_uploaded_file(filepath, fmt):
+    """Read an uploaded CSV, NDJSON or Parquet file in one pass, skipping malformed lines"""
+    data, malformed = read_upload(filepath, fmt)
+    if malformed:
+        print(f"⚠️  Skipped {malformed} malformed {fmt.upper()} lines")
+    return data
+
+def get_request_filters():
+    """Dimension filters from the query string (repeated or comma separated values)"""
+    filters = {}
+    for dimension in FILTER_DIMENSIONS:
+        values = [value.strip() for raw in request.args.getlist(dimension) for value in raw.split(',')]
+        values = [value for value in values if value and value.lower() != 'all']
+        if values:
+            filters[dimension] = values
+    return filters
+
+def get_filtered_rows(data):
+    """Bitmap of rows matching the request filters, or None when the request is unfiltered"""
+    filters = get_request_filters()
+    if not filters or filter_index is None:
+        return None
+    return filter_index.resolve(filters, n_rows=len(data))
+
+def get_filtered_data(data):
+    """Rows of the dataset matching the request filters"""
+    rows = get_filtered_rows(data)
+    if rows is None:
+        return data
+    return data.take(rows.to_positions())
+
+def prepare_columnar_chunk(data, first_row, sentiment_cache):
+    """Column mapping, defaults and sentiment for one chunk streamed into the columnar store
+    
+    Sentiment is scored once per distinct review text; ``sentiment_cache``
+    carries results across the chunks of one file.
+    """
+    map_dataset_columns(data)
+    add_default_columns(data, first_row)
+    
+    reviews = data['review'].fillna('').astype(str)
+    codes, uniques = pd.factorize(reviews)
+    missing = [text for text in uniques if text not in sentiment_cache]
+    if missing:
+        if len(sentiment_cache) + len(missing) > COLUMNAR_SENTIMENT_CACHE_SIZE:
+            sentiment_cache.clear()
+        sentiment_cache.update(zip(missing, get_sentiments_with_scores(missing)))
+    scored = [sentiment_cache[text] for text in uniques]
+    data['sentiment'] = np.array([label for label, _ in scored], dtype=object)[codes]
+    data['sentiment_score'] = pd.to_numeric([score for _, score in scored], errors='coerce')[codes]
+    return data
+
+def ingest_into_columnar_store(chunks, append=False):
+    """Stream the chunks of an upload into the columnar store; returns the number of rows written
+    
+    Call while holding ``dataset_lock``.
+    """
+    if not append:
+        columnar_store.clear()
+    
+    written, sentiment_cache = 0, {}
+    first_row = columnar_store.count()
+    for chunk in chunks:
+        chunk = prepare_columnar_chunk(chunk, first_row + written, sentiment_cache)
+        written += columnar_store.write_part(chunk)
+        print(f"Stored {written} records in the columnar store")
+    
+    # Rows live on disk; the in-memory dataset and its indexes are not used
+    install_dataset(None)
+    return written
+
+def build_dataset_indexes(data):
+    """Build the review, search, filter and issue indexes for a prepared dataset"""
+    review_index = search_index = filter_index = issue_engine = None
+    if data is None:
+        return review_index, search_index, filter_index, issue_engine
+    if 'review' in data.columns:
+        review_index = NearDuplicateIndex()
+        review_index.add(data['review'].tolist())
+    search_index = ReviewSearchIndex()
+    search_index.add(data)
+    filter_index = BitmapIndex()
+    filter_index.add(data)
+    if IssueDiscoveryEngine is not None and 'sentiment' in data.columns:
+        issue_engine = IssueDiscoveryEngine()
+        issue_engine.partial_fit(data.loc[data['sentiment'].isin(ISSUE_SENTIMENTS), 'review'])
+    return review_index, search_index, filter_index, issue_engine
+
+def attach_shared_generation(pointer=None, indexed=False):
+    """Switch this worker to a published generation; ``indexed`` keeps the current indexes"""
+    pointer = pointer or shared_dataset.current()
+    data = shared_dataset.attach(pointer)
+    install_shared_generation(pointer, data, dataset_indexes() if indexed else build_dataset_indexes(data))
+
+def install_shared_generation(pointer, data, indexes):
+    """Serve an attached generation and its indexes from now on"""
+    global shared_generation
+    
+    install_dataset(data, indexes)
+    shared_generation = pointer['generation']
+    print(f"🔄 Attached shared dataset generation {shared_generation} ({pointer.get('rows', 0)} records)")
+
+# Held while a background thread attaches a generation published by another worker
+shared_sync_lock = threading.Lock()
+
+def refresh_shared_generation():
+    """Attach the current generation and build its indexes off the request path, then swap them in"""
+    try:
+        pointer = shared_dataset.current()
+        data = shared_dataset.attach(pointer)
+        indexes = build_dataset_indexes(data)
+        with dataset_lock:
+            # An upload handled by this worker may have attached a newer generation meanwhile
+            if pointer['generation'] > shared_generation:
+                install_shared_generation(pointer, data, indexes)
+                schedule_precompute()
+    except Exception as e:
+        print(f"⚠️  Could not attach shared dataset generation: {e}")
+    finally:
+        shared_sync_lock.release()
+
+@app.before_request
+def sync_shared_dataset():
+    """Start picking up a generation published by another worker; requests keep the previous one until it is ready"""
+    if shared_dataset is None or shared_dataset.current()['generation'] == shared_generation:
+        return
+    if shared_sync_lock.acquire(blocking=False):
+        threading.Thread(target=refresh_shared_generation, name='bizeye-shared-sync', daemon=True).start()
+
+def publish_shared_dataset():
+    """Publish the worker's dataset as a new generation and serve it from the shared mapping
+
+    Call while holding ``shared_dataset.lock()``.
+    """
+    shared_dataset.publish(sentiment_data)
+    # The indexes were built from the same rows, so only the frame is swapped
+    attach_shared_generation(indexed=True)
+
+# Concurrent identical requests to expensive endpoints share one computation
+request_flights = SingleFlight('expensive-endpoints')
+
+def get_response_key():
+    """Path, query string and dataset version identifying a computed response"""
+    return (request.path, tuple(sorted(request.args.items(multi=True))), dataset_version)
+
+def freeze_response(rv):
+    """View return value as an immutable (body, status, headers) triple"""
+    response = app.make_response(rv)
+    return response.get_data(), response.status_code, list(response.headers.items())
+
+def coalesce_requests(view):
+    """Run a view once for concurrent requests with the same path, query string and dataset version"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        def compute():
+            return freeze_response(view(*args, **kwargs)), bool(g.get('degraded'))
+        
+        # Every waiter gets its own Response so per-request hooks never share state
+        ((body, status, headers), degraded), shared = request_flights.do(get_response_key(), compute)
+        if degraded:
+            g.degraded = True
+        response = Response(body, status=status, headers=headers)
+        if shared:
+            response.headers['X-Coalesced'] = '1'
+        return response
+    return wrapper
+
+# Read-through cache for the dashboard endpoints, filled by the precompute scheduler
+response_cache = ResponseCache()
+
+def serve_precomputed(view):
+    """Serve a cached result for the current dataset version, caching successful responses
+    
+    The cache is only used while precompute is enabled; otherwise every
+    request runs the view.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not PRECOMPUTE_ENABLED:
+            return view(*args, **kwargs)
+        key = get_response_key()
+        cached = response_cache.get(key)
+        if cached is not None:
+            body, status, headers = cached
+            response = Response(body, status=status, headers=headers)
+            response.headers['X-Precomputed'] = '1'
+            return response
+        
+        body, status, headers = freeze_response(view(*args, **kwargs))
+        # Responses with template fallbacks forced by the deadline are not kept
+        if status == 200 and not g.get('degraded'):
+            response_cache.put(key, (body, status, [(name, value) for name, value in headers if name != 'X-Coalesced']))
+        return Response(body, status=status, headers=headers)
+    return wrapper
+
+def run_precompute_task(path, params):
+    """Compute one endpoint result into the response cache; returns the HTTP status
+    
+    Tasks take a slot in the route's admission lane and run under a request
+    deadline like live requests, so warming model endpoints never exceeds
+    the model lane's concurrency.
+    """
+    endpoint, view_args = app.url_map.bind('').match(path)
+    lane_name = route_lane(path) if admission is not None else None
+    lane = admission.lanes[lane_name] if lane_name is not None else None
+    if lane is not None:
+        try:
+            lane.acquire()
+        except AdmissionRejected as e:
+            print(f"⚠️  Precompute of {path} {params} deferred: {e}")
+            return e.status
+    # A bare request context skips the before/after hooks, so warming is not counted as live traffic
+    start = time.perf_counter()
+    try:
+        with app.test_request_context(path, query_string=params):
+            g.deadline = Deadline()
+            response = app.make_response(app.view_functions[endpoint](**view_args))
+            return response.status_code
+    finally:
+        if lane is not None:
+            lane.release(time.perf_counter() - start)
+
+precompute_scheduler = PrecomputeScheduler(run_precompute_task, lambda: HTTP_IN_FLIGHT.value() > 0)
+
+def schedule_precompute():
+    """Warm the dashboard endpoints for the current dataset, largest categories first"""
+    if not PRECOMPUTE_ENABLED:
+        return
+    if columnar_store_active():
+        categories = columnar_store.filter_values()['category']
+    elif sentiment_data is not None and filter_index is not None:
+        categories = filter_index.values().get('category', {})
+    else:
+        precompute_scheduler.schedule(dataset_version, [])
+        return
+    ordered = sorted(categories, key=lambda category: -categories[category])
+    precompute_scheduler.schedule(dataset_version, build_tasks(ordered))
+
+def columnar_store_active():
+    """Whether the loaded dataset lives in the columnar store"""
+    return columnar_store is not None and columnar_store.has_data()
+
+def get_query_backend():
+    """Aggregations over the filtered dataset, pushed down to DuckDB when the columnar store is active"""
+    if columnar_store_active():
+        return columnar_store.queries(get_request_filters())
+    if sentiment_data is None:
+        return None
+    return FrameQueries(get_filtered_data(sentiment_data))
+
+def request_filters_key():
+    """Hashable form of the request filters"""
+    return tuple(sorted((dimension, tuple(values)) for dimension, values in get_request_filters().items()))
+
+def request_frame_available():
+    """Whether get_request_frame() can serve this request (in DuckDB mode: within BIZEYE_DUCKDB_FRAME_ROWS)"""
+    if columnar_store_active():
+        return columnar_store.queries(get_request_filters()).count() <= DUCKDB_FRAME_ROWS
+    return sentiment_data is not None
+
+def get_request_frame():
+    """Rows matching the request filters as a frame, read back from the columnar store in DuckDB mode"""
+    if columnar_store_active():
+        return columnar_store.queries(get_request_filters()).rows(0, DUCKDB_FRAME_ROWS)
+    return get_filtered_data(sentiment_data)
+
+# Search indexes over filtered rows read back from the columnar store, newest last
+columnar_search_indexes = OrderedDict()
+columnar_search_lock = threading.Lock()
+COLUMNAR_SEARCH_INDEXES = 4
+
+def get_search_target():
+    """(rows, search index, positions to search or None for all) for the request filters"""
+    if not columnar_store_active():
+        rows = get_filtered_rows(sentiment_data)
+        return sentiment_data, search_index, rows.to_positions() if rows is not None else None
+    
+    # DuckDB mode: index the filtered rows once per dataset version and filter combination
+    key = (dataset_version, request_filters_key())
+    with columnar_search_lock:
+        if key in columnar_search_indexes:
+            columnar_search_indexes.move_to_end(key)
+            return columnar_search_indexes[key] + (None,)
+    data = get_request_frame()
+    index = ReviewSearchIndex()
+    index.add(data)
+    with columnar_search_lock:
+        columnar_search_indexes[key] = (data, index)
+        while len(columnar_search_indexes) > COLUMNAR_SEARCH_INDEXES:
+            columnar_search_indexes.popitem(last=False)
+    return data, index, None
+
+def no_dataset_response():
+    """Error for requests that need a loaded dataset (or, in DuckDB mode, a filtered frame small enough to read back)"""
+    if columnar_store_active():
+        return jsonify({"error": f"The filtered dataset has more than {DUCKDB_FRAME_ROWS} rows; narrow the filters "
+                                 f"or raise BIZEYE_DUCKDB_FRAME_ROWS"}), 400
+    return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
 
 # =============================================================================
 # DATA MANAGEMENT ENDPOINTS
 # =============================================================================
 
+def finish_upload(filename, read_rows, read_chunks, append=False):
+    """Load an upload into the dataset (or the columnar store) and build the API response
+    
+    ``read_rows()`` returns the whole upload as a frame for the in-memory
+    dataset; ``read_chunks()`` yields it chunk by chunk for the columnar store.
+    """
+    if columnar_store is not None:
+        # Stream the file into Parquet instead of loading it into memory
+        with dataset_lock:
+            written = ingest_into_columnar_store(read_chunks(), append=append)
+            schedule_precompute()
+        records = columnar_store.count()
+        if append:
+            print(f"✅ Appended {written} records ({records} total)")
+            return jsonify({
+                "status": "success",
+                "message": "Rows appended successfully",
+                "filename": filename,
+                "appended_records": written,
+                "records": records
+            })
+        print(f"✅ Dataset stored in DuckDB: {records} records")
+        return jsonify({
+            "status": "success",
+            "message": "Dataset uploaded and processed successfully",
+            "filename": filename,
+            "records": records,
+            "columns": columnar_store.columns(),
+            "categories": columnar_store.distinct_values('product_category'),
+            "storage_backend": "duckdb"
+        })
+    
+    new_rows = read_rows()
+    with dataset_lock:
+        if shared_dataset is not None:
+            with shared_dataset.lock():
+                # Append to the latest generation, even if another worker published it
+                if append and shared_dataset.current()['generation'] != shared_generation:
+                    attach_shared_generation()
+                install_dataset(*prepare_dataset(new_rows, existing=sentiment_data if append else None))
+                publish_shared_dataset()
+        else:
+            install_dataset(*prepare_dataset(new_rows, existing=sentiment_data if append else None))
+        schedule_precompute()
+    
+    if append:
+        print(f"✅ Appended {len(new_rows)} records ({len(sentiment_data)} total)")
+        return jsonify({
+            "status": "success",
+            "message": "Rows appended successfully",
+            "filename": filename,
+            "appended_records": len(new_rows),
+            "records": len(sentiment_data)
+        })
+    
+    print(f"✅ Dataset loaded successfully: {len(sentiment_data)} records")
+    return jsonify({
+        "status": "success",
+        "message": "Dataset uploaded and processed successfully",
+        "filename": filename,
+        "records": len(sentiment_data),
+        "columns": list(sentiment_data.columns),
+        "categories": sentiment_data['product_category'].unique().tolist() if 'product_category' in sentiment_data.columns else []
+    })
+
 @app.route('/api/data/upload', methods=['POST'])
 def upload_dataset():
     """Upload and process dataset"""
-    global sentiment_data
-    
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -140,10 +822,11 @@ def upload_dataset():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        if file and file.filename.endswith('.csv'):
-            # Save uploaded file
+        fmt, suffix = upload_format(file.filename)
+        if file and fmt is not None:
+            # Save uploaded file, keeping the suffix that tells the reader its format and compression
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"uploaded_dataset_{timestamp}.csv"
+            filename = f"uploaded_dataset_{timestamp}{suffix}"
             filepath = os.path.join('uploads', filename)
             
             # Create uploads directory if it doesn't exist
@@ -151,85 +834,129 @@ def upload_dataset():
             
             file.save(filepath)
             
-            # Load and process the dataset
-            try:
-                sentiment_data = pd.read_csv(filepath)
-            except pd.errors.ParserError as e:
-                # Try with different parsing options for problematic CSV files
-                print(f"CSV parsing error, trying with different options: {e}")
-                try:
-                    sentiment_data = pd.read_csv(filepath, on_bad_lines='skip', encoding='utf-8')
-                except:
-                    sentiment_data = pd.read_csv(filepath, on_bad_lines='skip', encoding='latin-1')
-            
-            # Map CSV columns to expected column names
-            column_mapping = {
-                'Product ID': 'product_id',
-                'Product Name': 'product_name', 
-                'Product Category': 'product_category',
-                'Rating': 'rating',
-                'Reviews': 'review',  # Map 'Reviews' to 'review'
-                'Date': 'date'  # Map 'Date' to 'date'
-            }
-            
-            # Apply column mapping
-            for old_col, new_col in column_mapping.items():
-                if old_col in sentiment_data.columns and new_col not in sentiment_data.columns:
-                    sentiment_data[new_col] = sentiment_data[old_col]
-            
-            # Process sentiment if review column exists
-            if 'review' in sentiment_data.columns:
-                print("Processing sentiment analysis...")
-                sentiment_data['sentiment'] = sentiment_data['review'].apply(get_sentiment)
-                print("Sentiment analysis completed!")
-            
-            # Ensure required columns exist
-            required_columns = ['product_id', 'product_name', 'product_category', 'rating', 'review']
-            for col in required_columns:
-                if col not in sentiment_data.columns:
-                    if col == 'product_id':
-                        sentiment_data[col] = [f"P{i:03d}" for i in range(1, len(sentiment_data) + 1)]
-                    elif col == 'product_name':
-                        sentiment_data[col] = sentiment_data.get('Product Name', 'Unknown Product')
-                    elif col == 'product_category':
-                        sentiment_data[col] = sentiment_data.get('Product Category', 'General')
-                    elif col == 'rating':
-                        sentiment_data[col] = sentiment_data.get('Rating', 4.0)
-                    elif col == 'review':
-                        sentiment_data[col] = sentiment_data.get('Reviews', 'No review available')
-            
-            # Add sales data if not present
-            if 'Units Sold' not in sentiment_data.columns:
-                sentiment_data['Units Sold'] = np.random.randint(1, 50, len(sentiment_data))
-            if 'Unit Price' not in sentiment_data.columns:
-                sentiment_data['Unit Price'] = np.random.uniform(10, 500, len(sentiment_data))
-            if 'Total Revenue' not in sentiment_data.columns:
-                sentiment_data['Total Revenue'] = sentiment_data['Units Sold'] * sentiment_data['Unit Price']
-            
-            print(f"✅ Dataset loaded successfully: {len(sentiment_data)} records")
-            
-            return jsonify({
-                "status": "success",
-                "message": "Dataset uploaded and processed successfully",
-                "filename": filename,
-                "records": len(sentiment_data),
-                "columns": list(sentiment_data.columns),
-                "categories": sentiment_data['product_category'].unique().tolist() if 'product_category' in sentiment_data.columns else []
-            })
+            return finish_upload(filename, lambda: read_uploaded_file(filepath, fmt),
+                                 lambda: upload_chunks(filepath, fmt, CHUNK_ROWS))
         
         else:
-            return jsonify({"error": "Only CSV files are supported"}), 400
+            return jsonify({"error": f"Unsupported file type. Upload {SUPPORTED_UPLOADS}"}), 400
             
     except Exception as e:
         print(f"Error uploading dataset: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/data/append', methods=['POST'])
+def append_dataset():
+    """Append rows from a CSV, NDJSON or Parquet file to the current dataset"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({"error": "No file selected"}), 400
+        
+        fmt, suffix = upload_format(file.filename)
+        if fmt is None:
+            return jsonify({"error": f"Unsupported file type. Upload {SUPPORTED_UPLOADS}"}), 400
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"appended_dataset_{timestamp}{suffix}"
+        filepath = os.path.join('uploads', filename)
+        os.makedirs('uploads', exist_ok=True)
+        file.save(filepath)
+        
+        return finish_upload(filename, lambda: read_uploaded_file(filepath, fmt),
+                             lambda: upload_chunks(filepath, fmt, CHUNK_ROWS), append=True)
+        
+    except Exception as e:
+        print(f"Error appending dataset: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/data/uploads', methods=['POST'])
+def create_chunked_upload():
+    """Start a resumable upload; parts follow as PUT /api/data/uploads/<id>/parts/<n>"""
+    body = request.get_json(silent=True) or {}
+    mode = body.get('mode', 'replace')
+    if mode not in ('replace', 'append'):
+        return jsonify({"error": "mode must be 'replace' or 'append'"}), 400
+    try:
+        upload = chunked_uploads.create(body.get('filename'), mode)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify({"status": "success", **upload.status()}), 201
+
+@app.route('/api/data/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    """Stored parts with their checksums and the next part to send when resuming"""
+    try:
+        upload = chunked_uploads.get(upload_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify({"status": "success", **upload.status()})
+
+@app.route('/api/data/uploads/<upload_id>/parts/<int:part_number>', methods=['PUT'])
+def upload_part(upload_id, part_number):
+    """Store one part from the raw request body, checked against an optional X-Part-SHA256 header"""
+    try:
+        upload = chunked_uploads.get(upload_id)
+        part = upload.put_part(part_number, request.stream, request.headers.get('X-Part-SHA256'))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify({"status": "success", **part})
+
+@app.route('/api/data/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Check that every part arrived, then load the upload like /api/data/upload or /api/data/append"""
+    body = request.get_json(silent=True) or {}
+    try:
+        total_parts = int(body.get('parts'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "parts (the number of parts sent) is required"}), 400
+    
+    try:
+        upload = chunked_uploads.get(upload_id)
+        upload.complete(total_parts)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    
+    try:
+        response = finish_upload(upload.manifest['filename'], upload.rows, upload.chunks,
+                                 append=upload.manifest['mode'] == 'append')
+    except Exception as e:
+        print(f"Error completing upload {upload_id}: {e}")
+        # Keep the parts so the client can fix what is wrong and complete again
+        upload.reopen()
+        return jsonify({"error": str(e)}), 500
+    chunked_uploads.remove(upload_id)
+    return response
+
+@app.route('/api/data/uploads/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    """Discard an unfinished upload and its parts"""
+    try:
+        chunked_uploads.get(upload_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    chunked_uploads.remove(upload_id)
+    return jsonify({"status": "success", "message": "Upload discarded"})
+
 @app.route('/api/data/status', methods=['GET'])
 def get_data_status():
     """Get current dataset status"""
     global sentiment_data
     
     try:
+        if columnar_store_active():
+            return jsonify({
+                "status": "success",
+                "has_data": True,
+                "records": columnar_store.count(),
+                "columns": columnar_store.columns(),
+                "categories": columnar_store.distinct_values('product_category'),
+                "storage": columnar_store.stats(),
+                "last_updated": datetime.now().isoformat()
+            })
+        
         if sentiment_data is None:
             return jsonify({
                 "status": "no_data",
@@ -243,19 +970,117 @@ def get_data_status():
             "records": len(sentiment_data),
             "columns": list(sentiment_data.columns),
             "categories": sentiment_data['product_category'].unique().tolist() if 'product_category' in sentiment_data.columns else [],
+            "shared_dataset": shared_dataset.stats() if shared_dataset is not None else None,
             "last_updated": datetime.now().isoformat()
         })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/data/filters', methods=['GET'])
+def get_data_filters():
+    """Values available for each filter dimension with their row counts"""
+    try:
+        if columnar_store_active():
+            return jsonify({
+                "status": "success",
+                "filters": columnar_store.filter_values(),
+                "index": columnar_store.stats()
+            })
+        
+        if sentiment_data is None or filter_index is None:
+            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        
+        return jsonify({
+            "status": "success",
+            "filters": filter_index.values(),
+            "index": filter_index.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# (dataset version, engine) clustering every negative/neutral review in the columnar store
+columnar_issue_engine = (None, None)
+# Concurrent exports wait for one fit instead of each fitting their own
+columnar_issue_lock = threading.Lock()
+
+def read_columnar_issue_reviews():
+    """Review texts of the columnar store's negative/neutral rows, one chunk at a time"""
+    queries = columnar_store.queries({'sentiment': list(ISSUE_SENTIMENTS)})
+    return (chunk['review'] for chunk in queries.chunks(EXPORT_CHUNK_ROWS, columns=['review']))
+
+def get_columnar_issue_engine():
+    """Issue clusters over the columnar store's issue reviews, streamed and fitted once per dataset version"""
+    global columnar_issue_engine
+    
+    with columnar_issue_lock:
+        version, engine = columnar_issue_engine
+        if version == dataset_version:
+            return engine
+        version, engine = dataset_version, None
+        if IssueDiscoveryEngine is not None and 'review' in columnar_store.columns():
+            engine = IssueDiscoveryEngine()
+            engine.fit_stream(read_columnar_issue_reviews)
+        columnar_issue_engine = (version, engine)
+        return engine
+
+def prepare_export_chunk(chunk, engine):
+    """Processed columns of an export chunk plus the issue label of negative/neutral reviews"""
+    # Raw CSV columns that were copied to processed names are left out
+    columns = [col for col in chunk.columns if COLUMN_MAPPING.get(col) not in chunk.columns]
+    chunk = chunk[columns].copy()
+    chunk['issue'] = None
+    if engine is not None and 'review' in chunk.columns and 'sentiment' in chunk.columns:
+        # Labels come from the cluster model, so memory does not grow with the dataset
+        is_issue = chunk['sentiment'].isin(ISSUE_SENTIMENTS).values
+        chunk.loc[is_issue, 'issue'] = engine.label_texts(chunk.loc[is_issue, 'review'].astype(object)).values
+    return chunk
+
+@app.route('/api/data/export', methods=['GET'])
+def export_dataset():
+    """Stream the filtered, processed dataset as CSV, NDJSON or Parquet"""
+    try:
+        fmt = request.args.get('format', 'csv', type=str).lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        if columnar_store_active():
+            chunks = columnar_store.queries(get_request_filters()).chunks(EXPORT_CHUNK_ROWS)
+            engine = get_columnar_issue_engine()
+        elif sentiment_data is not None:
+            # Only row positions are materialized; rows are sliced one chunk at a time
+            data = sentiment_data
+            rows = get_filtered_rows(data)
+            chunks = frame_chunks(data, None if rows is None else rows.to_positions(), EXPORT_CHUNK_ROWS)
+            engine = issue_engine
+        else:
+            return no_dataset_response()
+        
+        body = stream_export((prepare_export_chunk(chunk, engine) for chunk in chunks), fmt)
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        filename = f"bizeye_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+        
+    except Exception as e:
+        print(f"Error exporting dataset: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/data/clear', methods=['POST'])
 def clear_dataset():
     """Clear the current dataset"""
-    global sentiment_data
+    global shared_generation
     
     try:
-        sentiment_data = None
+        # Under the lock so a concurrent upload never interleaves with the clear
+        with dataset_lock:
+            if columnar_store is not None:
+                columnar_store.clear()
+            if shared_dataset is not None:
+                with shared_dataset.lock():
+                    shared_generation = shared_dataset.clear()
+            install_dataset(None)
+            schedule_precompute()
         return jsonify({
             "status": "success",
             "message": "Dataset cleared successfully"
@@ -269,23 +1094,21 @@ def clear_dataset():
 # =============================================================================
 
 @app.route('/api/sentiment/analyze', methods=['GET'])
+@serve_precomputed
 def analyze_sentiment():
     """Analyze sentiment from the dataset"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Get category filter parameter
         category = request.args.get('category', None, type=str)
         
-        # Filter by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
         # Calculate sentiment metrics
-        sentiment_counts = filtered_data['sentiment'].value_counts()
-        total_reviews = len(filtered_data)
+        sentiment_counts = queries.sentiment_counts()
+        total_reviews = queries.count()
         positive_reviews = sentiment_counts.get('positive', 0)
         negative_reviews = sentiment_counts.get('negative', 0)
         neutral_reviews = sentiment_counts.get('neutral', 0)
@@ -295,7 +1118,7 @@ def analyze_sentiment():
         neutral_percentage = (neutral_reviews / total_reviews) * 100 if total_reviews > 0 else 0
         
         # Calculate average rating
-        avg_rating = filtered_data['rating'].mean()
+        avg_rating = queries.column_mean('rating')
         
         return jsonify({
             "status": "success",
@@ -311,26 +1134,23 @@ def analyze_sentiment():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/sentiment/reviews', methods=['GET'])
+@serve_precomputed
 def get_sentiment_reviews():
     """Get sentiment reviews with pagination"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Get parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 100, type=int)
-        category = request.args.get('category', None, type=str)
-        
-        # Filter by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
         
         # Pagination
         start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_data = filtered_data.iloc[start_idx:end_idx]
+        paginated_data = queries.rows(start_idx, per_page)
+        total_reviews = queries.count()
         
         # Convert to list of dictionaries
         reviews = []
@@ -347,23 +1167,124 @@ def get_sentiment_reviews():
         return jsonify({
             "status": "success",
             "reviews": reviews,
-            "total_reviews": len(filtered_data),
+            "total_reviews": total_reviews,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": (total_reviews + per_page - 1) // per_page
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sentiment/search', methods=['GET'])
+def search_reviews():
+    """Full-text review search with boolean/phrase queries and BM25 ranking"""
+    try:
+        if not request_frame_available():
+            return no_dataset_response()
+        data, index, positions = get_search_target()
+        if index is None:
+            return no_dataset_response()
+        
+        # Get parameters
+        query = request.args.get('q', '', type=str)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 500)
+        try:
+            date_from = pd.Timestamp(request.args['date_from']) if request.args.get('date_from') else None
+            date_to = pd.Timestamp(request.args['date_to']) if request.args.get('date_to') else None
+        except ValueError as e:
+            return jsonify({"error": f"Invalid date filter: {e}"}), 400
+        
+        start = time.perf_counter()
+        try:
+            results = index.search(query, rows=positions,
+                                   date_from=date_from, date_to=date_to, limit=per_page,
+                                   offset=(page - 1) * per_page, n_rows=len(data))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        query_time_ms = (time.perf_counter() - start) * 1000
+        
+        # Convert to list of dictionaries
+        reviews = []
+        for (_, row), score in zip(data.iloc[results['positions']].iterrows(), results['scores']):
+            reviews.append({
+                'id': row.get('product_id', ''),
+                'productName': row.get('product_name', ''),
+                'category': row.get('product_category', ''),
+                'review': row.get('review', ''),
+                'sentiment': row.get('sentiment', 'neutral'),
+                'rating': row.get('rating', 0),
+                'date': str(row.get('date', '')),
+                'score': round(float(score), 4)
+            })
+        
+        return jsonify({
+            "status": "success",
+            "query": query,
+            "matched_terms": results['terms'],
+            "reviews": reviews,
+            "total_results": results['total'],
             "page": page,
             "per_page": per_page,
-            "total_pages": (len(filtered_data) + per_page - 1) // per_page
+            "total_pages": (results['total'] + per_page - 1) // per_page,
+            "query_time_ms": round(query_time_ms, 2)
         })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/sentiment/cascade', methods=['GET'])
+def get_sentiment_cascade():
+    """Cascade band, lexicon/transformer split and audit agreement"""
+    return jsonify({
+        "status": "success",
+        "mode": SENTIMENT_MODE,
+        "lexicon": LEXICON,
+        "active": sentiment_cascade is not None,
+        "cascade": sentiment_cascade.stats() if sentiment_cascade is not None else None
+    })
+
+@app.route('/api/sentiment/cascade/evaluate', methods=['GET'])
+def evaluate_sentiment_cascade():
+    """Compare cascade bands with full-transformer labels of the loaded reviews (admin only, model lane)"""
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    
+    try:
+        polarity = sentiment_cascade.polarity if sentiment_cascade is not None else load_lexicon()
+        if polarity is None:
+            return jsonify({"error": f"Sentiment lexicon '{LEXICON}' is not installed"}), 400
+        if not request_frame_available():
+            return no_dataset_response()
+        
+        # Full-transformer labels of the distinct reviews are the reference
+        limit = min(max(request.args.get('limit', 2000, type=int), 1), MAX_EVALUATION_REVIEWS)
+        reviews = get_request_frame()['review'].dropna().astype(str).unique()
+        texts = [text for text in reviews[:limit] if text.strip()]
+        transformer_labels = [map_sentiment_result(raw)[0] for start in range(0, len(texts), 64)
+                              for raw in score_sentiment_batch(texts[start:start + 64])]
+        bands = sorted(set(EVALUATION_BANDS) | {CASCADE_BAND})
+        return jsonify({
+            "status": "success",
+            "lexicon": LEXICON,
+            "reviews": len(texts),
+            "bands": evaluate_bands([polarity(text) for text in texts], transformer_labels, bands)
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/sentiment/categories', methods=['GET'])
 def get_sentiment_categories():
     """Get available categories for sentiment analysis"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
-        
-        categories = sentiment_data['product_category'].unique().tolist()
+        if columnar_store_active():
+            categories = columnar_store.distinct_values('product_category')
+        elif sentiment_data is not None:
+            categories = sentiment_data['product_category'].unique().tolist()
+        else:
+            return no_dataset_response()
         
         return jsonify({
             "status": "success",
@@ -378,52 +1299,47 @@ def get_sentiment_categories():
 # =============================================================================
 
 @app.route('/api/sales/analyze', methods=['GET'])
+@serve_precomputed
 def analyze_sales():
     """Analyze sales performance from the dataset"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Get category filter parameter
         category = request.args.get('category', None, type=str)
         
-        # Filter by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
         # Calculate real sales metrics from the filtered dataset
-        total_products = len(filtered_data['product_id'].unique())
-        total_reviews = len(filtered_data)
-        total_units_sold = filtered_data['Units Sold'].sum()
-        total_revenue = filtered_data['Total Revenue'].sum()
-        avg_unit_price = filtered_data['Unit Price'].mean()
+        total_products = queries.distinct_count('product_id')
+        total_reviews = queries.count()
+        total_units_sold = queries.column_sum('Units Sold')
+        total_revenue = queries.column_sum('Total Revenue')
+        avg_unit_price = queries.column_mean('Unit Price')
         
         # Calculate performance metrics
-        avg_rating = filtered_data['rating'].mean()
+        avg_rating = queries.column_mean('rating')
         
         # Check if sentiment column exists, otherwise calculate from reviews
-        if 'sentiment' in filtered_data.columns:
-            positive_reviews = len(filtered_data[filtered_data['sentiment'] == 'positive'])
+        if queries.has_column('sentiment'):
+            positive_reviews = queries.sentiment_counts().get('positive', 0)
         else:
-            # Calculate sentiment from reviews if sentiment column doesn't exist
-            if 'review' in filtered_data.columns:
-                filtered_data['sentiment'] = filtered_data['review'].apply(get_sentiment)
-                positive_reviews = len(filtered_data[filtered_data['sentiment'] == 'positive'])
+            # Calculate sentiment from reviews if sentiment column doesn't exist (in-memory datasets only)
+            if queries.has_column('review'):
+                labels = [label for label, _ in get_sentiments_with_scores(queries.frame['review'].tolist())]
+                positive_reviews = labels.count('positive')
             else:
                 positive_reviews = 0
         
         positive_percentage = (positive_reviews / total_reviews) * 100 if total_reviews > 0 else 0
         
         # Calculate recent vs historical performance (last 7 days vs previous period)
-        filtered_data['date'] = pd.to_datetime(filtered_data['date'])
-        recent_cutoff = filtered_data['date'].max() - pd.Timedelta(days=7)
-        recent_data = filtered_data[filtered_data['date'] >= recent_cutoff]
-        historical_data = filtered_data[filtered_data['date'] < recent_cutoff]
-        
-        if len(historical_data) > 0 and len(recent_data) > 0:
-            historical_avg_revenue = historical_data['Total Revenue'].mean()
-            recent_avg_revenue = recent_data['Total Revenue'].mean()
+        revenue_split = queries.recent_split('Total Revenue', days=7)
+        
+        if revenue_split['historical_rows'] > 0 and revenue_split['recent_rows'] > 0:
+            historical_avg_revenue = revenue_split['historical_avg']
+            recent_avg_revenue = revenue_split['recent_avg']
             performance_change = ((recent_avg_revenue - historical_avg_revenue) / historical_avg_revenue) * 100
         else:
             performance_change = 0
@@ -450,32 +1366,20 @@ def analyze_sales():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/sales/chart-data', methods=['GET'])
+@serve_precomputed
 def get_sales_chart_data():
     """Get sales data formatted for frontend charts"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Get category filter parameter
         category = request.args.get('category', None, type=str)
         
-        # Filter by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
-        # Convert date column to datetime
-        filtered_data['date'] = pd.to_datetime(filtered_data['date'])
-        
-        # Group by date and calculate daily metrics
-        daily_sales = filtered_data.groupby('date').agg({
-            'Total Revenue': 'sum',
-            'Units Sold': 'sum',
-            'product_id': 'count'
-        }).reset_index()
-        
-        # Sort by date
-        daily_sales = daily_sales.sort_values('date')
+        # Daily revenue, units and product counts sorted by date
+        daily_sales = queries.daily_totals()
         
         # Create labels and data for the chart
         labels = [date.strftime('%Y-%m-%d') for date in daily_sales['date']]
@@ -483,8 +1387,8 @@ def get_sales_chart_data():
         units_data = daily_sales['Units Sold'].tolist()
         
         # Calculate quarterly analysis
-        total_sales = filtered_data['Total Revenue'].sum()
-        total_units = filtered_data['Units Sold'].sum()
+        total_sales = queries.column_sum('Total Revenue')
+        total_units = queries.column_sum('Units Sold')
         
         # Calculate growth percentage (comparing recent vs historical)
         if len(revenue_data) >= 4:
@@ -506,12 +1410,12 @@ def get_sales_chart_data():
         
         # Calculate category-wise sales breakdown
         category_sales = {}
-        if 'product_category' in filtered_data.columns:
-            category_breakdown = filtered_data.groupby('product_category').agg({
-                'Total Revenue': 'sum',
-                'Units Sold': 'sum',
-                'product_id': 'count'
-            }).reset_index()
+        if queries.has_column('product_category'):
+            category_breakdown = queries.group_totals('product_category', {
+                'Total Revenue': ('Total Revenue', 'sum'),
+                'Units Sold': ('Units Sold', 'sum'),
+                'product_id': ('product_id', 'count')
+            })
             
             for _, row in category_breakdown.iterrows():
                 category_sales[row['product_category']] = {
@@ -526,7 +1430,7 @@ def get_sales_chart_data():
             "total_units": int(total_units),
             "growth_percentage": round(growth_percentage, 1),
             "avg_daily_sales": round(total_sales / len(daily_sales), 2) if len(daily_sales) > 0 else 0,
-            "total_products": len(filtered_data['product_id'].unique()) if len(filtered_data) > 0 else 0,
+            "total_products": queries.distinct_count('product_id') if queries.count() > 0 else 0,
             "total_days": len(daily_sales),
             "category": category if category and category.lower() != 'all' else 'all'
         }
@@ -563,22 +1467,22 @@ def get_sales_chart_data():
 # =============================================================================
 
 @app.route('/api/unified-analysis', methods=['GET'])
+@serve_precomputed
+@coalesce_requests
 def get_unified_analysis():
     """
     Get comprehensive analysis including sales performance, sentiment analysis, and predictive analytics
     This single endpoint provides all analytics in one response to avoid conflicts
     """
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
         
         # Get category filter parameter
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
+        # Apply category/region/payment method/sentiment/rating filters
+        filtered_data = get_request_frame()
         
         print(f"Unified analysis for category '{category}': {len(filtered_data)} records")
         
@@ -624,8 +1528,8 @@ def get_unified_analysis():
             "data_summary": {
                 "total_records": len(filtered_data),
                 "date_range": {
-                    "start": filtered_data['date'].min().strftime('%Y-%m-%d') if 'date' in filtered_data.columns else None,
-                    "end": filtered_data['date'].max().strftime('%Y-%m-%d') if 'date' in filtered_data.columns else None
+                    "start": pd.to_datetime(filtered_data['date']).min().strftime('%Y-%m-%d') if 'date' in filtered_data.columns else None,
+                    "end": pd.to_datetime(filtered_data['date']).max().strftime('%Y-%m-%d') if 'date' in filtered_data.columns else None
                 },
                 "categories": filtered_data['product_category'].unique().tolist() if 'product_category' in filtered_data.columns else []
             },
@@ -706,7 +1610,7 @@ def analyze_sentiment_data(data):
         else:
             # Calculate sentiment from reviews if sentiment column doesn't exist
             if 'review' in data.columns:
-                data['sentiment'] = data['review'].apply(get_sentiment)
+                data['sentiment'] = [label for label, _ in get_sentiments_with_scores(data['review'].tolist())]
                 sentiment_counts = data['sentiment'].value_counts()
                 total_reviews = len(data)
                 positive_reviews = sentiment_counts.get('positive', 0)
@@ -802,25 +1706,21 @@ def generate_combined_insights(sales_analysis, sentiment_analysis, predictive_an
 # =============================================================================
 
 @app.route('/api/predictions/sales-forecast', methods=['GET'])
+@serve_precomputed
 def get_sales_forecast_prediction():
     """Get sales forecast prediction using simple statistical methods"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         days_ahead = request.args.get('days_ahead', 30, type=int)
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
         # Simple trend-based forecasting
-        if 'date' in filtered_data.columns and 'Total Revenue' in filtered_data.columns:
-            filtered_data['date'] = pd.to_datetime(filtered_data['date'])
-            daily_revenue = filtered_data.groupby('date')['Total Revenue'].sum().reset_index()
-            daily_revenue = daily_revenue.sort_values('date')
+        if queries.has_column('date') and queries.has_column('Total Revenue'):
+            daily_revenue = queries.daily_totals()[['date', 'Total Revenue']]
             
             if len(daily_revenue) > 1:
                 # Calculate trend
@@ -862,26 +1762,30 @@ def get_sales_forecast_prediction():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictions/demand-forecast', methods=['GET'])
+@serve_precomputed
 def get_demand_forecast():
     """Get demand forecast by category using simple statistical methods"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         days_ahead = request.args.get('days_ahead', 30, type=int)
         
         # Calculate demand by category
-        category_demand = sentiment_data.groupby('product_category').agg({
-            'Units Sold': 'sum',
-            'Total Revenue': 'sum',
-            'product_id': 'count'
-        }).reset_index()
+        category_demand = queries.group_totals('product_category', {
+            'Units Sold': ('Units Sold', 'sum'),
+            'Total Revenue': ('Total Revenue', 'sum'),
+            'product_id': ('product_id', 'count')
+        })
+        total_rows = queries.count()
         
         # Simple demand forecasting based on historical patterns
         forecast_data = []
         for _, row in category_demand.iterrows():
             category = row['product_category']
-            avg_daily_demand = row['Units Sold'] / len(sentiment_data) if len(sentiment_data) > 0 else 0
+            avg_daily_demand = row['Units Sold'] / total_rows if total_rows > 0 else 0
             
             forecast_data.append({
                 'category': category,
@@ -900,33 +1804,32 @@ def get_demand_forecast():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictions/inventory-recommendations', methods=['GET'])
+@serve_precomputed
 def get_inventory_recommendations():
     """Get inventory optimization recommendations"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
         # Calculate inventory recommendations based on sales velocity
-        product_performance = filtered_data.groupby('product_id').agg({
-            'Units Sold': 'sum',
-            'Total Revenue': 'sum',
-            'rating': 'mean'
-        }).reset_index()
+        high_demand, low_demand = queries.group_quantiles('product_id', 'Units Sold', 'sum', [0.8, 0.2])
+        product_performance = queries.group_totals('product_id', {
+            'Units Sold': ('Units Sold', 'sum'),
+            'Total Revenue': ('Total Revenue', 'sum'),
+            'rating': ('rating', 'mean')
+        }, positive=['Units Sold'], limit=20)
         
         recommendations = []
         for _, row in product_performance.iterrows():
             if row['Units Sold'] > 0:
                 # Simple inventory recommendation logic
-                if row['Units Sold'] > product_performance['Units Sold'].quantile(0.8):
+                if row['Units Sold'] > high_demand:
                     recommendation = "Increase stock - High demand"
-                elif row['Units Sold'] < product_performance['Units Sold'].quantile(0.2):
+                elif row['Units Sold'] < low_demand:
                     recommendation = "Reduce stock - Low demand"
                 else:
                     recommendation = "Maintain current stock"
@@ -950,15 +1853,18 @@ def get_inventory_recommendations():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictions/churn-analysis', methods=['GET'])
+@serve_precomputed
 def get_churn_analysis():
     """Get customer churn analysis based on sentiment"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Analyze sentiment patterns to predict churn risk
-        sentiment_counts = sentiment_data['sentiment'].value_counts()
-        total_reviews = len(sentiment_data)
+        sentiment_counts = queries.sentiment_counts()
+        total_reviews = queries.count()
         
         negative_percentage = (sentiment_counts.get('negative', 0) / total_reviews) * 100
         positive_percentage = (sentiment_counts.get('positive', 0) / total_reviews) * 100
@@ -988,26 +1894,24 @@ def get_churn_analysis():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictions/price-optimization', methods=['GET'])
+@serve_precomputed
 def get_price_optimization():
     """Get price optimization recommendations"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-        
         # Calculate price optimization based on rating and sales
-        price_analysis = filtered_data.groupby('product_id').agg({
-            'Unit Price': 'mean',
-            'Units Sold': 'sum',
-            'rating': 'mean',
-            'sentiment': lambda x: (x == 'positive').sum() / len(x) * 100
-        }).reset_index()
+        price_analysis = queries.group_totals('product_id', {
+            'Unit Price': ('Unit Price', 'mean'),
+            'Units Sold': ('Units Sold', 'sum'),
+            'rating': ('rating', 'mean'),
+            'sentiment': ('sentiment', 'positive_pct')
+        }, positive=['Units Sold', 'rating'], limit=15)
         
         recommendations = []
         for _, row in price_analysis.iterrows():
@@ -1044,20 +1948,23 @@ def get_price_optimization():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictions/risk-assessment', methods=['GET'])
+@serve_precomputed
 def get_risk_assessment():
     """Get comprehensive risk assessment"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        # Apply category/region/payment method/sentiment/rating filters
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
         # Calculate various risk metrics
-        total_revenue = sentiment_data['Total Revenue'].sum()
-        avg_rating = sentiment_data['rating'].mean()
-        negative_sentiment = (sentiment_data['sentiment'] == 'negative').sum()
-        total_reviews = len(sentiment_data)
+        total_revenue = queries.column_sum('Total Revenue')
+        avg_rating = queries.column_mean('rating')
+        negative_sentiment = queries.sentiment_counts().get('negative', 0)
+        total_reviews = queries.count()
         
         # Risk scoring
-        revenue_risk = "Low" if total_revenue > sentiment_data['Total Revenue'].quantile(0.5) else "Medium"
+        revenue_risk = "Low" if total_revenue > queries.column_quantile('Total Revenue', 0.5) else "Medium"
         satisfaction_risk = "Low" if avg_rating > 4.0 else "High" if avg_rating < 3.0 else "Medium"
         sentiment_risk = "Low" if negative_sentiment < total_reviews * 0.2 else "High" if negative_sentiment > total_reviews * 0.4 else "Medium"
         
@@ -1095,32 +2002,32 @@ def get_risk_assessment():
 def refresh_predictions():
     """Refresh all predictions by recalculating"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        queries = get_query_backend()
+        if queries is None:
+            return no_dataset_response()
         
-            return jsonify({
-                "status": "success",
-                "message": "Predictions refreshed successfully",
+        return jsonify({
+            "status": "success",
+            "message": "Predictions refreshed successfully",
             "model_accuracy": 0.8,
-            "data_points": len(sentiment_data)
-            })
+            "data_points": queries.count()
+        })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/predictive/insights', methods=['GET'])
+@serve_precomputed
 def get_ai_insights():
     """Get AI insights for the frontend cards"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
         
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
+        # Apply category/region/payment method/sentiment/rating filters
+        filtered_data = get_request_frame()
         
         # Generate insights based on data
         insights = []
@@ -1214,23 +2121,18 @@ def get_ai_insights():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/ai/recommendations', methods=['GET'])
+@serve_precomputed
 def get_ai_recommendations():
     """Get AI-powered business recommendations using statistical analysis"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
         
         # Get category filter parameter
         category = request.args.get('category', None, type=str)
         
-        # Filter data by category if specified
-        filtered_data = sentiment_data
-        if category and category.lower() != 'all':
-            # Check both product_category and category columns
-            if 'product_category' in sentiment_data.columns:
-                filtered_data = sentiment_data[sentiment_data['product_category'].str.lower() == category.lower()]
-            elif 'category' in sentiment_data.columns:
-                filtered_data = sentiment_data[sentiment_data['category'].str.lower() == category.lower()]
+        # Apply category/region/payment method/sentiment/rating filters
+        filtered_data = get_request_frame()
         
         # Generate AI-powered recommendations based on data analysis
         recommendations = []
@@ -1389,28 +2291,139 @@ def get_ai_recommendations():
 # INTELLIGENT PREDICTIVE ANALYSIS ENDPOINTS
 # =============================================================================
 
+def get_issue_frequencies(data, top_n=10):
+    """Most frequent negative/neutral near-duplicate review clusters"""
+    if 'review_cluster' not in data.columns or 'sentiment' not in data.columns:
+        return []
+    
+    problem_reviews = data[data['sentiment'].isin(['negative', 'neutral'])].dropna(subset=['review'])
+    if len(problem_reviews) == 0:
+        return []
+    
+    cluster_counts = problem_reviews['review_cluster'].value_counts().head(top_n)
+    representatives = problem_reviews.drop_duplicates(subset=['review_cluster']).set_index('review_cluster')
+    issues = []
+    for cluster, count in cluster_counts.items():
+        row = representatives.loc[cluster]
+        issues.append({
+            'cluster_id': int(cluster),
+            'representative_review': str(row['review']),
+            'sentiment': row['sentiment'],
+            'category': row['product_category'] if 'product_category' in representatives.columns else None,
+            'frequency': int(count),
+            'percentage': round(count / len(problem_reviews) * 100, 2)
+        })
+    return issues
+
+# Issue analysis, recommendation and sales-impact stages shared by the intelligent endpoints,
+# memoized per dataset version and filter combination
+analysis_graph = AnalysisGraph('intelligent')
+
+@analysis_graph.stage('rows', memoize=False)
+def filtered_rows_stage(read_rows):
+    """Rows of the dataset matching the request filters"""
+    return read_rows()
+
+@analysis_graph.stage('issue_frequencies', 'rows')
+def issue_frequencies_stage(rows):
+    return get_issue_frequencies(rows)
+
+@analysis_graph.stage('discovered_issues', 'rows')
+def discovered_issues_stage(rows):
+    """Issue clusters among the negative/neutral reviews of the filtered rows"""
+    engine = issue_engine
+    if 'sentiment' not in rows.columns:
+        return []
+    if engine is None and columnar_store_active() and IssueDiscoveryEngine is not None:
+        # DuckDB uploads build no engine: cluster the filtered rows here (memoized with the stage)
+        engine = IssueDiscoveryEngine()
+        engine.partial_fit(rows.loc[rows['sentiment'].isin(ISSUE_SENTIMENTS), 'review'])
+    if engine is None:
+        return []
+    columns = [col for col in ('review', 'product_category', 'sentiment') if col in rows.columns]
+    return engine.summarize(rows.loc[rows['sentiment'].isin(ISSUE_SENTIMENTS), columns])
+
+@analysis_graph.stage('model_issues', 'rows')
+def model_issues_stage(rows):
+    """(engine, issue analysis) from the optional AI modules; engine is None when neither is installed"""
+    if advanced_ai_models is not None:
+        return 'advanced', advanced_ai_models.predict_issues(rows)
+    if intelligent_analyzer is not None:
+        return 'intelligent', intelligent_analyzer.analyze_review_issues(rows)
+    return None, None
+
+@analysis_graph.stage('recommendations', 'model_issues', 'rows')
+def recommendations_stage(model_issues, rows):
+    engine, issue_analysis = model_issues
+    if engine == 'advanced':
+        return advanced_ai_models.generate_ai_recommendations(issue_analysis, rows)
+    if engine == 'intelligent':
+        return intelligent_analyzer.generate_targeted_recommendations(issue_analysis, rows)
+    return None
+
+@analysis_graph.stage('sales_impact', 'model_issues', 'recommendations', 'rows')
+def sales_impact_stage(model_issues, recommendations, rows):
+    engine, _ = model_issues
+    if engine == 'advanced':
+        return advanced_ai_models.predict_sales_impact(recommendations, rows)
+    if engine == 'intelligent':
+        return intelligent_analyzer.predict_sales_impact(recommendations, rows)
+    return None
+
+@analysis_graph.stage('comprehensive_analysis', 'rows')
+def comprehensive_analysis_stage(rows):
+    if advanced_ai_models is not None:
+        return 'advanced', advanced_ai_models.generate_comprehensive_analysis(rows, rows)
+    if intelligent_analyzer is not None:
+        return 'intelligent', intelligent_analyzer.generate_comprehensive_analysis(rows, rows)
+    return None, None
+
+def get_request_rows():
+    """Rows matching the request filters, read once per request however many stages miss"""
+    if 'analysis_rows' not in g:
+        g.analysis_rows = get_request_frame()
+    return g.analysis_rows
+
+def run_analysis_stage(stage):
+    """Output of an analysis stage for the loaded dataset and the request filters"""
+    return analysis_graph.compute(stage, dataset_version, request_filters_key(), get_request_rows)
+
 @app.route('/api/intelligent/analyze-issues', methods=['GET'])
 def analyze_review_issues():
     """Analyze reviews to identify specific product issues using advanced AI models"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
+        
+        # Apply category/region/payment method/sentiment/rating filters
+        filtered_data = run_analysis_stage('rows')
+        
+        issue_frequencies = run_analysis_stage('issue_frequencies')
+        discovered_issues = run_analysis_stage('discovered_issues')
         
         # Use advanced AI models if available, otherwise fallback
-        if advanced_ai_models is not None:
-            issue_analysis = advanced_ai_models.predict_issues(sentiment_data)
+        engine, issue_analysis = run_analysis_stage('model_issues')
+        if engine == 'advanced':
             ai_model = "Advanced ML Models (Random Forest + TF-IDF)"
-        elif intelligent_analyzer is not None:
-            issue_analysis = intelligent_analyzer.analyze_review_issues(sentiment_data)
+        elif engine == 'intelligent':
             ai_model = "Intelligent Analysis Engine"
+        elif discovered_issues:
+            issue_analysis = {'top_issues': discovered_issues}
+            ai_model = "Issue Discovery (Hashed TF-IDF + Mini-Batch K-Means)"
+        elif issue_frequencies:
+            issue_analysis = {'top_issues': issue_frequencies}
+            ai_model = "Near-Duplicate Review Clustering (MinHash LSH)"
         else:
             return jsonify({"error": "No AI analysis models available"}), 500
         
         return jsonify({
             "status": "success",
             "issue_analysis": issue_analysis,
+            "issue_frequencies": issue_frequencies,
+            "discovered_issues": discovered_issues,
+            "review_clusters": review_index.stats() if review_index is not None else None,
             "analysis_timestamp": datetime.now().isoformat(),
-            "total_reviews_analyzed": len(sentiment_data) if sentiment_data is not None else 0,
+            "total_reviews_analyzed": len(filtered_data),
             "ai_model": ai_model
         })
             
@@ -1423,6 +2436,9 @@ def analyze_review_issues():
 # =============================================================================
 
 try:
+    if inference_client is not None:
+        raise RuntimeError("models are served by the shared inference worker")
+    
     from transformers import T5ForConditionalGeneration, T5Tokenizer
     import torch
     
@@ -1439,16 +2455,117 @@ try:
     print("✅ Flan-T5-small generative recommendation model loaded successfully!")
     
 except Exception as e:
-    print(f"⚠️  Could not load Flan-T5-small model: {e}")
-    print("Using fallback recommendation system...")
+    print(f"⚠️  Not loading Flan-T5-small model in this process: {e}")
+    if inference_client is None:
+        print("Using fallback recommendation system...")
     generative_model = None
     generative_tokenizer = None
 
+def generation_available():
+    """Whether Flan-T5-small can be used, locally or through the inference worker"""
+    if inference_client is not None:
+        return inference_client.generation_available()
+    return generative_model is not None and generative_tokenizer is not None
+
+def generate_text_batch(requests_batch):
+    """Run Flan-T5-small over (prompt, max_length) pairs, one forward pass per max_length"""
+    if inference_client is not None:
+        with track_model_call('flan-t5-small', len(requests_batch)):
+            return inference_client.generate(requests_batch)
+    
+    outputs_by_index = {}
+    for max_length in sorted({max_length for _, max_length in requests_batch}):
+        indices = [idx for idx, (_, length) in enumerate(requests_batch) if length == max_length]
+        prompts = [requests_batch[idx][0] for idx in indices]
+        
+        # Tokenize the prompts
+        inputs = generative_tokenizer(prompts, return_tensors="pt", max_length=512, truncation=True, padding=True)
+        
+        # Generate responses
+        with track_model_call('flan-t5-small', len(prompts)), torch.no_grad():
+            outputs = generative_model.generate(
+                inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                max_length=max_length,
+                **GENERATION_KWARGS
+            )
+        
+        # Decode the generated text
+        for idx, output in zip(indices, outputs):
+            outputs_by_index[idx] = generative_tokenizer.decode(output, skip_special_tokens=True)
+    
+    return [outputs_by_index[idx] for idx in range(len(requests_batch))]
+
+# Generation requests from concurrent callers are batched like sentiment inference
+generation_scheduler = (InferenceScheduler('flan-t5-small', generate_text_batch)
+                        if INFERENCE_BATCHING_ENABLED and (generative_model is not None or inference_client is not None)
+                        else None)
+
+# Observed Flan-T5 latency per max_length, used to skip generations that cannot finish in time
+generation_latency = LatencyEstimate()
+# Observed latency of scoring one review on request paths
+sentiment_latency = LatencyEstimate()
+
+def get_request_deadline():
+    """Deadline of the current request, or None outside requests and for background work"""
+    return g.get('deadline') if has_request_context() else None
+
+def mark_degraded(item, error):
+    """Flag a response item whose generated text was replaced by a template fallback"""
+    item['degraded'] = True
+    item['degraded_reason'] = str(error)
+    if has_request_context():
+        g.degraded = True
+    return item
+
+def run_generative_model(prompt, max_length=100):
+    """Run Flan-T5-small on a single prompt and return the decoded text
+    
+    Raises DeadlineExceeded when the request's remaining budget is smaller
+    than a typical generation of this length, or when the result does not
+    arrive in time (the queued generation is then cancelled).
+    """
+    deadline = get_request_deadline()
+    remaining = deadline.remaining() if deadline is not None else float('inf')
+    if remaining < generation_latency.estimate(max_length) + GENERATION_RESERVE_SECONDS:
+        raise DeadlineExceeded('skipped', remaining)
+    
+    start = time.perf_counter()
+    if generation_scheduler is not None:
+        future = generation_scheduler.submit([(prompt, max_length)])[0]
+        timeout = remaining - GENERATION_RESERVE_SECONDS if remaining != float('inf') else None
+        try:
+            generated_text = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            # The wait is a lower bound on this generation's latency
+            generation_latency.observe(max_length, time.perf_counter() - start)
+            raise DeadlineExceeded('timeout', deadline.remaining())
+    else:
+        generated_text = generate_text_batch([(prompt, max_length)])[0]
+    generation_latency.observe(max_length, time.perf_counter() - start)
+    return generated_text
+
+def get_sentiment_within_deadline(text):
+    """Sentiment label and confidence of a review scored on a request path
+    
+    Raises DeadlineExceeded when the request's remaining budget is smaller
+    than a typical sentiment inference.
+    """
+    deadline = get_request_deadline()
+    remaining = deadline.remaining() if deadline is not None else float('inf')
+    if remaining < sentiment_latency.estimate('review') + GENERATION_RESERVE_SECONDS:
+        raise DeadlineExceeded('skipped', remaining, call='sentiment inference')
+    
+    start = time.perf_counter()
+    result = get_sentiment_with_score(text)
+    sentiment_latency.observe('review', time.perf_counter() - start)
+    return result
 
 def generate_personalized_recommendation(review_text, category):
     """Generate personalized recommendation using Flan-T5-small model or fallback"""
     
-    if generative_model is None or generative_tokenizer is None:
+    if not generation_available():
         # Fallback recommendation system using keyword-based analysis
         return generate_fallback_recommendation(review_text, category)
     
@@ -1458,23 +2575,19 @@ def generate_personalized_recommendation(review_text, category):
 Product category: {category}
 Generate a specific solution to address this exact problem:"""
 
-        # Tokenize the prompt
-        inputs = generative_tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True)
-        
-        # Generate response
-        with torch.no_grad():
-            outputs = generative_model.generate(
-                inputs.input_ids,
-                max_length=100,
-                num_beams=2,
-                early_stopping=True,
-                temperature=0.3,
-                do_sample=False,
-                repetition_penalty=1.2
-            )
-        
-        # Decode the generated text
-        generated_text = generative_tokenizer.decode(outputs[0], skip_special_tokens=True)
+        # Generate and decode the response (once per near-duplicate cluster)
+        deadline_error = None
+        try:
+            if review_index is not None:
+                generated_text = review_index.get_or_compute(
+                    review_text, ('personalized-recommendation', category),
+                    lambda: run_generative_model(prompt, max_length=100))
+            else:
+                generated_text = run_generative_model(prompt, max_length=100)
+        except DeadlineExceeded as e:
+            print(f"⏱️  {e}, using fallback recommendation")
+            deadline_error = e
+            generated_text = generate_fallback_recommendation(review_text, category)
         
         # Clean up the response
         if generated_text.startswith(prompt[:50]):
@@ -1494,7 +2607,7 @@ Generate a specific solution to address this exact problem:"""
         if len(generated_text.strip()) < 10:
             generated_text = f"Replace the {category} product and provide full refund to address this customer complaint."
         
-        return {
+        recommendation = {
             'title': f'Customer Issue in {category}',
             'issue_type': 'Customer Complaint',
             'recommendation': generated_text,
@@ -1523,6 +2636,10 @@ Generate a specific solution to address this exact problem:"""
                 'generated_recommendation': generated_text
             }
         }
+        if deadline_error is not None:
+            recommendation['ai_analysis'].update(analysis_method='Keyword-based fallback', model_used='fallback')
+            mark_degraded(recommendation, deadline_error)
+        return recommendation
         
     except Exception as e:
         print(f"❌ Error generating recommendation: {e}")
@@ -1594,12 +2711,17 @@ def generate_fallback_recommendation(review_text, category):
 # HELPER FUNCTIONS FOR SENTIMENT-BASED RECOMMENDATIONS
 # =============================================================================
 
-def generate_intelligent_solution(review_text, category_group):
-    """Generate intelligent solutions using BERT-based analysis"""
+def generate_intelligent_solution(review_text, category_group, sentiment=None):
+    """Generate intelligent solutions using BERT-based analysis
+    
+    The stored sentiment label of the review is used when given; the model is
+    only run for reviews that were never scored.
+    """
     
     try:
         # Use the get_sentiment function for consistent sentiment analysis
-        sentiment = get_sentiment(review_text)
+        if sentiment not in ('positive', 'negative', 'neutral'):
+            sentiment = get_sentiment_within_deadline(review_text)[0]
         
         # Generate context-aware solutions based on sentiment analysis
         if sentiment == 'negative':
@@ -1612,6 +2734,11 @@ def generate_intelligent_solution(review_text, category_group):
             # Neutral sentiment
             return generate_neutral_problem_solution(review_text, category_group)
             
+    except DeadlineExceeded as e:
+        print(f"⏱️  {e}, using keyword-based solution")
+        if has_request_context():
+            g.degraded = True
+        return generate_keyword_based_solution(review_text, category_group)
     except Exception as e:
         print(f"Error in intelligent solution generation: {e}")
         return generate_keyword_based_solution(review_text, category_group)
@@ -1861,20 +2988,41 @@ def generate_simple_problem_solution(category_group, problem_reviews, negative_p
     try:
         print(f"🤖 Analyzing {len(problem_reviews)} reviews for {category_group} - generating problem-solution pairs...")
         
-        # Get all review texts
-        all_reviews = problem_reviews['review'].dropna().astype(str)
+        # Get review rows together with the sentiment stored at upload time
+        review_rows = problem_reviews.dropna(subset=['review'])
+        cluster_sizes = {}
+        if 'review_cluster' in review_rows.columns:
+            # One row per near-duplicate cluster, weighted by how many reviews it stands for
+            cluster_sizes = review_rows['review_cluster'].value_counts().to_dict()
+            review_rows = review_rows.drop_duplicates(subset=['review_cluster'])
+        review_rows = review_rows.head(5)  # Limit to 5 most recent reviews
+        row_clusters = review_rows['review_cluster'] if 'review_cluster' in review_rows.columns else [None] * len(review_rows)
+        stored_labels = review_rows['sentiment'] if 'sentiment' in review_rows.columns else [None] * len(review_rows)
+        stored_scores = review_rows['sentiment_score'] if 'sentiment_score' in review_rows.columns else [None] * len(review_rows)
         
         # Generate intelligent solutions based on problem analysis
         recommendations = []
         
         # Process each review as a separate problem-solution pair
-        for idx, review_text in enumerate(all_reviews.head(5)):  # Limit to 5 most recent reviews
+        for idx, (review_text, sentiment, sentiment_score, cluster) in enumerate(zip(review_rows['review'].astype(str), stored_labels, stored_scores, row_clusters)):
             if len(review_text.strip()) > 10:  # Only process meaningful reviews
                 
                 print(f"Generating solution for problem {idx + 1}: {review_text[:50]}...")
                 
+                # Only rows that were never scored fall back to model inference
+                deadline_error = None
+                if sentiment not in ('positive', 'negative', 'neutral'):
+                    try:
+                        sentiment, sentiment_score = get_sentiment_within_deadline(review_text)
+                    except DeadlineExceeded as e:
+                        print(f"⏱️  {e}, using keyword-based solution")
+                        deadline_error = e
+                
                 # Generate intelligent solution based on problem analysis
-                generated_solution = generate_intelligent_solution(review_text, category_group)
+                if deadline_error is not None:
+                    generated_solution = generate_keyword_based_solution(review_text, category_group)
+                else:
+                    generated_solution = generate_intelligent_solution(review_text, category_group, sentiment)
                 
                 # Extract first keyword from problem statement for dynamic title
                 first_keyword = extract_first_keyword(review_text)
@@ -1898,16 +3046,20 @@ def generate_simple_problem_solution(category_group, problem_reviews, negative_p
                     'priority_reason': f'Direct customer complaint about {category_group}',
                     'priority': 'High' if negative_pct > 30 else 'Medium',
                     'confidence_score': 0.9,
-                    'affected_reviews': 1,
+                    'affected_reviews': int(cluster_sizes.get(cluster, 1)),
                     'negative_percentage': negative_pct,
                     'neutral_percentage': neutral_pct,
                     'problem_solution': {
                         'problem_statement': review_text,
                         'ai_solution': generated_solution,
                         'category': category_group,
+                        'sentiment': sentiment,
+                        'sentiment_score': None if pd.isna(sentiment_score) else round(float(sentiment_score), 4),
                         'model_used': 'BERT-Based Sentiment Analysis Engine'
                     }
                 }
+                if deadline_error is not None:
+                    mark_degraded(recommendation, deadline_error)
                 
                 recommendations.append(recommendation)
                 print(f"✅ Generated solution: {generated_solution[:50]}...")
@@ -1919,6 +3071,27 @@ def generate_simple_problem_solution(category_group, problem_reviews, negative_p
         return generate_fallback_problem_solution(category_group, problem_reviews['review'].dropna().astype(str), negative_pct)
 
 
+def get_stored_recommendations(category_group, problem_reviews, negative_pct, neutral_pct):
+    """Problem-solution recommendations from the store, generated only when the group's problem reviews changed"""
+    if recommendation_store is None or len(problem_reviews) == 0:
+        return generate_simple_problem_solution(category_group, problem_reviews, negative_pct, neutral_pct)
+    
+    digest = content_hash(problem_reviews, 'flan-t5-small' if generation_available() else 'templates')
+    stored = recommendation_store.get(category_group, digest)
+    if stored is None:
+        recommendations = generate_simple_problem_solution(category_group, problem_reviews, negative_pct, neutral_pct)
+        if not any(recommendation.get('degraded') for recommendation in recommendations):
+            recommendation_store.put(category_group, digest, recommendations)
+        return recommendations
+    
+    print(f"📦 Reusing stored recommendations for {category_group}")
+    # The percentages also count positive reviews, which are not part of the hash
+    for recommendation in stored:
+        recommendation['priority'] = 'High' if negative_pct > 30 else 'Medium'
+        recommendation['negative_percentage'] = negative_pct
+        recommendation['neutral_percentage'] = neutral_pct
+    return stored
+
 def generate_fallback_problem_solution(category_group, reviews, negative_pct):
     """Generate fallback problem-solution recommendations using keyword analysis"""
     
@@ -2006,8 +3179,10 @@ def generate_overall_category_recommendation(category, issue_type, issue_data, t
     # Calculate percentage of reviews affected by this issue
     issue_percentage = (len(issue_data['reviews']) / total_reviews) * 100
     
+    deadline_error = None
+    
     # Use Flan-T5-small to generate Amazon-style summary
-    if generative_model is not None and generative_tokenizer is not None:
+    if generation_available():
         try:
             # Create a prompt for Flan-T5-small to generate Amazon-style summary
             prompt = f"""Generate an Amazon-style product review summary for {category} products. 
@@ -2016,23 +3191,8 @@ Percentage affected: {issue_percentage:.1f}%
 Sample reviews: {issue_data['reviews'][0][:100]}...
 Generate a concise summary like Amazon does:"""
 
-            # Tokenize the prompt
-            inputs = generative_tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True)
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = generative_model.generate(
-                    inputs.input_ids,
-                    max_length=150,
-                    num_beams=2,
-                    early_stopping=True,
-                    temperature=0.3,
-                    do_sample=False,
-                    repetition_penalty=1.2
-                )
-            
-            # Decode the generated text
-            generated_summary = generative_tokenizer.decode(outputs[0], skip_special_tokens=True)
+            # Generate and decode the summary
+            generated_summary = run_generative_model(prompt, max_length=150)
             
             # Clean up the response
             if generated_summary.startswith(prompt[:50]):
@@ -2042,6 +3202,11 @@ Generate a concise summary like Amazon does:"""
             problem_description = generated_summary if len(generated_summary.strip()) > 10 else f"Customers have mixed feelings about {category} products. {issue_percentage:.1f}% of reviews mention {issue_type} concerns."
             model_used = "google/flan-t5-small"
             
+        except DeadlineExceeded as e:
+            print(f"⏱️  {e}, using template summary")
+            deadline_error = e
+            problem_description = f"Customers have mixed feelings about {category} products. {issue_percentage:.1f}% of reviews mention {issue_type} concerns."
+            model_used = "fallback-amazon-style"
         except Exception as e:
             print(f"Flan-T5-small generation error: {e}")
             problem_description = f"Customers have mixed feelings about {category} products. {issue_percentage:.1f}% of reviews mention {issue_type} concerns."
@@ -2100,7 +3265,7 @@ Generate a concise summary like Amazon does:"""
         ]
     })
     
-    return {
+    recommendation = {
         'title': template['title'],
         'issue_type': issue_type.replace('_', ' ').title(),
         'recommendation': template['recommendation'],
@@ -2131,6 +3296,9 @@ Generate a concise summary like Amazon does:"""
             'generated_recommendation': template['recommendation']
         }
     }
+    if deadline_error is not None:
+        mark_degraded(recommendation, deadline_error)
+    return recommendation
 
 def generate_general_category_recommendation(category, review_texts, negative_pct, neutral_pct):
     """Generate general category recommendation when no specific themes are found"""
@@ -2357,17 +3525,22 @@ def generate_dynamic_recommendation(category, issue_type, issue_data, review_tex
     }
 
 @app.route('/api/intelligent/recommendations', methods=['GET'])
+@serve_precomputed
+@coalesce_requests
 def get_intelligent_recommendations():
     """Get sentiment-based recommendations focusing on negative/neutral reviews"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
+        
+        # Apply category/region/payment method/sentiment/rating filters
+        filtered_data = get_request_frame()
         
         # Analyze sentiment by category
         category_recommendations = []
         
         # Get unique categories and group similar ones
-        categories = sentiment_data['product_category'].dropna().unique()
+        categories = filtered_data['product_category'].dropna().unique()
         
         # Group similar categories
         category_groups = {
@@ -2379,14 +3552,14 @@ def get_intelligent_recommendations():
         # Create grouped categories
         grouped_categories = {}
         for group_name, group_categories in category_groups.items():
-            group_data = sentiment_data[sentiment_data['product_category'].isin(group_categories)]
+            group_data = filtered_data[filtered_data['product_category'].isin(group_categories)]
             if len(group_data) > 0:
                 grouped_categories[group_name] = group_data
         
         # Add individual categories that don't fit into groups
         for category in categories:
             if not any(category in group for group in category_groups.values()):
-                grouped_categories[category] = sentiment_data[sentiment_data['product_category'] == category]
+                grouped_categories[category] = filtered_data[filtered_data['product_category'] == category]
         
         # Process grouped categories
         for group_name, group_data in grouped_categories.items():
@@ -2408,8 +3581,8 @@ def get_intelligent_recommendations():
                 # Get negative and neutral reviews for analysis
                 problem_reviews = group_data[group_data['sentiment'].isin(['negative', 'neutral'])]
                 
-                # Generate simple problem-solution recommendations
-                recommendations = generate_simple_problem_solution(group_name, problem_reviews, negative_pct, neutral_pct)
+                # Generate simple problem-solution recommendations, reusing stored ones for unchanged reviews
+                recommendations = get_stored_recommendations(group_name, problem_reviews, negative_pct, neutral_pct)
                 
                 if recommendations:
                     category_recommendations.append({
@@ -2442,22 +3615,18 @@ def get_intelligent_recommendations():
 def predict_sales_impact():
     """Predict future sales impact using advanced AI models"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
         
-        # Use advanced AI models if available, otherwise fallback
-        if advanced_ai_models is not None:
-            issue_analysis = advanced_ai_models.predict_issues(sentiment_data)
-            recommendations = advanced_ai_models.generate_ai_recommendations(issue_analysis, sentiment_data)
-            sales_impact = advanced_ai_models.predict_sales_impact(recommendations, sentiment_data)
+        # Issue analysis -> recommendations -> sales impact, reusing stages other requests computed
+        engine, _ = run_analysis_stage('model_issues')
+        if engine == 'advanced':
             ai_model = "Advanced ML Sales Prediction Engine v2.0"
-        elif intelligent_analyzer is not None:
-            issue_analysis = intelligent_analyzer.analyze_review_issues(sentiment_data)
-            recommendations = intelligent_analyzer.generate_targeted_recommendations(issue_analysis, sentiment_data)
-            sales_impact = intelligent_analyzer.predict_sales_impact(recommendations, sentiment_data)
+        elif engine == 'intelligent':
             ai_model = "Intelligent Analysis Engine"
         else:
             return jsonify({"error": "No AI prediction models available"}), 500
+        sales_impact = run_analysis_stage('sales_impact')
         
         return jsonify({
             "status": "success",
@@ -2471,25 +3640,35 @@ def predict_sales_impact():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/intelligent/comprehensive-analysis', methods=['GET'])
+@serve_precomputed
+@coalesce_requests
 def get_comprehensive_analysis():
     """Get comprehensive analysis using advanced AI models"""
     try:
-        if sentiment_data is None:
-            return jsonify({"error": "No dataset loaded. Please upload a dataset first."}), 400
+        if not request_frame_available():
+            return no_dataset_response()
+        
+        discovered_issues = run_analysis_stage('discovered_issues')
         
         # Use advanced AI models if available, otherwise fallback
-        if advanced_ai_models is not None:
-            comprehensive_analysis = advanced_ai_models.generate_comprehensive_analysis(sentiment_data, sentiment_data)
+        engine, comprehensive_analysis = run_analysis_stage('comprehensive_analysis')
+        if engine == 'advanced':
             ai_model = "Advanced ML Comprehensive Analysis Engine v2.0"
-        elif intelligent_analyzer is not None:
-            comprehensive_analysis = intelligent_analyzer.generate_comprehensive_analysis(sentiment_data, sentiment_data)
+        elif engine == 'intelligent':
             ai_model = "Intelligent Analysis Engine"
+        elif discovered_issues:
+            comprehensive_analysis = {
+                'discovered_issues': discovered_issues,
+                'issue_frequencies': run_analysis_stage('issue_frequencies')
+            }
+            ai_model = "Issue Discovery (Hashed TF-IDF + Mini-Batch K-Means)"
         else:
             return jsonify({"error": "No AI analysis models available"}), 500
         
         return jsonify({
             "status": "success",
             "comprehensive_analysis": comprehensive_analysis,
+            "discovered_issues": discovered_issues,
             "analysis_timestamp": datetime.now().isoformat(),
             "ai_model": ai_model
         })
@@ -2498,6 +3677,214 @@ def get_comprehensive_analysis():
         print(f"Error in comprehensive analysis: {e}")
         return jsonify({"error": str(e)}), 500
 
+# =============================================================================
+# MONITORING & METRICS
+# =============================================================================
+
+def get_endpoint_label():
+    """Route pattern used as the metrics label (unmatched paths share one label)"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    """Record request start times for latency and CPU metrics"""
+    g.request_start = time.perf_counter()
+    g.request_cpu_start = time.thread_time()
+    g.request_errored = False
+    HTTP_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency, status, CPU time and response size for every request"""
+    if 'request_start' not in g:
+        return response
+    
+    endpoint = get_endpoint_label()
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    HTTP_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint, method=request.method)
+    HTTP_CPU_SECONDS.inc(time.thread_time() - g.request_cpu_start, endpoint=endpoint)
+    
+    if response.status_code >= 500:
+        HTTP_ERRORS.inc(endpoint=endpoint, method=request.method)
+        g.request_errored = True
+    
+    # Streamed responses have no precomputed length; asking for one would buffer the whole body
+    content_length = None if response.is_streamed else response.calculate_content_length()
+    if content_length is not None:
+        HTTP_RESPONSE_BYTES.observe(content_length, endpoint=endpoint)
+    
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    """Count unhandled exceptions and release the in-flight slot"""
+    if 'request_start' not in g:
+        return
+    if exc is not None and not g.request_errored:
+        HTTP_ERRORS.inc(endpoint=get_endpoint_label(), method=request.method)
+    HTTP_IN_FLIGHT.dec()
+
+@app.before_request
+def start_request_deadline():
+    """Start the request's time budget; queue and model time both count against it"""
+    g.deadline = Deadline()
+
+@app.after_request
+def flag_degraded_response(response):
+    """Tell clients when part of the response came from template fallbacks"""
+    if g.get('degraded'):
+        response.headers['X-Degraded'] = '1'
+    return response
+
+# Separate concurrency limits and queues for model-heavy and light endpoints
+admission = AdmissionController() if ADMISSION_ENABLED else None
+
+@app.before_request
+def admit_request():
+    """Hold the request until its lane has a free slot, or shed it with 429/503 and Retry-After"""
+    lane_name = route_lane(request.path) if admission is not None else None
+    if lane_name is None:
+        return None
+    
+    lane = admission.lanes[lane_name]
+    try:
+        lane.acquire()
+    except AdmissionRejected as e:
+        response = jsonify({"error": f"Server busy: {e}", "lane": e.lane, "reason": e.reason, "retry_after": e.retry_after})
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    g.admission = (lane, time.perf_counter())
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    """Free the request's lane slot"""
+    if 'admission' not in g:
+        return
+    lane, admitted_at = g.pop('admission')
+    lane.release(time.perf_counter() - admitted_at)
+
+@app.route('/api/admission/status', methods=['GET'])
+def get_admission_status():
+    """Concurrency limits, occupancy, rejections and queue wait per lane"""
+    if admission is None:
+        return jsonify({"status": "success", "enabled": False})
+    return jsonify({"status": "success", "enabled": True, "lanes": admission.stats()})
+
+@app.route('/api/inference/health', methods=['GET'])
+def get_inference_health():
+    """Report where models run and whether the shared inference worker is reachable"""
+    if inference_client is None:
+        return jsonify({
+            "status": "success",
+            "mode": "in-process",
+            "models": {
+                "sentiment": sentiment_pipeline is not None,
+                "generation": generation_available()
+            },
+            "token_batching": sentiment_batcher.stats() if sentiment_batcher is not None else None
+        })
+    
+    try:
+        worker = inference_client.health()
+        return jsonify({"status": "success", "mode": "worker", "socket": INFERENCE_SOCKET, "worker": worker})
+    except InferenceWorkerError as e:
+        return jsonify({"status": "error", "mode": "worker", "socket": INFERENCE_SOCKET, "error": str(e)}), 503
+
+@app.route('/api/precompute/status', methods=['GET'])
+def get_precompute_status():
+    """Progress of the background warm-up per endpoint and response cache usage"""
+    return jsonify({
+        "status": "success",
+        "enabled": PRECOMPUTE_ENABLED,
+        "precompute": precompute_scheduler.status(),
+        "cache": response_cache.stats()
+    })
+
+@app.route('/api/analysis/status', methods=['GET'])
+def get_analysis_status():
+    """Memoized intelligent analysis stages, their dependencies, hits and compute time"""
+    return jsonify({"status": "success", "analysis_graph": analysis_graph.stats()})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request and model metrics in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# =============================================================================
+# REQUEST PROFILING
+# =============================================================================
+
+def is_admin_request():
+    """Check the X-Admin-Token header against BIZEYE_ADMIN_TOKEN"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@app.before_request
+def start_request_profiler():
+    """Profile the request when configured for the route or requested by an admin"""
+    endpoint = get_endpoint_label()
+    if endpoint.startswith('/api/admin/'):
+        return
+    
+    requested = request.headers.get('X-Profile', '').lower() in ('1', 'true', 'yes')
+    if route_is_configured(endpoint) or (requested and is_admin_request()):
+        profiler = RequestProfiler(endpoint, request.method)
+        if profiler.start():
+            g.request_profiler = profiler
+
+@app.after_request
+def save_request_profile(response):
+    """Store the profile and return its id in the X-Profile-Id header"""
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+    
+    profiler.stop()
+    try:
+        summary = profiler.save(response.status_code)
+        response.headers['X-Profile-Id'] = summary['profile_id']
+        print(f"🔬 Profiled {summary['endpoint']} in {summary['elapsed_seconds']:.3f}s -> {summary['profile_id']}")
+    except OSError as e:
+        print(f"⚠️  Could not save request profile: {e}")
+    return response
+
+@app.teardown_request
+def stop_request_profiler(exc):
+    """Make sure the profiler is stopped when the request raised"""
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def get_request_profiles():
+    """List stored request profiles"""
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    
+    return jsonify({
+        "status": "success",
+        "profiles": list_profiles()
+    })
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_request_profile(profile_id):
+    """Get a stored profile summary, or its collapsed stacks with ?format=collapsed"""
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    
+    if request.args.get('format') == 'collapsed':
+        collapsed = load_profile(profile_id, kind='collapsed')
+        if collapsed is None:
+            return jsonify({"error": "Profile not found"}), 404
+        return Response(collapsed, mimetype='text/plain')
+    
+    summary = load_profile(profile_id)
+    if summary is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify({"status": "success", "profile": summary})
+
 # =============================================================================
 # ERROR HANDLERS
 # =============================================================================
@@ -2521,6 +3908,7 @@ if __name__ == '__main__':
     print("   • Sales Analysis: /api/sales/*")
     print("   • Unified Analysis: /api/unified-analysis")
     print("   • Intelligent Analysis: /api/intelligent/*")
+    print("   • Metrics: /api/metrics")
     print("\n🌐 Server will be available at: http://localhost:5000")
     print("📁 Upload your dataset to get started!")
     
@@ -0,0 +1,644 @@
+"""
+BizEye Benchmark Harness
+Synthetic dataset generator and per-endpoint latency / memory benchmark
+
+Usage:
+    python benchmark.py --sizes 1k,100k --output bench_results.json
+    python benchmark.py --sizes 1k,100k,1m --compare bench_results.json
+    python benchmark.py --generate-only synthetic_1m.csv --sizes 1m
+    python benchmark.py --string-memory --sizes 1m --output bench_strings.json
+    python benchmark.py --csv-parse --sizes 100k,1m --output bench_csv.json
+    python benchmark.py --upload-formats --sizes 100k,1m --output bench_uploads.json
+    python benchmark.py --sentiment-cascade --output bench_cascade.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DATASET = os.path.join(BASE_DIR, 'online_sales&reviews_dataset.csv')
+
+# Named dataset sizes accepted by --sizes
+DATASET_SIZES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Routes that mutate server state are never driven by the benchmark
+EXCLUDED_ROUTES = {'/api/data/upload', '/api/data/clear'}
+
+# Fallback vocabulary when the bundled dataset cannot be read
+DEFAULT_VOCABULARY = {
+    'Product Category': ['Electronics', 'Home Appliances', 'Clothing', 'Books', 'Beauty Products', 'Sports'],
+    'Region': ['North America', 'Europe', 'Asia'],
+    'Payment Method': ['Credit Card', 'PayPal', 'Debit Card'],
+    'Reviews': [
+        'A complete failure. I had to return it.',
+        'Absolutely love it! Highly recommend.',
+        'Mixed feelings about this product.',
+        'Good value for money.',
+        'The quality is shocking. Avoid this product.'
+    ]
+}
+
+# =============================================================================
+# SYNTHETIC DATASET GENERATOR
+# =============================================================================
+
+def load_vocabulary(path=SAMPLE_DATASET):
+    """Collect categorical values and review texts from the bundled dataset"""
+    try:
+        sample = pd.read_csv(path, on_bad_lines='skip')
+    except Exception as e:
+        print(f"⚠️  Could not read sample dataset, using built-in vocabulary: {e}")
+        return dict(DEFAULT_VOCABULARY, **{'Product Name': {}})
+
+    vocabulary = {}
+    for column in ['Product Category', 'Region', 'Payment Method', 'Reviews']:
+        values = sample[column].dropna().astype(str).unique().tolist()
+        vocabulary[column] = values or DEFAULT_VOCABULARY[column]
+
+    # Product names are drawn per category so names stay consistent with categories
+    vocabulary['Product Name'] = {
+        category: group['Product Name'].dropna().astype(str).unique().tolist()
+        for category, group in sample.groupby('Product Category')
+    }
+    return vocabulary
+
+def generate_synthetic_dataset(n_rows, seed=42, vocabulary=None):
+    """Generate a dataset following the schema of online_sales&reviews_dataset.csv"""
+    rng = np.random.default_rng(seed)
+    vocabulary = vocabulary or load_vocabulary()
+
+    categories = np.array(vocabulary['Product Category'], dtype=object)
+    category_idx = rng.integers(0, len(categories), n_rows)
+
+    # Each category owns a fixed pool of products so product ids repeat realistically
+    products_per_category = max(1, min(500, n_rows // (len(categories) * 20)))
+    product_slot = rng.integers(0, products_per_category, n_rows)
+    product_number = category_idx * products_per_category + product_slot + 1
+    product_ids = np.char.add('P', np.char.zfill(product_number.astype(str), 6))
+
+    product_names = np.empty(n_rows, dtype=object)
+    for idx, category in enumerate(categories):
+        names = vocabulary['Product Name'].get(category) or [f'{category} Item']
+        mask = category_idx == idx
+        base = np.array(names, dtype=object)[product_slot[mask] % len(names)]
+        product_names[mask] = base + ' #' + (product_slot[mask] + 1).astype(str).astype(object)
+
+    start = np.datetime64('2024-01-01')
+    dates = start + rng.integers(0, 365, n_rows).astype('timedelta64[D]')
+
+    units_sold = rng.integers(1, 50, n_rows)
+    unit_price = np.round(rng.uniform(10, 2000, n_rows), 2)
+
+    # Ratings follow the skew of the bundled dataset (mostly 4s, many 0/1s)
+    ratings = rng.choice([0, 1, 2, 3, 4, 5], size=n_rows, p=[0.19, 0.23, 0.03, 0.02, 0.34, 0.19])
+    reviews = np.array(vocabulary['Reviews'], dtype=object)[rng.integers(0, len(vocabulary['Reviews']), n_rows)]
+
+    return pd.DataFrame({
+        'Product ID': product_ids.astype(object),
+        'Transaction ID': np.arange(10001, 10001 + n_rows),
+        'Date': pd.to_datetime(dates).strftime('%Y-%m-%d'),
+        'Product Category': categories[category_idx],
+        'Product Name': product_names,
+        'Units Sold': units_sold,
+        'Unit Price': unit_price,
+        'Total Revenue': np.round(units_sold * unit_price, 2),
+        'Region': np.array(vocabulary['Region'], dtype=object)[rng.integers(0, len(vocabulary['Region']), n_rows)],
+        'Payment Method': np.array(vocabulary['Payment Method'], dtype=object)[rng.integers(0, len(vocabulary['Payment Method']), n_rows)],
+        'Rating': ratings,
+        'Reviews': reviews
+    })
+
+def assign_synthetic_sentiment(data):
+    """Label sentiment from the rating so large datasets skip model inference"""
+    ratings = data['Rating'].to_numpy()
+    data['sentiment'] = np.where(ratings >= 4, 'positive', np.where(ratings <= 1, 'negative', 'neutral')).astype(object)
+    return data
+
+# =============================================================================
+# MEASUREMENT HELPERS
+# =============================================================================
+
+def current_rss_bytes():
+    """Resident set size of this process, or None when /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+def max_rss_bytes():
+    """Lifetime peak RSS of this process as reported by getrusage"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class RSSSampler:
+    """Background thread that records the peak RSS while a route is being driven"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss_bytes() or 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+def model_invocations():
+    """Current model invocation counters keyed by model name"""
+    from monitoring import MODEL_INVOCATIONS
+    return {labels['model']: value for labels, value in MODEL_INVOCATIONS.items()}
+
+def percentile(values, pct):
+    """Percentile of a list of latencies in milliseconds"""
+    return round(float(np.percentile(values, pct)), 3) if values else None
+
+# =============================================================================
+# BENCHMARK RUNNER
+# =============================================================================
+
+def discover_routes(flask_app, route_filter=None):
+    """List every parameterless GET /api/* route registered on the app"""
+    routes = []
+    for rule in flask_app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or rule.arguments:
+            continue
+        if rule.rule in EXCLUDED_ROUTES or 'GET' not in rule.methods:
+            continue
+        if route_filter and not any(part in rule.rule for part in route_filter):
+            continue
+        routes.append(rule.rule)
+    return sorted(routes)
+
+def benchmark_route(client, route, iterations, warmup, query, response_cache=None):
+    """Drive a single route and return latency percentiles and memory usage
+
+    ``response_cache`` is cleared before every timed request so the endpoint
+    itself is measured, not a cached response.
+    """
+    url = f"{route}?{query}" if query else route
+    for _ in range(warmup):
+        client.get(url)
+
+    latencies = []
+    status_codes = {}
+    response_bytes = 0
+    rss_before = current_rss_bytes()
+    models_before = model_invocations()
+
+    with RSSSampler() as sampler:
+        for _ in range(iterations):
+            if response_cache is not None:
+                response_cache.clear()
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            status_codes[str(response.status_code)] = status_codes.get(str(response.status_code), 0) + 1
+            response_bytes = len(response.get_data())
+
+    peak = sampler.peak or max_rss_bytes()
+    model_calls = {
+        model: round((count - models_before.get(model, 0)) / iterations, 2)
+        for model, count in model_invocations().items()
+    }
+    return {
+        'iterations': iterations,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(float(np.mean(latencies)), 3),
+        'max_ms': round(float(np.max(latencies)), 3),
+        'status_codes': status_codes,
+        'response_bytes': response_bytes,
+        'peak_rss_mb': round(peak / (1024 * 1024), 1),
+        'rss_delta_mb': round((peak - rss_before) / (1024 * 1024), 1) if rss_before else None,
+        'model_calls_per_request': model_calls
+    }
+
+def run_benchmarks(sizes, iterations=5, warmup=1, route_filter=None, query=None, seed=42):
+    """Load each synthetic dataset into the app and benchmark every route"""
+    # Import lazily: loading the app pulls in the sentiment and generative models
+    import app as bizeye
+
+    client = bizeye.app.test_client()
+    vocabulary = load_vocabulary()
+    routes = discover_routes(bizeye.app, route_filter)
+    results = {}
+
+    for label in sizes:
+        n_rows = DATASET_SIZES[label]
+        print(f"📊 Generating synthetic dataset: {label} ({n_rows:,} rows)")
+        start = time.perf_counter()
+        data = generate_synthetic_dataset(n_rows, seed=seed, vocabulary=vocabulary)
+        data, indexes = bizeye.prepare_dataset(assign_synthetic_sentiment(data), score_sentiment=False)
+        print(f"   generated in {time.perf_counter() - start:.1f}s, "
+              f"{data.memory_usage(deep=True).sum() / (1024 * 1024):.1f} MB in memory")
+
+        bizeye.install_dataset(data, indexes)
+        bizeye.response_cache.clear()
+        results[label] = {}
+        for route in routes:
+            results[label][route] = benchmark_route(client, route, iterations, warmup, query, bizeye.response_cache)
+            stats = results[label][route]
+            print(f"   {route:<50} p50={stats['p50_ms']:>10.1f}ms  p95={stats['p95_ms']:>10.1f}ms  "
+                  f"peak_rss={stats['peak_rss_mb']:>8.1f}MB  model_calls={stats['model_calls_per_request']}")
+
+        bizeye.install_dataset(None)
+        del data, indexes
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'query': query,
+            'seed': seed
+        },
+        'results': results
+    }
+
+def compare_string_memory(sizes, seed=42, iterations=5):
+    """Memory and filter latency of text columns stored as Python objects vs Arrow strings"""
+    from string_storage import ARROW_STRING_DTYPE, string_memory_report, pyarrow
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required for the string memory comparison")
+
+    vocabulary = load_vocabulary()
+    results = {}
+    for label in sizes:
+        n_rows = DATASET_SIZES[label]
+        print(f"📊 Comparing string storage: {label} ({n_rows:,} rows)")
+        data = assign_synthetic_sentiment(generate_synthetic_dataset(n_rows, seed=seed, vocabulary=vocabulary))
+        columns = string_memory_report(data)
+        object_total = sum(entry['object_bytes'] for entry in columns.values())
+        arrow_total = sum(entry['arrow_bytes'] for entry in columns.values())
+
+        # The same string filters the endpoints run, on both representations
+        filters = {}
+        for name, dtype in (('object', object), ('arrow', ARROW_STRING_DTYPE)):
+            categories = data['Product Category'].astype(dtype)
+            sentiments = data['sentiment'].astype(dtype)
+            latencies = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                (categories == 'Books').sum()
+                sentiments.isin(['negative', 'neutral']).sum()
+                latencies.append((time.perf_counter() - start) * 1000)
+            filters[name] = percentile(latencies, 50)
+
+        results[label] = {
+            'rows': n_rows,
+            'columns': columns,
+            'object_mb': round(object_total / (1024 * 1024), 1),
+            'arrow_mb': round(arrow_total / (1024 * 1024), 1),
+            'reduction_percentage': round((1 - arrow_total / object_total) * 100, 1) if object_total else 0,
+            'filter_p50_ms': filters
+        }
+        print(f"   text columns: {results[label]['object_mb']} MB as objects, {results[label]['arrow_mb']} MB as Arrow "
+              f"(-{results[label]['reduction_percentage']}%), filters p50 {filters['object']}ms -> {filters['arrow']}ms")
+        del data
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'pyarrow': pyarrow.__version__,
+            'seed': seed
+        },
+        'string_memory': results
+    }
+
+def legacy_read_csv(filepath):
+    """The upload parser before the Arrow reader: strict parse, then re-read skipping bad lines"""
+    try:
+        return pd.read_csv(filepath)
+    except pd.errors.ParserError:
+        try:
+            return pd.read_csv(filepath, on_bad_lines='skip', encoding='utf-8')
+        except Exception:
+            return pd.read_csv(filepath, on_bad_lines='skip', encoding='latin-1')
+
+def write_benchmark_csv(data, path, malformed_every=0):
+    """Write a dataset as CSV, giving every ``malformed_every``-th row an extra field"""
+    data.to_csv(path, index=False)
+    if not malformed_every:
+        return
+    with open(path) as csv_file:
+        lines = csv_file.readlines()
+    for idx in range(malformed_every, len(lines), malformed_every):
+        lines[idx] = lines[idx].rstrip('\n') + ',extra field\n'
+    with open(path, 'w') as csv_file:
+        csv_file.writelines(lines)
+
+def compare_csv_parsers(sizes, seed=42, iterations=5, malformed_every=1000):
+    """Parse throughput of the legacy pandas upload path vs the Arrow CSV reader"""
+    from csv_reader import read_csv, pa
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the CSV parser comparison")
+
+    vocabulary = load_vocabulary()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label in sizes:
+            n_rows = DATASET_SIZES[label]
+            data = generate_synthetic_dataset(n_rows, seed=seed, vocabulary=vocabulary)
+            results[label] = {}
+            for variant, every in (('clean', 0), ('malformed', malformed_every)):
+                path = os.path.join(tmp_dir, f'{label}_{variant}.csv')
+                write_benchmark_csv(data, path, every)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                print(f"📊 Parsing {label} ({n_rows:,} rows, {size_mb:.1f} MB, {variant})")
+
+                parsers = {
+                    'pandas': legacy_read_csv,
+                    'arrow': lambda csv_path: read_csv(csv_path, engine='arrow')[0]
+                }
+                entry = {'rows': n_rows, 'file_mb': round(size_mb, 1)}
+                for name, parse in parsers.items():
+                    latencies = []
+                    for _ in range(iterations):
+                        start = time.perf_counter()
+                        parsed_rows = len(parse(path))
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    p50_ms = percentile(latencies, 50)
+                    entry[name] = {
+                        'p50_ms': round(p50_ms, 1),
+                        'mb_per_second': round(size_mb * 1000 / p50_ms, 1),
+                        'rows_per_second': int(parsed_rows * 1000 / p50_ms),
+                        'parsed_rows': parsed_rows
+                    }
+                entry['speedup'] = round(entry['pandas']['p50_ms'] / entry['arrow']['p50_ms'], 2)
+                results[label][variant] = entry
+                print(f"   pandas {entry['pandas']['mb_per_second']} MB/s, arrow {entry['arrow']['mb_per_second']} MB/s "
+                      f"({entry['speedup']}x)")
+            del data
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'pyarrow': pa.__version__,
+            'cpu_count': os.cpu_count(),
+            'seed': seed
+        },
+        'csv_parse': results
+    }
+
+def compare_upload_formats(sizes, seed=42, iterations=5):
+    """Bytes on the wire and parse time of one dataset in every accepted upload format"""
+    from upload_formats import read_upload, upload_format, pa, pq
+    if pq is None:
+        raise RuntimeError("pyarrow is required for the upload format comparison")
+
+    vocabulary = load_vocabulary()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label in sizes:
+            n_rows = DATASET_SIZES[label]
+            data = generate_synthetic_dataset(n_rows, seed=seed, vocabulary=vocabulary)
+            print(f"📊 Upload formats: {label} ({n_rows:,} rows)")
+            csv_path = os.path.join(tmp_dir, f'{label}.csv')
+            ndjson_path = os.path.join(tmp_dir, f'{label}.ndjson')
+            data.to_csv(csv_path, index=False)
+            data.to_json(ndjson_path, orient='records', lines=True)
+            paths = {'csv': csv_path, 'ndjson': ndjson_path}
+            for source in (csv_path, ndjson_path):
+                for compression, codec in (('.gz', 'gzip'), ('.zst', 'zstd')):
+                    with pa.input_stream(source) as raw, pa.output_stream(source + compression, compression=codec) as out:
+                        out.upload(raw)
+                    paths[os.path.basename(source).split('.', 1)[1] + compression] = source + compression
+            paths['parquet'] = os.path.join(tmp_dir, f'{label}.parquet')
+            pq.write_table(pa.Table.from_pandas(data, preserve_index=False), paths['parquet'], compression='zstd')
+
+            results[label] = {}
+            for name, path in paths.items():
+                fmt, _ = upload_format(path)
+                latencies = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    read_upload(path, fmt)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                results[label][name] = {
+                    'file_mb': round(os.path.getsize(path) / (1024 * 1024), 1),
+                    'parse_p50_ms': round(percentile(latencies, 50), 1)
+                }
+                print(f"   {name:<12} {results[label][name]['file_mb']:>8} MB  {results[label][name]['parse_p50_ms']:>9} ms")
+            del data
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'pyarrow': pa.__version__,
+            'cpu_count': os.cpu_count(),
+            'seed': seed
+        },
+        'upload_formats': results
+    }
+
+def compare_sentiment_cascade(reviews_csv=SAMPLE_DATASET, max_reviews=5000, batch_size=32):
+    """Throughput and agreement with full-transformer labels of the lexicon cascade, per polarity band"""
+    # Import lazily: loading the app pulls in the sentiment model
+    import app as bizeye
+    from csv_reader import read_csv
+    from sentiment_cascade import CASCADE_BAND, EVALUATION_BANDS, LEXICON, evaluate_bands, load_lexicon
+
+    polarity = load_lexicon()
+    if polarity is None:
+        raise RuntimeError(f"Sentiment lexicon '{LEXICON}' is not installed")
+    data, _ = read_csv(reviews_csv)
+    column = 'Reviews' if 'Reviews' in data.columns else 'review'
+    texts = [text for text in data[column].dropna().astype(str).unique()[:max_reviews] if text.strip()]
+    print(f"📊 Sentiment cascade on {len(texts):,} distinct reviews from {os.path.basename(reviews_csv)}")
+
+    start = time.perf_counter()
+    transformer_labels = [bizeye.map_sentiment_result(raw)[0] for offset in range(0, len(texts), batch_size)
+                          for raw in bizeye.score_sentiment_batch(texts[offset:offset + batch_size])]
+    transformer_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    start = time.perf_counter()
+    polarities = [polarity(text) for text in texts]
+    lexicon_us = (time.perf_counter() - start) / len(texts) * 1e6
+    print(f"   transformer {transformer_us:,.0f} us/review, {LEXICON} {lexicon_us:,.0f} us/review")
+
+    bands = evaluate_bands(polarities, transformer_labels, sorted(set(EVALUATION_BANDS) | {CASCADE_BAND}))
+    for band in bands:
+        # Every review pays the lexicon pass; only the band's share pays the transformer
+        cascade_us = lexicon_us + band['transformer_share'] * transformer_us
+        band['estimated_us_per_review'] = round(cascade_us, 1)
+        band['estimated_speedup'] = round(transformer_us / cascade_us, 2)
+        print(f"   band [{band['lower']:+.2f}, {band['upper']:+.2f}]  transformer share {band['transformer_share']:.1%}  "
+              f"agreement {band['agreement']:.1%}  speedup {band['estimated_speedup']}x")
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'reviews_csv': reviews_csv,
+            'lexicon': LEXICON,
+            'batch_size': batch_size
+        },
+        'sentiment_cascade': {
+            'reviews': len(texts),
+            'transformer_us_per_review': round(transformer_us, 1),
+            'lexicon_us_per_review': round(lexicon_us, 1),
+            'configured_band': list(CASCADE_BAND),
+            'bands': bands
+        }
+    }
+
+def compare_results(current, previous, threshold=0.2, metrics=('p95_ms', 'peak_rss_mb')):
+    """Flag routes whose latency or memory grew by more than the threshold"""
+    regressions = []
+    for label, routes in current['results'].items():
+        for route, stats in routes.items():
+            baseline = previous.get('results', {}).get(label, {}).get(route)
+            if not baseline:
+                continue
+            for metric in metrics:
+                old, new = baseline.get(metric), stats.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if change > threshold:
+                    regressions.append({
+                        'size': label,
+                        'route': route,
+                        'metric': metric,
+                        'previous': old,
+                        'current': new,
+                        'change_percentage': round(change * 100, 1)
+                    })
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark BizEye API routes on synthetic datasets')
+    parser.add_argument('--sizes', default='1k,100k',
+                        help=f"Comma separated dataset sizes ({', '.join(DATASET_SIZES)})")
+    parser.add_argument('--iterations', type=int, default=5, help='Timed requests per route')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per route')
+    parser.add_argument('--routes', default=None, help='Comma separated substrings to select routes')
+    parser.add_argument('--query', default=None, help='Query string appended to every request, e.g. category=Books')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the data generator')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the JSON baseline')
+    parser.add_argument('--compare', default=None, help='Previous baseline to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative growth counted as a regression')
+    parser.add_argument('--generate-only', default=None, metavar='CSV',
+                        help='Write the synthetic dataset for the first size to CSV and exit')
+    parser.add_argument('--string-memory', action='store_true',
+                        help='Compare memory and filter latency of object vs Arrow string columns and exit')
+    parser.add_argument('--csv-parse', action='store_true',
+                        help='Compare CSV parse throughput of the legacy pandas path vs the Arrow reader and exit')
+    parser.add_argument('--upload-formats', action='store_true',
+                        help='Compare file size and parse time of CSV, NDJSON (plain, gzip, zstd) and Parquet uploads and exit')
+    parser.add_argument('--sentiment-cascade', nargs='?', const=SAMPLE_DATASET, default=None, metavar='CSV',
+                        help='Compare lexicon cascade bands with full-transformer labels on the reviews of a CSV and exit')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [size.strip().lower() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in DATASET_SIZES]
+    if unknown:
+        print(f"❌ Unknown dataset sizes: {', '.join(unknown)}")
+        return 2
+
+    if args.generate_only:
+        data = generate_synthetic_dataset(DATASET_SIZES[sizes[0]], seed=args.seed)
+        data.to_csv(args.generate_only, index=False)
+        print(f"✅ Wrote {len(data):,} rows to {args.generate_only}")
+        return 0
+
+    if args.string_memory:
+        with open(args.output, 'w') as output_file:
+            json.dump(compare_string_memory(sizes, args.seed, args.iterations), output_file, indent=2)
+        print(f"✅ String memory comparison written to {args.output}")
+        return 0
+
+    if args.csv_parse:
+        with open(args.output, 'w') as output_file:
+            json.dump(compare_csv_parsers(sizes, args.seed, args.iterations), output_file, indent=2)
+        print(f"✅ CSV parser comparison written to {args.output}")
+        return 0
+
+    if args.upload_formats:
+        with open(args.output, 'w') as output_file:
+            json.dump(compare_upload_formats(sizes, args.seed, args.iterations), output_file, indent=2)
+        print(f"✅ Upload format comparison written to {args.output}")
+        return 0
+
+    if args.sentiment_cascade:
+        with open(args.output, 'w') as output_file:
+            json.dump(compare_sentiment_cascade(args.sentiment_cascade), output_file, indent=2)
+        print(f"✅ Sentiment cascade comparison written to {args.output}")
+        return 0
+
+    route_filter = [part.strip() for part in args.routes.split(',')] if args.routes else None
+    current = run_benchmarks(sizes, args.iterations, args.warmup, route_filter, args.query, args.seed)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            previous = json.load(baseline_file)
+        regressions = compare_results(current, previous, args.threshold)
+        current['regressions'] = regressions
+        current['compared_to'] = args.compare
+
+    with open(args.output, 'w') as output_file:
+        json.dump(current, output_file, indent=2)
+    print(f"✅ Benchmark results written to {args.output}")
+
+    if regressions:
+        print(f"⚠️  {len(regressions)} regressions over {args.threshold:.0%}:")
+        for item in regressions:
+            print(f"   [{item['size']}] {item['route']} {item['metric']}: "
+                  f"{item['previous']} -> {item['current']} (+{item['change_percentage']}%)")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+BizEye Bitmap Index
+Compressed per-value bitmaps for filtering rows on low-cardinality dimensions
+"""
+
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Filter parameter -> dataset column
+DIMENSIONS = {
+    'category': 'product_category',
+    'region': 'Region',
+    'payment_method': 'Payment Method',
+    'sentiment': 'sentiment',
+    'rating': 'rating'
+}
+
+# A bitmap is kept as sorted positions while that is smaller than packed words
+SPARSE_RATIO = 32
+
+_ONE = np.uint64(1)
+
+
+def _pack(mask):
+    packed = np.packbits(mask, bitorder='little')
+    padding = (-len(packed)) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view('<u8')
+
+
+def _unpack(words, size):
+    return np.unpackbits(words.view(np.uint8), bitorder='little', count=size).astype(bool)
+
+
+class Bitmap:
+    """Set of row positions stored as packed 64-bit words, or as sorted positions when sparse"""
+
+    __slots__ = ('size', 'words', 'positions')
+
+    def __init__(self, size, words=None, positions=None):
+        self.size = size
+        self.words = words
+        self.positions = positions
+
+    @classmethod
+    def from_mask(cls, mask):
+        mask = np.asarray(mask, dtype=bool)
+        count = int(np.count_nonzero(mask))
+        if count * SPARSE_RATIO < len(mask):
+            return cls(len(mask), positions=np.flatnonzero(mask).astype(np.uint32))
+        return cls(len(mask), words=_pack(mask))
+
+    @classmethod
+    def from_positions(cls, positions, size):
+        positions = np.asarray(positions, dtype=np.uint32)
+        if len(positions) * SPARSE_RATIO < size:
+            return cls(size, positions=positions)
+        mask = np.zeros(size, dtype=bool)
+        mask[positions] = True
+        return cls(size, words=_pack(mask))
+
+    @classmethod
+    def empty(cls, size):
+        return cls(size, positions=np.empty(0, dtype=np.uint32))
+
+    @classmethod
+    def full(cls, size):
+        return cls.from_mask(np.ones(size, dtype=bool))
+
+    @property
+    def is_sparse(self):
+        return self.positions is not None
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes if self.is_sparse else self.words.nbytes
+
+    def __len__(self):
+        if self.is_sparse:
+            return len(self.positions)
+        return int(np.unpackbits(self.words.view(np.uint8)).sum())
+
+    def _test(self, positions):
+        """Whether each of the given positions is set (dense bitmaps only)"""
+        positions = positions.astype(np.uint64)
+        return ((self.words[positions >> np.uint64(6)] >> (positions & np.uint64(63))) & _ONE).astype(bool)
+
+    def __and__(self, other):
+        if self.size != other.size:
+            raise ValueError("Bitmaps cover different row counts")
+        if self.is_sparse and other.is_sparse:
+            return Bitmap(self.size, positions=np.intersect1d(self.positions, other.positions, assume_unique=True))
+        if self.is_sparse or other.is_sparse:
+            sparse, dense = (self, other) if self.is_sparse else (other, self)
+            return Bitmap(self.size, positions=sparse.positions[dense._test(sparse.positions)])
+        return Bitmap(self.size, words=self.words & other.words)._compact()
+
+    def __or__(self, other):
+        if self.size != other.size:
+            raise ValueError("Bitmaps cover different row counts")
+        if self.is_sparse and other.is_sparse:
+            return Bitmap.from_positions(np.union1d(self.positions, other.positions), self.size)
+        if self.is_sparse or other.is_sparse:
+            sparse, dense = (self, other) if self.is_sparse else (other, self)
+            words = dense.words.copy()
+            positions = sparse.positions.astype(np.uint64)
+            np.bitwise_or.at(words, positions >> np.uint64(6), _ONE << (positions & np.uint64(63)))
+            return Bitmap(self.size, words=words)
+        return Bitmap(self.size, words=self.words | other.words)
+
+    def _compact(self):
+        if not self.is_sparse and len(self) * SPARSE_RATIO < self.size:
+            return Bitmap(self.size, positions=self.to_positions().astype(np.uint32))
+        return self
+
+    def to_positions(self):
+        """Sorted row positions contained in the bitmap"""
+        if self.is_sparse:
+            return self.positions.astype(np.int64)
+        return np.flatnonzero(_unpack(self.words, self.size))
+
+    def truncate(self, size):
+        """Bitmap restricted to the first ``size`` rows"""
+        if size >= self.size:
+            return self
+        if self.is_sparse:
+            return Bitmap(size, positions=self.positions[:np.searchsorted(self.positions, size)])
+        return Bitmap.from_mask(_unpack(self.words, self.size)[:size])
+
+    @classmethod
+    def join(cls, bitmaps):
+        """Bitmap over the rows of the given bitmaps, one after another"""
+        size = sum(bitmap.size for bitmap in bitmaps)
+        if all(bitmap.is_sparse for bitmap in bitmaps):
+            offsets = np.cumsum([0] + [bitmap.size for bitmap in bitmaps[:-1]])
+            positions = [bitmap.positions + np.uint32(offset) for bitmap, offset in zip(bitmaps, offsets)]
+            return cls.from_positions(np.concatenate(positions) if positions else np.empty(0, dtype=np.uint32), size)
+        return cls.from_mask(np.concatenate([bitmap._mask() for bitmap in bitmaps]))
+
+    def concat(self, other):
+        """Bitmap over this bitmap's rows followed by the other's"""
+        if self.is_sparse and other.is_sparse:
+            positions = np.concatenate([self.positions, other.positions + np.uint32(self.size)])
+            return Bitmap.from_positions(positions, self.size + other.size)
+        return Bitmap.from_mask(np.concatenate([self._mask(), other._mask()]))
+
+    def _mask(self):
+        if self.is_sparse:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self.positions] = True
+            return mask
+        return _unpack(self.words, self.size)
+
+
+def rating_buckets(values):
+    """Whole-star rating bucket (0-5; 0 is a real "no stars" rating) of each value, None when missing"""
+    ratings = pd.to_numeric(values, errors='coerce').round().clip(0, 5)
+    buckets = pd.Series(None, index=ratings.index, dtype=object)
+    valid = ratings.notna()
+    buckets[valid] = ratings[valid].astype(int).astype(str)
+    return buckets
+
+
+class BitmapIndex:
+    """One bitmap per value of each filter dimension, extended as rows are appended
+
+    Filters combine with OR inside a dimension and AND across dimensions.
+    Values are matched case-insensitively. Rows are indexed in segments:
+    ``add()`` only builds bitmaps over the new rows, for the values they
+    contain, and segments merge in doubling sizes so there are O(log n) of
+    them. Segments are never modified once built, so ``copy()`` shares them.
+    """
+
+    def __init__(self, dimensions=DIMENSIONS):
+        self.dimensions = dict(dimensions)
+        self.size = 0
+        self._lock = threading.RLock()
+        self._segments = []        # (rows, {dimension: {key: Bitmap}}) in row order
+        self._labels = {dimension: {} for dimension in self.dimensions}  # lowercase key -> display value
+
+    def __len__(self):
+        return self.size
+
+    def _dimension_values(self, data, dimension):
+        column = self.dimensions[dimension]
+        if column not in data.columns:
+            return pd.Series([None] * len(data), index=data.index, dtype=object)
+        if dimension == 'rating':
+            return rating_buckets(data[column])
+        return data[column]
+
+    def _merge_segments(self):
+        # Merge while the newest segment is at least as large as the one before it
+        while len(self._segments) > 1 and self._segments[-1][0] >= self._segments[-2][0]:
+            (first_rows, first), (second_rows, second) = self._segments[-2:]
+            merged = {}
+            for dimension in self.dimensions:
+                merged[dimension] = {
+                    key: first[dimension].get(key, Bitmap.empty(first_rows)).concat(
+                        second[dimension].get(key, Bitmap.empty(second_rows)))
+                    for key in list(first[dimension]) + [key for key in second[dimension] if key not in first[dimension]]
+                }
+            self._segments[-2:] = [(first_rows + second_rows, merged)]
+
+    def add(self, data):
+        """Index the rows of a dataset frame, appended after existing rows"""
+        n_rows = len(data)
+        if not n_rows:
+            return
+        segment = {}
+        with self._lock:
+            for dimension in self.dimensions:
+                codes, uniques = pd.factorize(self._dimension_values(data, dimension))
+                bitmaps = {}
+                for code, value in enumerate(uniques):
+                    key = str(value).strip().lower()
+                    self._labels[dimension].setdefault(key, value)
+                    bitmap = Bitmap.from_mask(codes == code)
+                    # Different spellings of the same value share one bitmap
+                    bitmaps[key] = bitmaps[key] | bitmap if key in bitmaps else bitmap
+                segment[dimension] = bitmaps
+            self._segments.append((n_rows, segment))
+            self.size += n_rows
+            self._merge_segments()
+
+    def copy(self):
+        """Independent copy that can be extended while readers keep using this index"""
+        with self._lock:
+            clone = copy.copy(self)
+            clone._lock = threading.RLock()
+            clone._segments = list(self._segments)
+            clone._labels = {dimension: dict(labels) for dimension, labels in self._labels.items()}
+        return clone
+
+    def resolve(self, filters, n_rows=None):
+        """Bitmap of rows matching ``{dimension: [values]}``, or None when nothing is filtered"""
+        filters = {dimension: values for dimension, values in filters.items() if dimension in self.dimensions and values}
+        if not filters:
+            return None
+        with self._lock:
+            size = self.size if n_rows is None else min(n_rows, self.size)
+            segments = list(self._segments)
+
+        parts = []
+        for rows, bitmaps in segments:
+            result = None
+            for dimension, values in filters.items():
+                matched = Bitmap.empty(rows)
+                for value in values:
+                    bitmap = bitmaps[dimension].get(str(value).strip().lower())
+                    if bitmap is not None:
+                        matched = matched | bitmap
+                result = matched if result is None else result & matched
+            parts.append(result)
+        return Bitmap.join(parts).truncate(size)
+
+    def values(self):
+        """Available values and row counts per dimension"""
+        with self._lock:
+            counts = {dimension: {} for dimension in self.dimensions}
+            for _, bitmaps in self._segments:
+                for dimension, keyed in bitmaps.items():
+                    for key, bitmap in keyed.items():
+                        counts[dimension][key] = counts[dimension].get(key, 0) + len(bitmap)
+            return {
+                dimension: {str(self._labels[dimension][key]): count for key, count in keyed.items() if count}
+                for dimension, keyed in counts.items()
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': self.size,
+                'segments': len(self._segments),
+                'bitmaps': sum(len(keyed) for _, bitmaps in self._segments for keyed in bitmaps.values()),
+                'bytes': sum(bitmap.nbytes for _, bitmaps in self._segments
+                             for keyed in bitmaps.values() for bitmap in keyed.values())
+            }
@@ -0,0 +1,416 @@
+"""
+BizEye Chunked Uploads
+Resumable uploads sent as numbered, checksummed parts and parsed while later parts are still arriving
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from monitoring import REGISTRY
+from upload_formats import SUPPORTED_UPLOADS, decompress_stream, read_upload, stream_chunks, upload_chunks, upload_format
+
+UPLOAD_DIR = os.path.join('uploads', 'chunked')
+# Part size suggested to clients; any size up to the maximum is accepted
+PART_SIZE = int(os.environ.get('BIZEYE_UPLOAD_PART_MB', '64')) * 1024 * 1024
+MAX_PART_SIZE = int(os.environ.get('BIZEYE_UPLOAD_MAX_PART_MB', '512')) * 1024 * 1024
+MAX_PARTS = 10000
+# Uploads not completed within this time are deleted
+SESSION_TTL_SECONDS = float(os.environ.get('BIZEYE_UPLOAD_TTL_HOURS', '24')) * 3600
+COPY_BUFFER = 1024 * 1024
+# Parts stored by other workers only show up on disk, so waiting parsers re-check this often
+PART_POLL_SECONDS = 0.5
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+PARTS = REGISTRY.counter(
+    'bizeye_upload_parts_total', 'Upload parts by result (stored, duplicate, checksum_mismatch, conflict, too_large)',
+    ('result',))
+PART_BYTES = REGISTRY.counter(
+    'bizeye_upload_part_bytes_total', 'Bytes of upload parts stored')
+
+
+class UploadError(Exception):
+    """Raised for an upload request that cannot be honoured; carries the HTTP status"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadAborted(Exception):
+    """Raised inside a background parse when its upload is deleted or expires"""
+
+
+class _PartStream(io.RawIOBase):
+    """The bytes of an upload's parts in order, waiting for parts that have not been stored yet"""
+
+    def __init__(self, session):
+        self._session = session
+        self._number = 1
+        self._file = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._file is None:
+                path = self._session.wait_for_part(self._number)
+                if path is None:
+                    return 0
+                self._file = open(path, 'rb')
+            size = self._file.readinto(buffer)
+            if size:
+                return size
+            self._file.close()
+            self._file = None
+            self._session.parsed_parts = self._number
+            self._number += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class UploadSession:
+    """One resumable upload: its manifest, the parts stored on disk and the background parse
+
+    A part becomes visible only once its checksum file is written, so an
+    interrupted part never counts as received. When ``parse_early`` is set,
+    CSV and NDJSON uploads are parsed chunk by chunk as soon as part 1
+    arrives, following the parts in order and waiting for the next one.
+    Completion is a marker file next to the parts, so a parse running on
+    another worker sees it and stops waiting; a deleted directory aborts it.
+    """
+
+    def __init__(self, directory, manifest, parse_early, chunk_rows):
+        self.directory = directory
+        self.manifest = manifest
+        self.upload_id = manifest['upload_id']
+        self.fmt = manifest['format']
+        self.suffix = manifest['suffix']
+        self.parse_early = parse_early and self.fmt in ('csv', 'ndjson')
+        self.chunk_rows = chunk_rows
+        self._cond = threading.Condition()
+        self._aborted = False
+        self._parser = None
+        self._frames = []
+        self._parse_error = None
+        self.parsed_parts = 0
+        self.parsed_rows = 0
+
+    def _part_path(self, number):
+        return os.path.join(self.directory, f'part-{number:06d}')
+
+    def _checksum_path(self, number):
+        return self._part_path(number) + '.sha256'
+
+    def _completion_path(self):
+        return os.path.join(self.directory, 'complete.json')
+
+    def total_parts(self):
+        """Number of parts of a completed upload, or None while parts may still arrive"""
+        try:
+            with open(self._completion_path()) as completion_file:
+                return json.load(completion_file)['parts']
+        except FileNotFoundError:
+            return None
+
+    def part(self, number):
+        """Size and SHA-256 of a stored part, or None when it has not been received"""
+        try:
+            with open(self._checksum_path(number)) as checksum_file:
+                digest = checksum_file.read().strip()
+            return {'part': number, 'size': os.path.getsize(self._part_path(number)), 'sha256': digest}
+        except FileNotFoundError:
+            return None
+
+    def parts(self):
+        numbers = sorted(int(name[5:11]) for name in os.listdir(self.directory)
+                         if name.startswith('part-') and name.endswith('.sha256'))
+        return [part for part in (self.part(number) for number in numbers) if part is not None]
+
+    def put_part(self, number, stream, expected_sha256=None):
+        """Store a part from a request body, verifying ``expected_sha256`` when the client sent one"""
+        if not 1 <= number <= MAX_PARTS:
+            raise UploadError(f"Part numbers run from 1 to {MAX_PARTS}")
+        if self.total_parts() is not None:
+            raise UploadError("Upload is already being completed", 409)
+
+        temp_path = f'{self._part_path(number)}.{uuid.uuid4().hex}.tmp'
+        digest, size = hashlib.sha256(), 0
+        try:
+            with open(temp_path, 'wb') as part_file:
+                while True:
+                    block = stream.read(COPY_BUFFER)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > MAX_PART_SIZE:
+                        PARTS.inc(result='too_large')
+                        raise UploadError(f"Parts may be at most {MAX_PART_SIZE // (1024 * 1024)} MB", 413)
+                    digest.update(block)
+                    part_file.write(block)
+            sha256 = digest.hexdigest()
+            if expected_sha256 and expected_sha256.strip().lower() != sha256:
+                PARTS.inc(result='checksum_mismatch')
+                raise UploadError(f"Checksum mismatch for part {number}: received {sha256}", 422)
+
+            existing = self.part(number)
+            if existing is not None:
+                # Retried parts are fine as long as the content is the same
+                if existing['sha256'] == sha256:
+                    PARTS.inc(result='duplicate')
+                    return existing
+                PARTS.inc(result='conflict')
+                raise UploadError(f"Part {number} was already stored with checksum {existing['sha256']}", 409)
+
+            os.replace(temp_path, self._part_path(number))
+            with open(temp_path, 'w') as checksum_file:
+                checksum_file.write(sha256)
+            os.replace(temp_path, self._checksum_path(number))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        PARTS.inc(result='stored')
+        PART_BYTES.inc(size)
+        with self._cond:
+            self._cond.notify_all()
+        if self.parse_early:
+            self._start_parser()
+        return {'part': number, 'size': size, 'sha256': sha256}
+
+    def wait_for_part(self, number):
+        """Path of a stored part, or None past the last part of a completed upload; waits while it is missing"""
+        with self._cond:
+            while True:
+                # Deleted here or by another worker
+                if self._aborted or not os.path.isdir(self.directory):
+                    raise UploadAborted(self.upload_id)
+                if os.path.exists(self._checksum_path(number)):
+                    return self._part_path(number)
+                total_parts = self.total_parts()
+                if total_parts is not None and number > total_parts:
+                    return None
+                self._cond.wait(PART_POLL_SECONDS)
+
+    def _start_parser(self):
+        with self._cond:
+            if self._parser is None:
+                self._parser = threading.Thread(target=self._parse, name=f'upload-{self.upload_id[:8]}', daemon=True)
+                self._parser.start()
+
+    def _parse(self):
+        try:
+            with decompress_stream(io.BufferedReader(_PartStream(self), COPY_BUFFER), self.suffix) as stream:
+                for chunk in stream_chunks(stream, self.fmt, self.chunk_rows):
+                    with self._cond:
+                        self._frames.append(chunk)
+                        self.parsed_rows += len(chunk)
+        except UploadAborted:
+            with self._cond:
+                self._frames = []
+        except Exception as e:
+            self._parse_error = e
+
+    def complete(self, total_parts):
+        """Check that parts 1..total_parts are all stored and mark the upload as complete
+
+        Only one caller, on any worker, gets to complete an upload; the others
+        get 409 until ``reopen()`` is called after a failed load.
+        """
+        with self._cond:
+            if self.total_parts() is not None:
+                raise UploadError("Upload is already being completed", 409)
+            numbers = {part['part'] for part in self.parts()}
+            missing = [number for number in range(1, total_parts + 1) if number not in numbers]
+            extra = sorted(number for number in numbers if number > total_parts)
+            if missing:
+                raise UploadError(f"Missing parts: {', '.join(map(str, missing[:20]))}{' ...' if len(missing) > 20 else ''}")
+            if extra:
+                raise UploadError(f"Parts beyond {total_parts} were uploaded: {', '.join(map(str, extra[:20]))}")
+
+            # Linking a finished temp file claims completion atomically across processes
+            temp_path = f'{self._completion_path()}.{uuid.uuid4().hex}.tmp'
+            try:
+                with open(temp_path, 'w') as completion_file:
+                    json.dump({'parts': total_parts, 'completed': time.time()}, completion_file)
+                os.link(temp_path, self._completion_path())
+            except FileExistsError:
+                raise UploadError("Upload is already being completed", 409)
+            finally:
+                os.remove(temp_path)
+            self._cond.notify_all()
+
+    def reopen(self):
+        """Undo ``complete()`` after the upload failed to load, so it can be resumed and completed again"""
+        with self._cond:
+            try:
+                os.remove(self._completion_path())
+            except FileNotFoundError:
+                pass
+            # A finished parse stopped at the old last part; start over on the next completion
+            if self._parser is not None and not self._parser.is_alive():
+                self._parser = None
+                self._frames = []
+                self._parse_error = None
+                self.parsed_parts = 0
+                self.parsed_rows = 0
+            self._cond.notify_all()
+
+    def _assembled_path(self):
+        """The parts joined into one file, for formats that need random access (Parquet)"""
+        path = os.path.join(self.directory, f'upload{self.suffix}')
+        if not os.path.exists(path):
+            with open(path + '.tmp', 'wb') as assembled:
+                for number in range(1, self.total_parts() + 1):
+                    with open(self._part_path(number), 'rb') as part_file:
+                        shutil.copyfileobj(part_file, assembled, COPY_BUFFER)
+            os.replace(path + '.tmp', path)
+        return path
+
+    def rows(self):
+        """The completed upload as one frame, reusing the chunks parsed while parts were arriving"""
+        if not self.parse_early:
+            data, _ = read_upload(self._assembled_path(), self.fmt)
+            return data
+        self._start_parser()
+        self._parser.join()
+        if self._parse_error is not None:
+            raise self._parse_error
+        return pd.concat(self._frames, ignore_index=True) if self._frames else pd.DataFrame()
+
+    def chunks(self):
+        """The completed upload chunk by chunk, read straight from the parts where the format allows it"""
+        if self.fmt == 'parquet':
+            yield from upload_chunks(self._assembled_path(), self.fmt, self.chunk_rows)
+            return
+        with decompress_stream(io.BufferedReader(_PartStream(self), COPY_BUFFER), self.suffix) as stream:
+            yield from stream_chunks(stream, self.fmt, self.chunk_rows)
+
+    def abort(self):
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+    def status(self):
+        parts = self.parts()
+        numbers = {part['part'] for part in parts}
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.manifest['filename'],
+            'format': self.fmt,
+            'mode': self.manifest['mode'],
+            'part_size': PART_SIZE,
+            'max_part_size': MAX_PART_SIZE,
+            'parts': parts,
+            'received_parts': len(parts),
+            'received_bytes': sum(part['size'] for part in parts),
+            # Resume by sending parts from here on
+            'next_part': next(number for number in range(1, len(numbers) + 2) if number not in numbers),
+            'parsed_parts': self.parsed_parts,
+            'parsed_rows': self.parsed_rows,
+            'completing': self.total_parts() is not None,
+            'expires_at': self.manifest['created'] + SESSION_TTL_SECONDS
+        }
+
+
+class ChunkedUploads:
+    """Upload sessions kept under ``directory``
+
+    Parts and manifests live on disk, so an upload survives a restart and its
+    parts may be sent to any worker.
+    """
+
+    def __init__(self, directory=UPLOAD_DIR, parse_early=True, chunk_rows=100_000):
+        self.directory = directory
+        self.parse_early = parse_early
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def _session_dir(self, upload_id):
+        return os.path.join(self.directory, upload_id)
+
+    def create(self, filename, mode):
+        fmt, suffix = upload_format(filename or '')
+        if fmt is None:
+            raise UploadError(f"Unsupported file type. Upload {SUPPORTED_UPLOADS}")
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        manifest = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'format': fmt,
+            'suffix': suffix,
+            'mode': mode,
+            'created': time.time()
+        }
+        directory = self._session_dir(upload_id)
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'manifest.json'), 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        session = UploadSession(directory, manifest, self.parse_early, self.chunk_rows)
+        with self._lock:
+            self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        """The session of an upload id, loaded from disk if another worker (or process) created it"""
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise UploadError("Unknown upload", 404)
+        with self._lock:
+            session = self._sessions.get(upload_id)
+            if session is not None and not os.path.isdir(session.directory):
+                # Completed or deleted on another worker
+                self._sessions.pop(upload_id)
+                session.abort()
+                raise UploadError("Unknown upload", 404)
+            if session is None:
+                directory = self._session_dir(upload_id)
+                try:
+                    with open(os.path.join(directory, 'manifest.json')) as manifest_file:
+                        manifest = json.load(manifest_file)
+                except FileNotFoundError:
+                    raise UploadError("Unknown upload", 404)
+                session = self._sessions[upload_id] = UploadSession(directory, manifest, self.parse_early, self.chunk_rows)
+        return session
+
+    def remove(self, upload_id):
+        """Stop an upload's background parse and delete its parts"""
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is not None:
+            session.abort()
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def expire(self):
+        """Delete uploads older than the session TTL and forget sessions another worker finished"""
+        with self._lock:
+            gone = [upload_id for upload_id, session in self._sessions.items() if not os.path.isdir(session.directory)]
+            for upload_id in gone:
+                self._sessions.pop(upload_id).abort()
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - SESSION_TTL_SECONDS
+        for upload_id in os.listdir(self.directory):
+            manifest_path = os.path.join(self._session_dir(upload_id), 'manifest.json')
+            try:
+                with open(manifest_path) as manifest_file:
+                    created = json.load(manifest_file)['created']
+            except (OSError, ValueError, KeyError):
+                continue
+            if created < cutoff:
+                self.remove(upload_id)
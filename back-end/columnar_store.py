@@ -0,0 +1,410 @@
+"""
+BizEye Columnar Store
+Optional DuckDB/Parquet storage backend and the aggregation interface used by the analytics endpoints
+"""
+
+import glob
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from bitmap_index import DIMENSIONS
+
+# Storage configuration
+STORAGE_BACKEND = os.environ.get('BIZEYE_STORAGE_BACKEND', 'memory').lower()
+DUCKDB_DIR = os.environ.get('BIZEYE_DUCKDB_DIR', 'warehouse')
+DUCKDB_MEMORY_LIMIT = os.environ.get('BIZEYE_DUCKDB_MEMORY_LIMIT')
+CHUNK_ROWS = int(os.environ.get('BIZEYE_DUCKDB_CHUNK_ROWS', '100000'))
+# Filtered rows read back into a frame for endpoints that need the rows themselves (search, AI insights, ...)
+FRAME_ROWS = int(os.environ.get('BIZEYE_DUCKDB_FRAME_ROWS', '200000'))
+
+# Columns stored as numbers (BIGINT or DOUBLE) so Parquet parts unify by name
+NUMERIC_COLUMNS = ('Units Sold', 'Unit Price', 'Total Revenue', 'rating', 'sentiment_score')
+DATE_COLUMN = 'date'
+
+# Aggregations understood by group_totals
+AGGREGATIONS = ('sum', 'mean', 'count', 'positive_pct')
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+# =============================================================================
+# IN-MEMORY AGGREGATIONS
+# =============================================================================
+
+class FrameQueries:
+    """Aggregations over an (already filtered) in-memory DataFrame"""
+
+    backend = 'memory'
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def has_column(self, column):
+        return column in self.frame.columns
+
+    def count(self):
+        return len(self.frame)
+
+    def sentiment_counts(self):
+        return self.frame['sentiment'].value_counts().to_dict()
+
+    def column_sum(self, column):
+        return self.frame[column].sum()
+
+    def column_mean(self, column):
+        return self.frame[column].mean()
+
+    def column_quantile(self, column, quantile):
+        return self.frame[column].quantile(quantile)
+
+    def distinct_count(self, column):
+        return self.frame[column].nunique(dropna=False)
+
+    def rows(self, offset, limit):
+        return self.frame.iloc[offset:offset + limit]
+
+    def recent_split(self, value_column='Total Revenue', days=7):
+        """Mean of a column over the last ``days`` before the latest date and over the rows before that"""
+        dates = pd.to_datetime(self.frame[DATE_COLUMN])
+        cutoff = dates.max() - pd.Timedelta(days=days)
+        recent = self.frame.loc[dates >= cutoff, value_column]
+        historical = self.frame.loc[dates < cutoff, value_column]
+        return {
+            'recent_rows': len(recent),
+            'recent_avg': recent.mean(),
+            'historical_rows': len(historical),
+            'historical_avg': historical.mean()
+        }
+
+    def daily_totals(self):
+        """Revenue, units and row count per day, sorted by date"""
+        frame = self.frame.assign(**{DATE_COLUMN: pd.to_datetime(self.frame[DATE_COLUMN])})
+        daily = frame.groupby(DATE_COLUMN).agg({
+            'Total Revenue': 'sum',
+            'Units Sold': 'sum',
+            'product_id': 'count'
+        }).reset_index()
+        return daily.sort_values(DATE_COLUMN)
+
+    def _group(self, by, aggregations):
+        spec = {}
+        for output, (column, function) in aggregations.items():
+            if function == 'positive_pct':
+                spec[output] = pd.NamedAgg(column, lambda x: (x == 'positive').sum() / len(x) * 100)
+            else:
+                spec[output] = pd.NamedAgg(column, function)
+        return self.frame.groupby(by).agg(**spec).reset_index()
+
+    def group_totals(self, by, aggregations, positive=(), limit=None):
+        """Per-group aggregates ``{output: (column, function)}`` sorted by the group key
+
+        Groups where any ``positive`` output is not greater than zero are
+        dropped, and at most ``limit`` groups are returned.
+        """
+        grouped = self._group(by, aggregations)
+        for output in positive:
+            grouped = grouped[grouped[output] > 0]
+        return grouped.head(limit) if limit is not None else grouped
+
+    def group_quantiles(self, by, column, function, quantiles):
+        """Quantiles of a per-group aggregate"""
+        grouped = self._group(by, {column: (column, function)})
+        return [grouped[column].quantile(quantile) for quantile in quantiles]
+
+# =============================================================================
+# DUCKDB AGGREGATIONS
+# =============================================================================
+
+def _rating_bucket(column):
+    # Same whole-star buckets as the bitmap index (round half to even, clipped to 0-5)
+    return f'CAST(LEAST(GREATEST(ROUND_EVEN(TRY_CAST({_quote(column)} AS DOUBLE), 0), 0), 5) AS INTEGER)'
+
+
+def filter_clause(filters, columns):
+    """SQL WHERE clause and parameters for ``{dimension: [values]}`` filters"""
+    clauses, params = [], []
+    for dimension, values in filters.items():
+        column = DIMENSIONS.get(dimension)
+        if column is None or not values:
+            continue
+        if column not in columns:
+            clauses.append('FALSE')
+            continue
+        if dimension == 'rating':
+            expression = _rating_bucket(column)
+            values = [int(value) for value in values if str(value).strip().isdigit()]
+            if not values:
+                clauses.append('FALSE')
+                continue
+        else:
+            expression = f'lower(trim(CAST({_quote(column)} AS VARCHAR)))'
+            values = [str(value).strip().lower() for value in values]
+        clauses.append(f'{expression} IN ({", ".join("?" for _ in values)})')
+        params.extend(values)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+class DuckDBQueries:
+    """The FrameQueries interface answered with SQL pushed down to DuckDB"""
+
+    backend = 'duckdb'
+
+    def __init__(self, store, filters=None):
+        self.store = store
+        self.columns = store.columns()
+        self.where, self.params = filter_clause(filters or {}, self.columns)
+        self.source = f'(SELECT * FROM dataset{self.where}) AS filtered'
+
+    def _scalar(self, select):
+        return self.store.execute(f'SELECT {select} FROM {self.source}', self.params).fetchone()[0]
+
+    def has_column(self, column):
+        return column in self.columns
+
+    def count(self):
+        return self._scalar('COUNT(*)')
+
+    def sentiment_counts(self):
+        rows = self.store.execute(
+            f'SELECT sentiment, COUNT(*) FROM {self.source} WHERE sentiment IS NOT NULL GROUP BY sentiment',
+            self.params).fetchall()
+        return dict(rows)
+
+    def column_sum(self, column):
+        return self._scalar(f'COALESCE(SUM({_quote(column)}), 0)')
+
+    def column_mean(self, column):
+        value = self._scalar(f'AVG({_quote(column)})')
+        return np.nan if value is None else value
+
+    def column_quantile(self, column, quantile):
+        value = self._scalar(f'QUANTILE_CONT({_quote(column)}, {float(quantile)})')
+        return np.nan if value is None else value
+
+    def distinct_count(self, column):
+        # COUNT(DISTINCT) ignores NULL; pandas counts a missing value as one more distinct value
+        return self._scalar(f'COUNT(DISTINCT {_quote(column)}) + MAX(CASE WHEN {_quote(column)} IS NULL THEN 1 ELSE 0 END)') or 0
+
+    def rows(self, offset, limit):
+        if offset < 0 or limit <= 0:
+            return self.store.execute(f'SELECT * FROM {self.source} LIMIT 0', self.params).fetchdf()
+        return self.store.execute(f'SELECT * FROM {self.source} LIMIT {int(limit)} OFFSET {int(offset)}',
+                                  self.params).fetchdf()
+
+    def chunks(self, chunk_rows, columns=None):
+        """Stream every filtered row as frames of about ``chunk_rows`` rows (whole 2048-row DuckDB vectors)
+
+        ``columns`` limits the frames to those columns, so Parquet reads skip the others.
+        """
+        select = ', '.join(_quote(column) for column in columns) if columns else '*'
+        cursor = self.store.execute(f'SELECT {select} FROM {self.source}', self.params)
+        vectors = max(1, chunk_rows // 2048)
+        chunk = cursor.fetch_df_chunk(vectors)
+        # The first chunk is yielded even when empty so exports keep the columns
+        yield chunk
+        while len(chunk):
+            chunk = cursor.fetch_df_chunk(vectors)
+            if len(chunk):
+                yield chunk
+
+    def recent_split(self, value_column='Total Revenue', days=7):
+        value, date = _quote(value_column), _quote(DATE_COLUMN)
+        row = self.store.execute(f'''
+            WITH bounds AS (SELECT MAX({date}) - INTERVAL {int(days)} DAY AS cutoff FROM {self.source})
+            SELECT COUNT(CASE WHEN {date} >= cutoff THEN 1 END), AVG(CASE WHEN {date} >= cutoff THEN {value} END),
+                   COUNT(CASE WHEN {date} < cutoff THEN 1 END), AVG(CASE WHEN {date} < cutoff THEN {value} END)
+            FROM {self.source}, bounds''', self.params + self.params).fetchone()
+        return {
+            'recent_rows': row[0],
+            'recent_avg': np.nan if row[1] is None else row[1],
+            'historical_rows': row[2],
+            'historical_avg': np.nan if row[3] is None else row[3]
+        }
+
+    def daily_totals(self):
+        date = _quote(DATE_COLUMN)
+        return self.store.execute(f'''
+            SELECT {date}, COALESCE(SUM("Total Revenue"), 0) AS "Total Revenue",
+                   COALESCE(SUM("Units Sold"), 0) AS "Units Sold", COUNT("product_id") AS "product_id"
+            FROM {self.source} WHERE {date} IS NOT NULL GROUP BY {date} ORDER BY {date}''', self.params).fetchdf()
+
+    def _select(self, aggregations):
+        selects = []
+        for output, (column, function) in aggregations.items():
+            if function not in AGGREGATIONS:
+                raise ValueError(f"Unsupported aggregation: {function}")
+            if function == 'sum':
+                expression = f'COALESCE(SUM({_quote(column)}), 0)'
+            elif function == 'mean':
+                expression = f'AVG({_quote(column)})'
+            elif function == 'count':
+                expression = f'COUNT({_quote(column)})'
+            else:
+                expression = f"100.0 * SUM(CASE WHEN {_quote(column)} = 'positive' THEN 1 ELSE 0 END) / COUNT(*)"
+            selects.append(f'{expression} AS {_quote(output)}')
+        return ', '.join(selects)
+
+    def group_totals(self, by, aggregations, positive=(), limit=None):
+        having = ' AND '.join(f'{_quote(output)} > 0' for output in positive)
+        sql = (f'SELECT {_quote(by)}, {self._select(aggregations)} FROM {self.source} '
+               f'WHERE {_quote(by)} IS NOT NULL GROUP BY {_quote(by)}')
+        if having:
+            sql = f'SELECT * FROM ({sql}) WHERE {having}'
+        sql += f' ORDER BY {_quote(by)}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return self.store.execute(sql, self.params).fetchdf()
+
+    def group_quantiles(self, by, column, function, quantiles):
+        grouped = (f'SELECT {self._select({column: (column, function)})} FROM {self.source} '
+                   f'WHERE {_quote(by)} IS NOT NULL GROUP BY {_quote(by)}')
+        selects = ', '.join(f'QUANTILE_CONT({_quote(column)}, {float(q)})' for q in quantiles)
+        row = self.store.execute(f'SELECT {selects} FROM ({grouped})', self.params).fetchone()
+        return [np.nan if value is None else value for value in row]
+
+# =============================================================================
+# PARQUET STORE
+# =============================================================================
+
+class ColumnarStore:
+    """Processed dataset kept as Parquet parts on local disk and queried through DuckDB
+
+    Every upload or append adds parts; DuckDB scans them with streaming
+    execution and spills to ``<directory>/tmp`` when a query needs more
+    memory than ``memory_limit``. The DuckDB database itself is in-memory
+    (it only holds a view over the Parquet glob), so several worker
+    processes can open the same directory without fighting over a file lock.
+    """
+
+    def __init__(self, directory=DUCKDB_DIR, memory_limit=DUCKDB_MEMORY_LIMIT):
+        if duckdb is None:
+            raise RuntimeError("duckdb is not installed")
+        self.directory = os.path.abspath(directory)
+        self.dataset_dir = os.path.join(self.directory, 'dataset')
+        os.makedirs(self.dataset_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._connection = duckdb.connect()
+        # One spill directory per process
+        temp_directory = os.path.join(self.directory, 'tmp', str(os.getpid())).replace("'", "''")
+        self._connection.execute(f"SET temp_directory = '{temp_directory}'")
+        if memory_limit:
+            self._connection.execute(f"SET memory_limit = '{memory_limit}'")
+        self._columns = None
+        self._has_view = False
+        self._refresh_view()
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.dataset_dir, 'part-*.parquet')))
+
+    def _refresh_view(self):
+        with self._lock:
+            self._columns = None
+            if self._parts():
+                pattern = os.path.join(self.dataset_dir, 'part-*.parquet').replace("'", "''")
+                self._connection.execute(
+                    f"CREATE OR REPLACE VIEW dataset AS SELECT * FROM read_parquet('{pattern}', union_by_name = true)")
+                self._has_view = True
+            else:
+                self._connection.execute("DROP VIEW IF EXISTS dataset")
+                self._has_view = False
+
+    def execute(self, sql, params=None):
+        """Run a query on a per-call cursor so concurrent requests do not share state"""
+        # Another worker process may have written the first parts or cleared them since the last refresh
+        if self._has_view != self.has_data():
+            self._refresh_view()
+        cursor = self._connection.cursor()
+        return cursor.execute(sql, params or [])
+
+    def has_data(self):
+        return bool(self._parts())
+
+    def columns(self):
+        with self._lock:
+            if self._columns is None:
+                self._columns = [row[0] for row in self.execute('DESCRIBE dataset').fetchall()] if self.has_data() else []
+            return list(self._columns)
+
+    def distinct_values(self, column):
+        if column not in self.columns():
+            return []
+        rows = self.execute(f'SELECT DISTINCT {_quote(column)} FROM dataset WHERE {_quote(column)} IS NOT NULL').fetchall()
+        return [row[0] for row in rows]
+
+    def count(self):
+        return self.execute('SELECT COUNT(*) FROM dataset').fetchone()[0] if self.has_data() else 0
+
+    def filter_values(self):
+        """Available values and row counts per filter dimension (same shape as BitmapIndex.values)"""
+        columns = self.columns()
+        values = {}
+        for dimension, column in DIMENSIONS.items():
+            values[dimension] = {}
+            if column not in columns:
+                continue
+            if dimension == 'rating':
+                rows = self.execute(f'SELECT {_rating_bucket(column)} AS bucket, COUNT(*) FROM dataset '
+                                    f'WHERE bucket IS NOT NULL GROUP BY bucket ORDER BY bucket').fetchall()
+            else:
+                rows = self.execute(f'SELECT MIN(CAST({_quote(column)} AS VARCHAR)), COUNT(*) FROM dataset '
+                                    f'WHERE {_quote(column)} IS NOT NULL '
+                                    f'GROUP BY lower(trim(CAST({_quote(column)} AS VARCHAR))) ORDER BY 1').fetchall()
+            values[dimension] = {str(value): count for value, count in rows}
+        return values
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.dataset_dir, ignore_errors=True)
+            os.makedirs(self.dataset_dir, exist_ok=True)
+            self._refresh_view()
+
+    def write_part(self, frame):
+        """Append a processed chunk as a new Parquet part"""
+        # DuckDB identifiers are case-insensitive: keep mapped copies such as 'date' over raw 'Date'
+        lowered = {}
+        for column in frame.columns:
+            lowered.setdefault(str(column).lower(), []).append(column)
+        frame = frame.drop(columns=[column for names in lowered.values() if len(names) > 1
+                                    for column in names if column != str(column).lower()])
+        for column in frame.columns:
+            if column in NUMERIC_COLUMNS:
+                values = pd.to_numeric(frame[column], errors='coerce')
+                frame[column] = values if pd.api.types.is_integer_dtype(values) else values.astype('float64')
+            elif column == DATE_COLUMN:
+                frame[column] = pd.to_datetime(frame[column], errors='coerce')
+            elif frame[column].dtype == object:
+                frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str))
+        with self._lock:
+            # DuckDB writes the part itself, so pyarrow is not required
+            # The pid keeps parts written by different worker processes apart
+            path = os.path.join(self.dataset_dir, f'part-{len(self._parts()):05d}-{os.getpid()}.parquet')
+            cursor = self._connection.cursor()
+            cursor.register('incoming_part', frame)
+            cursor.execute(f"COPY incoming_part TO '{path}' (FORMAT PARQUET)")
+            cursor.unregister('incoming_part')
+            self._refresh_view()
+        return len(frame)
+
+    def queries(self, filters=None):
+        return DuckDBQueries(self, filters)
+
+    def stats(self):
+        parts = self._parts()
+        return {
+            'backend': 'duckdb',
+            'directory': self.directory,
+            'parts': len(parts),
+            'bytes_on_disk': sum(os.path.getsize(part) for part in parts),
+            'rows': self.count()
+        }
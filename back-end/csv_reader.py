@@ -0,0 +1,145 @@
+"""
+BizEye CSV Reader
+Multithreaded Arrow CSV parsing with encoding and delimiter sniffed once from a sample
+"""
+
+import codecs
+import csv
+import gzip
+import os
+
+import pandas as pd
+
+from monitoring import REGISTRY
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pc = pacsv = None
+
+# 'arrow' parses uploads with pyarrow.csv when it is installed, 'pandas' keeps the single-threaded C parser
+CSV_ENGINE = os.environ.get('BIZEYE_CSV_ENGINE', 'arrow')
+# Bytes read by each Arrow parsing thread; several blocks are parsed in parallel
+BLOCK_SIZE = int(os.environ.get('BIZEYE_CSV_BLOCK_KB', '4096')) * 1024
+# Bytes inspected to guess the encoding and delimiter
+SAMPLE_BYTES = 64 * 1024
+
+DELIMITERS = ',;\t|'
+
+MALFORMED_LINES = REGISTRY.counter(
+    'bizeye_upload_malformed_lines_total', 'Uploaded lines skipped as malformed (CSV field count mismatch or invalid NDJSON)')
+PARSED = REGISTRY.counter(
+    'bizeye_csv_parsed_total', 'CSV files parsed by engine (arrow, or pandas when Arrow is unavailable or fails)',
+    ('engine',))
+
+
+def detect_encoding(sample):
+    """Encoding of a byte sample: BOM first, then strict UTF-8, then cp1252, then latin-1"""
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if sample.startswith(codecs.BOM_UTF8):
+        # Both parsers skip the BOM themselves
+        return 'utf-8'
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            # final=False tolerates a multi-byte character cut off at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def detect_delimiter(text):
+    """Most consistent delimiter across the complete lines of a text sample (comma when unsure)"""
+    lines = text[:text.rfind('\n')] if '\n' in text else text
+    try:
+        return csv.Sniffer().sniff(lines, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
+def open_decompressed(filepath):
+    """Binary stream of a file, decompressed on the fly when it ends in a compression suffix (.gz, .zst, ...)"""
+    if pa is not None:
+        return pa.input_stream(filepath, compression='detect')
+    if filepath.endswith('.gz'):
+        return gzip.open(filepath, 'rb')
+    if filepath.endswith('.zst'):
+        # Reading the raw bytes would parse the compressed stream as garbage rows
+        raise RuntimeError("zstd uploads require pyarrow")
+    return open(filepath, 'rb')
+
+
+def sniff_sample(sample):
+    """(encoding, delimiter) guessed from the first bytes of a CSV file"""
+    encoding = detect_encoding(sample)
+    return encoding, detect_delimiter(sample.decode(encoding, errors='replace'))
+
+
+def sniff_csv(filepath, sample_bytes=SAMPLE_BYTES):
+    """(encoding, delimiter) of a CSV file, guessed from its first ``sample_bytes`` (after decompression)"""
+    with open_decompressed(filepath) as csv_file:
+        return sniff_sample(csv_file.read(sample_bytes))
+
+
+def text_temporal_columns(table):
+    """Date and timestamp columns of an Arrow table as ISO text, like the pandas CSV parser leaves them"""
+    for index, field in enumerate(table.schema):
+        column = table.column(index)
+        if pa.types.is_date(field.type):
+            table = table.set_column(index, field.name, column.cast(pa.string()))
+        elif pa.types.is_timestamp(field.type):
+            # Dates without a time of day stay dates
+            midnight = pc.all(pc.equal(pc.floor_temporal(column, unit='day'), column)).as_py() is not False
+            text = pc.strftime(column, format='%Y-%m-%d' if midnight else '%Y-%m-%dT%H:%M:%S')
+            table = table.set_column(index, field.name, text)
+    return table
+
+
+def _read_arrow(filepath, encoding, delimiter):
+    malformed = []
+
+    def skip_malformed(row):
+        malformed.append(row.number)
+        return 'skip'
+
+    table = pacsv.read_csv(
+        filepath,
+        read_options=pacsv.ReadOptions(encoding=encoding, use_threads=True, block_size=BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(delimiter=delimiter, newlines_in_values=True,
+                                         invalid_row_handler=skip_malformed),
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+    return text_temporal_columns(table).to_pandas(), len(malformed)
+
+
+def _read_pandas(filepath, encoding, delimiter):
+    # Counting skipped lines needs a callable on_bad_lines, which only the slow python engine supports
+    with open_decompressed(filepath) as csv_file:
+        return pd.read_csv(csv_file, sep=delimiter, encoding=encoding, encoding_errors='replace', on_bad_lines='skip')
+
+
+def read_csv(filepath, engine=CSV_ENGINE):
+    """Parse a CSV file in one pass; returns (frame, malformed lines skipped or None when not counted)
+
+    Files ending in .gz or .zst are decompressed while they are parsed. The
+    encoding and delimiter are sniffed once instead of re-reading the file
+    after each failed attempt. Malformed lines are skipped while parsing.
+    Arrow infers int, float and bool columns directly and parses blocks on
+    several threads. It fixes each column's type from the first block, so a
+    file whose later rows contradict that type is re-read with pandas.
+    """
+    encoding, delimiter = sniff_csv(filepath)
+    if engine == 'arrow' and pacsv is not None:
+        try:
+            data, malformed = _read_arrow(filepath, encoding, delimiter)
+            MALFORMED_LINES.inc(malformed)
+            PARSED.inc(engine='arrow')
+            return data, malformed
+        except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+            print(f"Arrow CSV parse failed, reading with pandas instead: {e}")
+    data = _read_pandas(filepath, encoding, delimiter)
+    PARSED.inc(engine='pandas')
+    return data, None
@@ -0,0 +1,121 @@
+"""
+BizEye Data Export
+Streams the processed dataset chunk by chunk as CSV, NDJSON or Parquet
+"""
+
+import io
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Rows serialized per chunk; memory use is bounded by one chunk regardless of the export size
+EXPORT_CHUNK_ROWS = int(os.environ.get('BIZEYE_EXPORT_CHUNK_ROWS', '10000'))
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def frame_chunks(data, positions=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Slices of an in-memory frame (optionally only the given row positions) without copying the whole selection"""
+    total = len(data) if positions is None else len(positions)
+    if total == 0:
+        # Still yield the columns so an empty export has a header or schema
+        yield data.iloc[0:0]
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            yield data.iloc[start:start + chunk_rows]
+        else:
+            yield data.take(positions[start:start + chunk_rows])
+
+
+def _text_dates(chunk):
+    """Datetime columns as ISO dates (or timestamps when they carry a time of day)"""
+    for column in chunk.columns:
+        if pd.api.types.is_datetime64_any_dtype(chunk[column]):
+            values = chunk[column]
+            has_time = (values.dropna() != values.dropna().dt.normalize()).any()
+            chunk[column] = values.dt.strftime('%Y-%m-%dT%H:%M:%S' if has_time else '%Y-%m-%d')
+    return chunk
+
+
+def _csv_stream(chunks):
+    header = True
+    for chunk in chunks:
+        yield _text_dates(chunk).to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+def _ndjson_stream(chunks):
+    for chunk in chunks:
+        if len(chunk):
+            yield _text_dates(chunk).to_json(orient='records', lines=True, force_ascii=False).encode('utf-8') + b'\n'
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only sink whose contents are handed out after every Parquet row group"""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_table(chunk, schema=None):
+    chunk = chunk.copy(deep=False)
+    for column in chunk.columns:
+        if chunk[column].dtype == object:
+            # One Arrow type per column: mixed object columns are written as text
+            chunk[column] = chunk[column].where(chunk[column].isna(), chunk[column].astype(str))
+    if schema is None:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        # Columns that are empty in the first chunk would otherwise be typed null for the whole file
+        fields = [pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in table.schema]
+        return table.cast(pa.schema(fields))
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _parquet_stream(chunks):
+    sink = _ChunkBuffer()
+    writer = None
+    for chunk in chunks:
+        table = _arrow_table(chunk, writer.schema if writer is not None else None)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression='zstd')
+        # Every chunk becomes one row group and is flushed to the client
+        writer.write_table(table)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def stream_export(chunks, fmt):
+    """Bytes of the chunks serialized in an export format (one of ``EXPORT_FORMATS``)"""
+    if fmt == 'csv':
+        return _csv_stream(chunks)
+    if fmt == 'ndjson':
+        return _ndjson_stream(chunks)
+    if fmt == 'parquet':
+        if pq is None:
+            raise RuntimeError("pyarrow is not installed")
+        return _parquet_stream(chunks)
+    raise ValueError(f"Unsupported export format: {fmt}")
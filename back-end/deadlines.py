@@ -0,0 +1,82 @@
+"""
+BizEye Deadlines
+Per-request time budgets and the generation latency estimates used to decide whether a model call still fits
+"""
+
+import os
+import threading
+import time
+
+from monitoring import REGISTRY
+
+# Time budget of one request; model calls that would overrun it fall back to templates (0 disables)
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('BIZEYE_REQUEST_DEADLINE_MS', '15000')) / 1000.0
+# Budget kept in reserve for the rest of the request after a model call
+GENERATION_RESERVE_SECONDS = float(os.environ.get('BIZEYE_GENERATION_RESERVE_MS', '250')) / 1000.0
+# Latency estimates halve every this long without a new observation, so skipped calls are retried eventually
+LATENCY_HALF_LIFE_SECONDS = float(os.environ.get('BIZEYE_LATENCY_HALF_LIFE_MS', '60000')) / 1000.0
+
+DEGRADED = REGISTRY.counter(
+    'bizeye_generation_degraded_total', 'Generations replaced by a template fallback because of the request deadline (skipped or timeout)',
+    ('reason',))
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of running (or waiting for) a model call that does not fit the remaining budget"""
+
+    def __init__(self, reason, remaining, call='generation'):
+        outcome = 'timed out' if reason == 'timeout' else reason
+        super().__init__(f"{call} {outcome} with {max(remaining, 0.0) * 1000:.0f} ms of the request budget left")
+        self.reason = reason
+        DEGRADED.inc(reason=reason)
+
+
+class Deadline:
+    """Point in time by which a request should have its response ready"""
+
+    def __init__(self, budget_seconds=REQUEST_DEADLINE_SECONDS):
+        self.expires_at = time.monotonic() + budget_seconds if budget_seconds > 0 else None
+
+    def remaining(self):
+        if self.expires_at is None:
+            return float('inf')
+        return self.expires_at - time.monotonic()
+
+
+class LatencyEstimate:
+    """Moving average of observed call durations per key (e.g. the generation max_length)
+
+    Calls skipped because of the estimate are never observed, so the estimate
+    decays with ``half_life`` seconds since the last observation. One slow or
+    cold call therefore only skips calls until the estimate fits the budget
+    again and the next call that runs re-measures the latency.
+    """
+
+    def __init__(self, smoothing=0.2, half_life=LATENCY_HALF_LIFE_SECONDS):
+        self.smoothing = smoothing
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._seconds = {}                  # key -> (average seconds, monotonic time observed)
+
+    def _decayed(self, key, now):
+        seconds, observed_at = self._seconds[key]
+        if self.half_life <= 0:
+            return seconds
+        return seconds * 0.5 ** ((now - observed_at) / self.half_life)
+
+    def estimate(self, key):
+        """Expected duration in seconds; 0 until the first call has been observed"""
+        with self._lock:
+            return self._decayed(key, time.monotonic()) if key in self._seconds else 0.0
+
+    def observe(self, key, seconds):
+        now = time.monotonic()
+        with self._lock:
+            if key in self._seconds:
+                seconds = (1 - self.smoothing) * self._decayed(key, now) + self.smoothing * seconds
+            self._seconds[key] = (seconds, now)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {str(key): round(self._decayed(key, now), 4) for key in self._seconds}
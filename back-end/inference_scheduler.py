@@ -0,0 +1,125 @@
+"""
+BizEye Inference Scheduler
+Dynamic micro-batching of model calls shared across concurrent requests
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from monitoring import REGISTRY, BATCH_BUCKETS
+
+# Scheduler configuration
+BATCHING_ENABLED = os.environ.get('BIZEYE_INFERENCE_BATCHING', '1') == '1'
+MAX_BATCH_SIZE = int(os.environ.get('BIZEYE_INFERENCE_MAX_BATCH_SIZE', '32'))
+MAX_WAIT_MS = float(os.environ.get('BIZEYE_INFERENCE_MAX_WAIT_MS', '5'))
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    'bizeye_inference_queue_depth', 'Texts waiting in the inference queue',
+    ('scheduler',))
+BATCH_SIZE = REGISTRY.histogram(
+    'bizeye_inference_batch_size', 'Texts grouped into one forward pass by the scheduler',
+    ('scheduler',), buckets=BATCH_BUCKETS)
+QUEUE_WAIT = REGISTRY.histogram(
+    'bizeye_inference_queue_wait_seconds', 'Time a text waited before its batch started',
+    ('scheduler',))
+
+
+class InferenceScheduler:
+    """Groups texts submitted by concurrent callers into batched model calls
+
+    Callers enqueue items and block on futures. A single dispatcher thread
+    takes whatever arrives within ``max_wait_ms`` of the first item (up to
+    ``max_batch_size``), runs ``batch_fn`` once on the whole batch and routes
+    each result back to the caller that submitted it.
+    """
+
+    def __init__(self, name, batch_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch_loop, name=f'bizeye-{self.name}-scheduler',
+                                                daemon=True)
+                self._thread.start()
+
+    def submit(self, items):
+        """Enqueue items and return one future per item"""
+        self._ensure_dispatcher()
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, time.perf_counter()))
+            futures.append(future)
+        QUEUE_DEPTH.set(self._queue.qsize(), scheduler=self.name)
+        return futures
+
+    def run(self, items, timeout=None):
+        """Submit items and wait for their results in order"""
+        return [future.result(timeout=timeout) for future in self.submit(items)]
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Drain anything already queued without waiting
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            QUEUE_DEPTH.set(self._queue.qsize(), scheduler=self.name)
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                QUEUE_WAIT.observe(started - enqueued, scheduler=self.name)
+            BATCH_SIZE.observe(len(batch), scheduler=self.name)
+
+            # Skip items whose callers already gave up
+            live = [(item, future) for item, future, _ in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            self._run_batch(live)
+
+    def _run_batch(self, live):
+        items = [item for item, _ in live]
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} inputs")
+        except Exception as e:
+            if len(live) == 1:
+                live[0][1].set_exception(e)
+                return
+            # Isolate the failing item so one bad text does not fail the whole batch
+            print(f"⚠️  Batched {self.name} inference failed, retrying items individually: {e}")
+            for item, future in live:
+                try:
+                    future.set_result(self.batch_fn([item])[0])
+                except Exception as item_error:
+                    future.set_exception(item_error)
+            return
+
+        for (_, future), result in zip(live, results):
+            future.set_result(result)
@@ -0,0 +1,353 @@
+"""
+BizEye Inference Worker
+Standalone process that owns the sentiment and Flan-T5 models for all web workers
+
+Usage:
+    python inference_worker.py supervise --socket /tmp/bizeye-inference.sock
+    python inference_worker.py serve --socket /tmp/bizeye-inference.sock
+    python inference_worker.py health --socket /tmp/bizeye-inference.sock
+
+Web workers started with BIZEYE_INFERENCE_SOCKET pointing at the same socket
+skip loading the models and send their (already micro-batched) requests here.
+"""
+
+import argparse
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from token_batching import TokenBatcher, MAX_SEQUENCE_LENGTH
+
+DEFAULT_SOCKET = os.environ.get('BIZEYE_INFERENCE_SOCKET') or '/tmp/bizeye-inference.sock'
+# Shared secret for the connection handshake; when unset the worker writes a random key next to its socket
+AUTHKEY = os.environ.get('BIZEYE_INFERENCE_AUTHKEY', '').encode() or None
+# Seconds a web worker waits for a reply before treating the worker as down
+REQUEST_TIMEOUT = float(os.environ.get('BIZEYE_INFERENCE_TIMEOUT', '120'))
+
+SENTIMENT_TASK = "sentiment-analysis"
+GENERATIVE_MODEL_NAME = "google/flan-t5-small"
+# Decoding settings shared by in-process and worker generation
+GENERATION_KWARGS = {
+    'num_beams': 2,
+    'early_stopping': True,
+    'temperature': 0.3,
+    'do_sample': False,
+    'repetition_penalty': 1.2
+}
+
+# =============================================================================
+# MODEL HOST (runs inside the worker process)
+# =============================================================================
+
+class ModelHost:
+    """Loads the models once and batches requests from every connected web worker"""
+
+    def __init__(self):
+        from transformers import pipeline
+        from inference_scheduler import InferenceScheduler
+
+        print("Loading sentiment analysis pipeline...")
+        self.sentiment_pipeline = pipeline(SENTIMENT_TASK)
+        self.sentiment_batcher = TokenBatcher.from_pipeline('worker-sentiment', self.sentiment_pipeline)
+
+        try:
+            from transformers import T5ForConditionalGeneration, T5Tokenizer
+            import torch
+            print("Loading Flan-T5-small generative recommendation model...")
+            self.torch = torch
+            self.generative_model = T5ForConditionalGeneration.from_pretrained(GENERATIVE_MODEL_NAME).to('cpu')
+            self.generative_model.eval()
+            self.generative_tokenizer = T5Tokenizer.from_pretrained(GENERATIVE_MODEL_NAME)
+        except Exception as e:
+            print(f"⚠️  Could not load Flan-T5-small model: {e}")
+            self.generative_model = None
+            self.generative_tokenizer = None
+
+        self.sentiment_scheduler = InferenceScheduler('worker-sentiment', self._sentiment_batch)
+        self.generation_scheduler = InferenceScheduler('worker-flan-t5-small', self._generate_batch)
+        self.started = time.time()
+        self.requests = 0
+
+    def _sentiment_batch(self, texts):
+        if self.sentiment_batcher is not None:
+            return self.sentiment_batcher(texts)
+        return self.sentiment_pipeline(list(texts), batch_size=len(texts), truncation=True,
+                                       max_length=MAX_SEQUENCE_LENGTH)
+
+    def _generate_batch(self, requests_batch):
+        outputs_by_index = {}
+        for max_length in sorted({max_length for _, max_length in requests_batch}):
+            indices = [idx for idx, (_, length) in enumerate(requests_batch) if length == max_length]
+            prompts = [requests_batch[idx][0] for idx in indices]
+            inputs = self.generative_tokenizer(prompts, return_tensors="pt", max_length=512, truncation=True,
+                                               padding=True)
+            with self.torch.no_grad():
+                outputs = self.generative_model.generate(inputs.input_ids, attention_mask=inputs.attention_mask,
+                                                         max_length=max_length, **GENERATION_KWARGS)
+            for idx, output in zip(indices, outputs):
+                outputs_by_index[idx] = self.generative_tokenizer.decode(output, skip_special_tokens=True)
+        return [outputs_by_index[idx] for idx in range(len(requests_batch))]
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'models': {
+                'sentiment': self.sentiment_pipeline is not None,
+                'generation': self.generative_model is not None
+            },
+            'token_batching': self.sentiment_batcher.stats() if self.sentiment_batcher is not None else None
+        }
+
+    def handle(self, message):
+        """Dispatch one request message and build the reply"""
+        op = message.get('op')
+        self.requests += 1
+        if op == 'health':
+            return {'ok': True, 'result': self.health()}
+        if op == 'sentiment':
+            return {'ok': True, 'result': self.sentiment_scheduler.run(message['texts'])}
+        if op == 'generate':
+            if self.generative_model is None:
+                return {'ok': False, 'error': 'Generative model not loaded'}
+            return {'ok': True, 'result': self.generation_scheduler.run(message['items'])}
+        return {'ok': False, 'error': f'Unknown operation: {op}'}
+
+
+def authkey_path(address):
+    return address + '.key'
+
+
+def load_authkey(address, create=False):
+    """BIZEYE_INFERENCE_AUTHKEY, or the key file next to the socket (written with mode 0600 when ``create`` is set)
+
+    Connections carry pickles, so they must never be accepted with a guessable key.
+    """
+    if AUTHKEY:
+        return AUTHKEY
+    path = authkey_path(address)
+    if create:
+        try:
+            descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(descriptor, 'w') as key_file:
+                key_file.write(secrets.token_hex(32))
+        except FileExistsError:
+            pass
+    try:
+        with open(path) as key_file:
+            key = key_file.read().strip()
+    except FileNotFoundError:
+        raise InferenceWorkerError(f"No authkey: set BIZEYE_INFERENCE_AUTHKEY or start the worker to create {path}")
+    if not key:
+        raise InferenceWorkerError(f"Empty authkey file {path}")
+    return key.encode()
+
+
+def _serve_connection(host, connection):
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                reply = host.handle(message)
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            connection.send(reply)
+    finally:
+        connection.close()
+
+
+def _socket_in_use(address):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(address)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def serve(address=DEFAULT_SOCKET):
+    """Load the models and serve inference requests on a Unix socket"""
+    if os.path.exists(address):
+        if _socket_in_use(address):
+            raise RuntimeError(f"Another inference worker is already listening on {address}")
+        os.unlink(address)  # Stale socket from a crashed worker
+
+    authkey = load_authkey(address, create=True)
+    host = ModelHost()
+    # Create the socket without world access instead of tightening it after it is already reachable
+    previous_umask = os.umask(0o117)
+    try:
+        listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    finally:
+        os.umask(previous_umask)
+    os.chmod(address, 0o660)
+    print(f"✅ Inference worker {os.getpid()} listening on {address}")
+    try:
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception as e:
+                # Failed handshakes (wrong authkey, dropped clients) must not stop the worker
+                print(f"⚠️  Rejected inference connection: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(host, connection), daemon=True).start()
+    finally:
+        listener.close()
+
+# =============================================================================
+# CLIENT (used by web workers)
+# =============================================================================
+
+class InferenceWorkerError(RuntimeError):
+    """Raised when the inference worker is unreachable or returns an error"""
+
+
+class InferenceClient:
+    """Thread-safe client keeping one connection per calling thread"""
+
+    def __init__(self, address=DEFAULT_SOCKET, authkey=None, timeout=REQUEST_TIMEOUT):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+        self._health = None
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # The key file may only appear once the worker has started
+            authkey = self.authkey or load_authkey(self.address)
+            try:
+                connection = Client(self.address, family='AF_UNIX', authkey=authkey)
+            except (OSError, EOFError) as e:
+                raise InferenceWorkerError(f"Inference worker unavailable at {self.address}: {e}")
+            self._local.connection = connection
+        return connection
+
+    def _reset(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def call(self, message, timeout=None):
+        """Send one request, reconnecting once if the worker was restarted"""
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send(message)
+                if not connection.poll(timeout):
+                    self._reset()
+                    raise InferenceWorkerError(f"Inference worker timed out after {timeout}s")
+                reply = connection.recv()
+                break
+            except (OSError, EOFError) as e:
+                self._reset()
+                if attempt == 1:
+                    raise InferenceWorkerError(f"Inference worker connection failed: {e}")
+        if not reply.get('ok'):
+            raise InferenceWorkerError(reply.get('error', 'Unknown inference worker error'))
+        return reply['result']
+
+    def sentiment(self, texts):
+        """Raw pipeline results ({'label', 'score'}) for each text"""
+        return self.call({'op': 'sentiment', 'texts': list(texts)})
+
+    def generate(self, items):
+        """Decoded generations for (prompt, max_length) pairs"""
+        return self.call({'op': 'generate', 'items': list(items)})
+
+    def health(self, timeout=5):
+        self._health = self.call({'op': 'health'}, timeout=timeout)
+        return self._health
+
+    def generation_available(self):
+        """Whether the worker has the generative model loaded (cached after the first check)"""
+        if self._health is None:
+            try:
+                self.health()
+            except InferenceWorkerError:
+                return False
+        return bool(self._health.get('models', {}).get('generation'))
+
+# =============================================================================
+# SUPERVISOR
+# =============================================================================
+
+def supervise(address=DEFAULT_SOCKET, check_interval=10.0, startup_grace=300.0, max_failures=3):
+    """Run the worker as a child process, restarting it when it exits or stops answering"""
+    client = InferenceClient(address, timeout=5)
+    backoff = 1.0
+
+    while True:
+        started = time.time()
+        worker = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', '--socket', address])
+        print(f"🚀 Started inference worker pid={worker.pid}")
+        failures = 0
+        healthy_once = False
+
+        while worker.poll() is None:
+            time.sleep(check_interval)
+            if worker.poll() is not None:
+                break
+            try:
+                client.health()
+                failures = 0
+                healthy_once = True
+                backoff = 1.0
+            except InferenceWorkerError as e:
+                # Model loading can take minutes on first start
+                if not healthy_once and time.time() - started < startup_grace:
+                    continue
+                failures += 1
+                print(f"⚠️  Inference worker health check failed ({failures}/{max_failures}): {e}")
+                if failures >= max_failures:
+                    print(f"🛑 Restarting unresponsive inference worker pid={worker.pid}")
+                    worker.kill()
+                    worker.wait()
+                    break
+
+        print(f"⚠️  Inference worker exited with code {worker.returncode}; restarting in {backoff:.0f}s")
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 60.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BizEye shared inference worker')
+    parser.add_argument('command', choices=['serve', 'supervise', 'health'])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path')
+    parser.add_argument('--check-interval', type=float, default=10.0, help='Seconds between health checks')
+    parser.add_argument('--startup-grace', type=float, default=300.0, help='Seconds allowed for model loading')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.socket)
+    elif args.command == 'supervise':
+        supervise(args.socket, args.check_interval, args.startup_grace)
+    else:
+        try:
+            print(InferenceClient(args.socket).health())
+        except InferenceWorkerError as e:
+            print(f"❌ {e}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
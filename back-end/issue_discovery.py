@@ -0,0 +1,248 @@
+"""
+BizEye Issue Discovery
+Clusters negative/neutral reviews with hashed TF-IDF and mini-batch k-means
+"""
+
+import copy
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+# Engine configuration
+N_CLUSTERS = int(os.environ.get('BIZEYE_ISSUE_CLUSTERS', '8'))
+N_FEATURES = 2 ** 18
+BATCH_SIZE = 1024
+TOP_TERMS = 5
+SAMPLE_REVIEWS = 3
+
+# Reviews with these sentiments are treated as potential issues
+ISSUE_SENTIMENTS = ('negative', 'neutral')
+
+
+def _clean_texts(texts):
+    values = pd.Series(texts, dtype=object).dropna().astype(str)
+    return values[values.str.strip() != ''].tolist()
+
+
+class IssueDiscoveryEngine:
+    """Incremental issue discovery over review texts
+
+    Texts are hashed into a fixed feature space so new vocabulary never
+    requires refitting the vectorizer. Document frequencies are updated as
+    texts arrive and each new batch refines the existing centroids through
+    ``MiniBatchKMeans.partial_fit``. Identical texts are vectorized once and
+    weighted by how many rows share them.
+    """
+
+    def __init__(self, n_clusters=N_CLUSTERS, n_features=N_FEATURES, batch_size=BATCH_SIZE,
+                 top_terms=TOP_TERMS, random_state=42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.top_terms = top_terms
+        self.random_state = random_state
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), stop_words='english',
+                                            alternate_sign=False, norm=None)
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._lock = threading.RLock()
+        self._text_ids = {}                         # review text -> row in the count matrix
+        self._weights = []                          # rows sharing each distinct text
+        self._counts = sparse.csr_matrix((0, n_features), dtype=np.float64)
+        self._document_frequency = np.zeros(n_features, dtype=np.float64)
+        self._documents = 0.0
+        self._feature_terms = {}                    # hashed feature -> term
+        self._names = None                          # issue label per cluster, derived from the centroids
+        self.model = None
+
+    def _record_terms(self, texts):
+        n_features = self.vectorizer.n_features
+        for text in texts:
+            for term in self._analyzer(text):
+                # Same hashing as HashingVectorizer so centroid features map back to terms
+                feature = abs(murmurhash3_32(term, seed=0)) % n_features
+                self._feature_terms.setdefault(feature, term)
+
+    def _tfidf(self, counts):
+        idf = np.log((1.0 + self._documents) / (1.0 + self._document_frequency)) + 1.0
+        return normalize(counts.multiply(idf).tocsr())
+
+    def partial_fit(self, texts):
+        """Add review texts and update the clusters; returns the number of new distinct texts"""
+        values = pd.Series(texts, dtype=object).dropna().astype(str)
+        values = values[values.str.strip() != '']
+        if len(values) == 0:
+            return 0
+        frequencies = values.value_counts(sort=False)
+
+        with self._lock:
+            new_texts = [text for text in frequencies.index if text not in self._text_ids]
+            for text in frequencies.index:
+                if text in self._text_ids:
+                    self._weights[self._text_ids[text]] += int(frequencies[text])
+
+            if new_texts:
+                for text in new_texts:
+                    self._text_ids[text] = len(self._weights)
+                    self._weights.append(int(frequencies[text]))
+                self._counts = sparse.vstack([self._counts, self.vectorizer.transform(new_texts)]).tocsr()
+                self._record_terms(new_texts)
+
+            # Document frequencies count rows, not distinct texts
+            rows = np.array([self._text_ids[text] for text in frequencies.index])
+            self._document_frequency += np.asarray((self._counts[rows] > 0).T.dot(frequencies.values)).ravel()
+            self._documents += float(frequencies.sum())
+
+            self._names = None
+            distinct = len(self._weights)
+            if self.model is None or (self.model.n_clusters < self.n_clusters and distinct > self.model.n_clusters):
+                # (Re)start once there are enough distinct texts for the configured cluster count
+                self.model = MiniBatchKMeans(n_clusters=min(self.n_clusters, distinct), batch_size=self.batch_size,
+                                             random_state=self.random_state, n_init=3)
+                self._fit_rows(np.arange(distinct))
+            elif new_texts:
+                self._fit_rows(np.arange(distinct - len(new_texts), distinct))
+            return len(new_texts)
+
+    def copy(self):
+        """Independent copy that can be extended while readers keep using this engine"""
+        with self._lock:
+            clone = copy.copy(self)
+            clone._lock = threading.RLock()
+            clone._text_ids = dict(self._text_ids)
+            clone._weights = list(self._weights)
+            clone._document_frequency = self._document_frequency.copy()
+            clone._feature_terms = dict(self._feature_terms)
+            clone.model = copy.deepcopy(self.model)
+        return clone
+
+    def _fit_rows(self, rows):
+        weights = np.asarray(self._weights, dtype=np.float64)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            self.model.partial_fit(self._tfidf(self._counts[batch]), sample_weight=weights[batch])
+
+    def _cluster_terms(self, centroid):
+        terms, words = [], set()
+        for feature in np.argsort(centroid)[::-1]:
+            if centroid[feature] <= 0 or len(terms) >= self.top_terms:
+                break
+            term = self._feature_terms.get(int(feature))
+            # Skip bigrams whose words are already part of the label
+            if term is not None and not set(term.split()) <= words:
+                terms.append(term)
+                words.update(term.split())
+        return terms
+
+    def fit_stream(self, read_chunks):
+        """Fit the clusters over review text chunks without keeping any per-text state
+
+        ``read_chunks()`` returns an iterable of text chunks and is called
+        twice: once to count document frequencies, once to fit the centroids.
+        Memory is bounded by the feature space and vocabulary, not the number
+        of reviews. Only ``label_texts`` is available afterwards; ``summarize``
+        needs the texts that ``partial_fit`` keeps.
+        """
+        with self._lock:
+            for texts in read_chunks():
+                counts = self.vectorizer.transform(_clean_texts(texts))
+                self._document_frequency += np.asarray((counts > 0).sum(axis=0)).ravel()
+                self._documents += counts.shape[0]
+            if self._documents == 0:
+                return
+            self.model = MiniBatchKMeans(n_clusters=int(min(self.n_clusters, self._documents)), batch_size=self.batch_size,
+                                         random_state=self.random_state, n_init=3)
+            self._names = None
+
+            # The first partial_fit needs at least one sample per cluster
+            pending = []
+            for texts in read_chunks():
+                texts = _clean_texts(texts)
+                self._record_terms(set(texts))
+                pending.extend(texts)
+                while len(pending) >= max(self.batch_size, self.model.n_clusters):
+                    self.model.partial_fit(self._tfidf(self.vectorizer.transform(pending[:self.batch_size])))
+                    del pending[:self.batch_size]
+            if pending and (hasattr(self.model, 'cluster_centers_') or len(pending) >= self.model.n_clusters):
+                self.model.partial_fit(self._tfidf(self.vectorizer.transform(pending)))
+
+    def _cluster_names(self):
+        if self._names is None:
+            self._names = [', '.join(terms) if terms else 'miscellaneous'
+                           for terms in map(self._cluster_terms, self.model.cluster_centers_)]
+        return self._names
+
+    def label_texts(self, texts):
+        """Issue label of the nearest cluster for each text (None for empty texts or before fitting)"""
+        values = pd.Series(texts, dtype=object)
+        labels = pd.Series(None, index=values.index, dtype=object)
+        present = values.notna() & (values.astype(str).str.strip() != '')
+        with self._lock:
+            if self.model is None or not hasattr(self.model, 'cluster_centers_') or not present.any():
+                return labels
+            clusters = self.model.predict(self._tfidf(self.vectorizer.transform(values[present].astype(str))))
+            names = self._cluster_names()
+        labels[present] = [names[cluster] for cluster in clusters]
+        return labels
+
+    def summarize(self, reviews):
+        """Describe every discovered issue cluster for a frame of issue reviews
+
+        ``reviews`` needs a ``review`` column; ``product_category`` and
+        ``sentiment`` are used for breakdowns when present.
+        """
+        with self._lock:
+            if self.model is None or not hasattr(self.model, 'cluster_centers_'):
+                return []
+            texts = list(self._text_ids)
+            vectors = self._tfidf(self._counts)
+            distances = self.model.transform(vectors)
+            labels = distances.argmin(axis=1)
+            distances = distances[np.arange(len(labels)), labels]
+            centroids = self.model.cluster_centers_.copy()
+
+        text_clusters = dict(zip(texts, labels))
+        rows = reviews.dropna(subset=['review']).copy()
+        rows['issue_cluster'] = rows['review'].astype(str).map(text_clusters)
+        rows = rows.dropna(subset=['issue_cluster'])
+        if len(rows) == 0:
+            return []
+        rows['issue_cluster'] = rows['issue_cluster'].astype(int)
+
+        issues = []
+        for cluster, members in rows.groupby('issue_cluster'):
+            cluster_texts = np.flatnonzero(labels == cluster)
+            # Texts closest to the centroid represent the cluster
+            closest = cluster_texts[np.argsort(distances[cluster_texts])[:SAMPLE_REVIEWS]]
+            terms = self._cluster_terms(centroids[cluster])
+            issue = {
+                'cluster_id': int(cluster),
+                'label': ', '.join(terms) if terms else 'miscellaneous',
+                'top_terms': terms,
+                'review_count': int(len(members)),
+                'distinct_reviews': len(cluster_texts),
+                'percentage': round(len(members) / len(rows) * 100, 2),
+                'representative_review': texts[closest[0]],
+                'sample_reviews': [texts[idx] for idx in closest]
+            }
+            if 'product_category' in members.columns:
+                issue['categories'] = {str(k): int(v) for k, v in members['product_category'].value_counts().head(5).items()}
+            if 'sentiment' in members.columns:
+                issue['sentiment_breakdown'] = {str(k): int(v) for k, v in members['sentiment'].value_counts().items()}
+            issues.append(issue)
+
+        issues.sort(key=lambda issue: issue['review_count'], reverse=True)
+        return issues
+
+    def stats(self):
+        with self._lock:
+            return {
+                'distinct_reviews': len(self._weights),
+                'reviews': int(self._documents),
+                'clusters': self.model.n_clusters if self.model is not None else 0
+            }
@@ -0,0 +1,259 @@
+"""
+BizEye Monitoring
+Lightweight in-process metrics registry rendered in Prometheus text format
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds (dashboard calls range from ms to minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Buckets for response sizes in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# Buckets for model batch sizes
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class holding one value series per label combination"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, labelvalues, extra_labels, value) tuples"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        for suffix, labelvalues, extra, value in self.samples():
+            labels = _format_labels(self.labelnames, labelvalues, extra)
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def items(self):
+        """Snapshot of (labels dict, value) pairs"""
+        with self._lock:
+            series = list(self._series.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in series]
+
+    def samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            yield '', key, None, value
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            yield '', key, None, value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][idx] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def snapshot(self, **labels):
+        """Return count and sum for one label combination"""
+        with self._lock:
+            state = self._series.get(self._key(labels))
+            return {'count': state['count'], 'sum': state['sum']} if state else {'count': 0, 'sum': 0.0}
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self._series.items())
+        for key, state in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                yield '_bucket', key, [('le', _format_value(bound))], cumulative
+            yield '_bucket', key, [('le', '+Inf')], state['count']
+            yield '_sum', key, None, state['sum']
+            yield '_count', key, None, state['count']
+
+
+class MetricsRegistry:
+    """Collection of metrics exposed through the /api/metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric_class, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_class):
+                    raise ValueError(f"Metric {name} already registered as {existing.metric_type}")
+                return existing
+            metric = metric_class(name, documentation, labelnames, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Render every registered metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# =============================================================================
+# HTTP REQUEST METRICS
+# =============================================================================
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'bizeye_http_requests_total', 'Total HTTP requests by endpoint, method and status',
+    ('endpoint', 'method', 'status'))
+HTTP_ERRORS = REGISTRY.counter(
+    'bizeye_http_request_errors_total', 'HTTP requests that returned a 5xx status or raised',
+    ('endpoint', 'method'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'bizeye_http_request_duration_seconds', 'Wall-clock request latency',
+    ('endpoint', 'method'))
+HTTP_CPU_SECONDS = REGISTRY.counter(
+    'bizeye_http_request_cpu_seconds_total', 'CPU time spent by the request thread',
+    ('endpoint',))
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    'bizeye_http_response_bytes', 'Response body size in bytes',
+    ('endpoint',), buckets=SIZE_BUCKETS)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    'bizeye_http_requests_in_flight', 'Requests currently being processed')
+
+# =============================================================================
+# MODEL METRICS
+# =============================================================================
+
+MODEL_INVOCATIONS = REGISTRY.counter(
+    'bizeye_model_invocations_total', 'Forward passes issued to a model',
+    ('model',))
+MODEL_ITEMS = REGISTRY.counter(
+    'bizeye_model_items_total', 'Texts processed by a model across all batches',
+    ('model',))
+MODEL_ERRORS = REGISTRY.counter(
+    'bizeye_model_errors_total', 'Model calls that raised an exception',
+    ('model',))
+MODEL_SECONDS = REGISTRY.counter(
+    'bizeye_model_seconds_total', 'Wall-clock seconds spent inside model calls',
+    ('model',))
+MODEL_BATCH_SIZE = REGISTRY.histogram(
+    'bizeye_model_batch_size', 'Number of texts per model call',
+    ('model',), buckets=BATCH_BUCKETS)
+
+
+@contextmanager
+def track_model_call(model, batch_size=1):
+    """Record invocation count, batch size, errors and time spent for a model call"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        MODEL_ERRORS.inc(model=model)
+        raise
+    finally:
+        MODEL_INVOCATIONS.inc(model=model)
+        MODEL_ITEMS.inc(batch_size, model=model)
+        MODEL_BATCH_SIZE.observe(batch_size, model=model)
+        MODEL_SECONDS.inc(time.perf_counter() - start, model=model)
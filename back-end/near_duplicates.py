@@ -0,0 +1,242 @@
+"""
+BizEye Near-Duplicate Review Index
+MinHash / LSH clustering of review texts so model work scales with distinct content
+"""
+
+import copy
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Estimated Jaccard similarity above which two reviews share a cluster
+DEFAULT_THRESHOLD = float(os.environ.get('BIZEYE_NEAR_DUPLICATE_THRESHOLD', '0.8'))
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+SHINGLE_SIZE = 5
+# Bucket members compared before giving up on a band
+MAX_BUCKET_COMPARISONS = 10
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+_SPACES = re.compile(r'\s+')
+# Tokens (after normalization, so "don't" gives "t") that flip a review's meaning without moving its shingles much
+NEGATIONS = frozenset(('not', 'no', 'never', 'nor', 'none', 'nothing', 'neither', 'cannot', 't', 'without',
+                       'dont', 'doesnt', 'didnt', 'isnt', 'wasnt', 'wont', 'cant', 'couldnt', 'wouldnt', 'shouldnt'))
+
+
+def normalize_review(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    if text is None or text is pd.NA or (isinstance(text, float) and np.isnan(text)):
+        return ''
+    text = _NON_WORD.sub(' ', str(text).lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def negation_tokens(normalized):
+    """Negation words of a normalized text; texts sharing a cluster must have the same ones"""
+    return frozenset(token for token in normalized.split(' ') if token in NEGATIONS)
+
+
+def shingle_hashes(normalized, size=SHINGLE_SIZE):
+    """CRC32 hashes of the character shingles of a normalized text"""
+    if len(normalized) <= size:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash LSH index assigning every row to a near-duplicate cluster
+
+    Exact duplicates (after normalization) are collapsed before hashing, so
+    signatures are only computed once per distinct text. Clusters are kept in
+    a union-find over distinct texts and can grow as rows are appended. Two
+    texts only join when they also use the same negation words, so "would
+    recommend" and "would not recommend" stay apart. Clusters are meant for
+    grouping and stats; labels should only be shared across ``text_ids()``.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERMUTATIONS, bands=NUM_BANDS,
+                 shingle_size=SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+
+        self._lock = threading.RLock()
+        self._text_ids = {}          # normalized text -> distinct text id
+        self._texts = []             # distinct text id -> normalized text
+        self._signatures = []        # distinct text id -> signature
+        self._negations = []         # distinct text id -> negation words
+        self._parent = []            # union-find parent per distinct text id
+        self._buckets = [dict() for _ in range(bands)]
+        self._row_chunks = []        # per-row distinct text ids, appended per add()
+        self._cluster_results = {}   # memoized per-cluster results (see get_or_compute)
+
+    # -------------------------------------------------------------------------
+    # MinHash / LSH internals
+    # -------------------------------------------------------------------------
+
+    def _signature(self, normalized):
+        hashes = shingle_hashes(normalized, self.shingle_size) % _MERSENNE_PRIME
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature):
+        r = self.rows_per_band
+        return [signature[band * r:(band + 1) * r].tobytes() for band in range(self.bands)]
+
+    def _find(self, text_id):
+        parent = self._parent
+        root = text_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[text_id] != root:
+            parent[text_id], text_id = root, parent[text_id]
+        return root
+
+    def _union(self, first, second):
+        root_a, root_b = self._find(first), self._find(second)
+        if root_a != root_b:
+            # Keep the older text as root so cluster ids stay stable on append
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self._parent[root_b] = root_a
+
+    def _similarity(self, first_signature, second_signature):
+        return float(np.mean(first_signature == second_signature))
+
+    def _find_match(self, signature, band_keys, negations):
+        """Distinct text id of an indexed near-duplicate, or None"""
+        checked = set()
+        for band, key in enumerate(band_keys):
+            for candidate in self._buckets[band].get(key, [])[:MAX_BUCKET_COMPARISONS]:
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if self._negations[candidate] != negations:
+                    continue
+                if self._similarity(signature, self._signatures[candidate]) >= self.threshold:
+                    return candidate
+        return None
+
+    def _insert_text(self, normalized):
+        text_id = len(self._texts)
+        signature = self._signature(normalized)
+        band_keys = self._band_keys(signature)
+        negations = negation_tokens(normalized)
+        match = self._find_match(signature, band_keys, negations)
+
+        self._text_ids[normalized] = text_id
+        self._texts.append(normalized)
+        self._signatures.append(signature)
+        self._negations.append(negations)
+        self._parent.append(text_id)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(text_id)
+
+        if match is not None:
+            self._union(match, text_id)
+        return text_id
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def add(self, texts):
+        """Index new rows; returns the number of distinct texts that were hashed"""
+        values = pd.Series(texts, dtype=object)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        with self._lock:
+            before = len(self._texts)
+            unique_ids = np.empty(len(uniques), dtype=np.int64)
+            for idx, raw in enumerate(uniques):
+                normalized = normalize_review(raw)
+                text_id = self._text_ids.get(normalized)
+                if text_id is None:
+                    text_id = self._insert_text(normalized)
+                unique_ids[idx] = text_id
+            self._row_chunks.append(unique_ids[codes] if len(codes) else np.empty(0, dtype=np.int64))
+            self._cluster_results.clear()
+            return len(self._texts) - before
+
+    def copy(self):
+        """Independent copy that can be extended while readers keep using this index"""
+        with self._lock:
+            clone = copy.copy(self)
+            clone._lock = threading.RLock()
+            clone._text_ids = dict(self._text_ids)
+            clone._texts = list(self._texts)
+            clone._signatures = list(self._signatures)
+            clone._negations = list(self._negations)
+            clone._parent = list(self._parent)
+            clone._buckets = [{key: list(ids) for key, ids in buckets.items()} for buckets in self._buckets]
+            clone._row_chunks = list(self._row_chunks)
+            clone._cluster_results = {}
+        return clone
+
+    def text_ids(self):
+        """Distinct text id per row: rows share one only when their normalized texts are identical"""
+        with self._lock:
+            return np.concatenate(self._row_chunks) if self._row_chunks else np.empty(0, dtype=np.int64)
+
+    def clusters(self):
+        """Dense cluster label per row, representative row per cluster and cluster sizes"""
+        with self._lock:
+            row_text_ids = np.concatenate(self._row_chunks) if self._row_chunks else np.empty(0, dtype=np.int64)
+            roots = np.array([self._find(text_id) for text_id in range(len(self._texts))], dtype=np.int64)
+        if len(row_text_ids) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        row_roots = roots[row_text_ids]
+        _, representatives, labels, sizes = np.unique(row_roots, return_index=True, return_inverse=True,
+                                                      return_counts=True)
+        return labels.astype(np.int64), representatives.astype(np.int64), sizes.astype(np.int64)
+
+    def cluster_of(self, text):
+        """Cluster key of a text (indexed or not), or None if it has no near-duplicate"""
+        normalized = normalize_review(text)
+        with self._lock:
+            text_id = self._text_ids.get(normalized)
+            if text_id is None:
+                signature = self._signature(normalized)
+                text_id = self._find_match(signature, self._band_keys(signature), negation_tokens(normalized))
+                if text_id is None:
+                    return None
+            return self._find(text_id)
+
+    def get_or_compute(self, text, key, compute):
+        """Run compute() once per (cluster, key) and broadcast the result to cluster members"""
+        cluster = self.cluster_of(text)
+        if cluster is None:
+            return compute()
+        cache_key = (cluster, key)
+        with self._lock:
+            if cache_key in self._cluster_results:
+                return self._cluster_results[cache_key]
+        result = compute()
+        with self._lock:
+            self._cluster_results[cache_key] = result
+        return result
+
+    def stats(self):
+        labels, _, sizes = self.clusters()
+        return {
+            'rows': int(len(labels)),
+            'distinct_texts': len(self._texts),
+            'clusters': int(len(sizes)),
+            'largest_cluster': int(sizes.max()) if len(sizes) else 0,
+            'threshold': self.threshold
+        }
@@ -0,0 +1,202 @@
+"""
+BizEye Precompute Scheduler
+Warms dashboard endpoint results in the background after a new dataset version lands
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+PRECOMPUTE_ENABLED = os.environ.get('BIZEYE_PRECOMPUTE', '0') == '1'
+# Responses kept by the read-through cache (warmed and live results alike)
+RESPONSE_CACHE_SIZE = int(os.environ.get('BIZEYE_RESPONSE_CACHE_SIZE', '512'))
+# How long the scheduler sleeps while live requests are being served
+YIELD_INTERVAL = 0.05
+
+# Dashboard endpoints in warm-up priority order: (path, fixed query parameters, warmed per category)
+# Parameters match what the front-end sends so warmed results are served as-is
+PRECOMPUTE_PLAN = (
+    ('/api/unified-analysis', {}, True),
+    ('/api/sales/analyze', {}, True),
+    ('/api/sales/chart-data', {}, True),
+    ('/api/sentiment/analyze', {}, True),
+    ('/api/sentiment/reviews', {'page': '1', 'per_page': '500'}, True),
+    ('/api/predictive/insights', {}, True),
+    ('/api/ai/recommendations', {}, True),
+    ('/api/predictions/sales-forecast', {'days_ahead': '30'}, True),
+    ('/api/predictions/demand-forecast', {'days_ahead': '30'}, False),
+    ('/api/predictions/inventory-recommendations', {}, True),
+    ('/api/predictions/churn-analysis', {}, False),
+    ('/api/predictions/price-optimization', {}, True),
+    ('/api/predictions/risk-assessment', {}, False),
+    ('/api/intelligent/recommendations', {}, True),
+    ('/api/intelligent/comprehensive-analysis', {}, True)
+)
+
+
+def build_tasks(categories, plan=PRECOMPUTE_PLAN):
+    """(path, params) pairs: every endpoint unfiltered first, then per category in the given order"""
+    tasks = [(path, dict(params)) for path, params, _ in plan]
+    for category in categories:
+        tasks.extend((path, dict(params, category=category)) for path, params, per_category in plan if per_category)
+    return tasks
+
+
+class ResponseCache:
+    """Bounded LRU of frozen responses keyed by (path, query string, dataset version)
+
+    Keys carry the dataset version, so entries for an older version are never
+    served again and are dropped as soon as a newer version is stored.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            version = key[-1]
+            for stale in [k for k in self._entries if k[-1] != version]:
+                del self._entries[stale]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': sum(len(body) for body, _, _ in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class PrecomputeScheduler:
+    """Background thread that runs warm-up tasks for the latest dataset version
+
+    ``run_task(path, params)`` computes one result and returns its HTTP
+    status; ``is_busy()`` reports live traffic, during which the scheduler
+    pauses between tasks. Scheduling a new version abandons the remaining
+    tasks of the previous one.
+    """
+
+    def __init__(self, run_task, is_busy):
+        self.run_task = run_task
+        self.is_busy = is_busy
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pending = None        # (version, tasks) waiting to start
+        self._version = None
+        self._progress = {}
+        self._started_at = None
+        self._completed_at = None
+
+    def schedule(self, version, tasks):
+        """Queue the warm-up tasks for a dataset version"""
+        with self._lock:
+            self._pending = (version, list(tasks))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='bizeye-precompute', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _superseded(self):
+        with self._lock:
+            return self._pending is not None
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                if self._pending is None:
+                    continue
+                version, tasks = self._pending
+                self._pending = None
+                self._start(version, tasks)
+
+            for path, params in tasks:
+                while self.is_busy() and not self._superseded():
+                    time.sleep(YIELD_INTERVAL)
+                if self._superseded():
+                    break
+                self._execute(path, params)
+            else:
+                with self._lock:
+                    self._completed_at = datetime.now()
+                print(f"✅ Precomputed {len(tasks)} results for dataset version {version}")
+                continue
+            # A newer version arrived; start over with it
+            self._wakeup.set()
+
+    def _start(self, version, tasks):
+        self._version = version
+        self._started_at = datetime.now()
+        self._completed_at = None
+        self._progress = {}
+        for path, _ in tasks:
+            entry = self._progress.setdefault(path, {'total': 0, 'completed': 0, 'failed': 0,
+                                                     'started_at': None, 'completed_at': None, 'seconds': 0.0})
+            entry['total'] += 1
+
+    def _execute(self, path, params):
+        with self._lock:
+            entry = self._progress[path]
+            entry['started_at'] = entry['started_at'] or datetime.now().isoformat()
+        start = time.perf_counter()
+        try:
+            succeeded = self.run_task(path, params) < 400
+        except Exception as e:
+            print(f"⚠️  Precompute of {path} {params} failed: {e}")
+            succeeded = False
+        with self._lock:
+            entry['seconds'] += time.perf_counter() - start
+            entry['completed' if succeeded else 'failed'] += 1
+            if entry['completed'] + entry['failed'] == entry['total']:
+                entry['completed_at'] = datetime.now().isoformat()
+
+    def status(self):
+        with self._lock:
+            endpoints = {path: dict(entry, seconds=round(entry['seconds'], 3)) for path, entry in self._progress.items()}
+            total = sum(entry['total'] for entry in endpoints.values())
+            done = sum(entry['completed'] + entry['failed'] for entry in endpoints.values())
+            if self._version is None:
+                state = 'idle'
+            elif self._completed_at is not None:
+                state = 'complete'
+            else:
+                state = 'running'
+            return {
+                'state': state,
+                'dataset_version': self._version,
+                'tasks_total': total,
+                'tasks_done': done,
+                'started_at': self._started_at.isoformat() if self._started_at else None,
+                'completed_at': self._completed_at.isoformat() if self._completed_at else None,
+                'seconds': round(((self._completed_at or datetime.now()) - self._started_at).total_seconds(), 3)
+                           if self._started_at else None,
+                'endpoints': endpoints
+            }
@@ -0,0 +1,164 @@
+"""
+BizEye Request Profiling
+Opt-in per-request profiler producing hot-function tables and collapsed stacks
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Where profiles are stored (relative to the working directory like uploads/)
+PROFILE_DIR = os.environ.get('BIZEYE_PROFILE_DIR', 'profiles')
+# Route patterns profiled on every request ('*' profiles everything)
+PROFILE_ROUTES = [route.strip() for route in os.environ.get('BIZEYE_PROFILE_ROUTES', '').split(',') if route.strip()]
+# Number of hot functions kept in the summary
+PROFILE_TOP_N = int(os.environ.get('BIZEYE_PROFILE_TOP_N', '25'))
+# Stack sampling interval in seconds
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('BIZEYE_PROFILE_SAMPLE_INTERVAL_MS', '5')) / 1000.0
+
+PROFILE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+def route_is_configured(route):
+    """Check whether a route is profiled on every request by configuration"""
+    return '*' in PROFILE_ROUTES or route in PROFILE_ROUTES
+
+
+class StackSampler:
+    """Samples the call stack of one thread into flamegraph-compatible collapsed stacks"""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bizeye-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Render samples in the collapsed format read by flamegraph.pl and speedscope"""
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class RequestProfiler:
+    """Deterministic (cProfile) plus sampling profiler around a single request"""
+
+    def __init__(self, endpoint, method, top_n=PROFILE_TOP_N):
+        self.endpoint = endpoint
+        self.method = method
+        self.top_n = top_n
+        self.profile_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_')}"
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.started = None
+        self.elapsed = None
+        self.active = False
+
+    def start(self):
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # Another profiler is already active on this thread
+            print(f"⚠️  Request profiling skipped: {e}")
+            return False
+        self.sampler.start()
+        self.started = time.perf_counter()
+        self.active = True
+        return True
+
+    def stop(self):
+        if not self.active:
+            return
+        self.profile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        self.sampler.stop()
+        self.active = False
+
+    def hot_functions(self):
+        """Top functions by cumulative time"""
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, name), (primitive_calls, calls, total_time, cumulative_time, _) in stats.stats.items():
+            rows.append({
+                'function': name,
+                'file': filename,
+                'line': line,
+                'calls': calls,
+                'primitive_calls': primitive_calls,
+                'total_time': round(total_time, 6),
+                'cumulative_time': round(cumulative_time, 6)
+            })
+        rows.sort(key=lambda row: row['cumulative_time'], reverse=True)
+        return rows[:self.top_n]
+
+    def summary(self, status_code=None):
+        return {
+            'profile_id': self.profile_id,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status_code': status_code,
+            'elapsed_seconds': round(self.elapsed or 0, 6),
+            'samples': self.sampler.samples,
+            'sample_interval_ms': self.sampler.interval * 1000,
+            'created_at': datetime.now().isoformat(),
+            'hot_functions': self.hot_functions()
+        }
+
+    def save(self, status_code=None, directory=PROFILE_DIR):
+        """Write the summary JSON, collapsed stacks and raw pstats dump"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.profile_id)
+        summary = self.summary(status_code)
+        with open(f"{base}.json", 'w') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        with open(f"{base}.collapsed", 'w') as collapsed_file:
+            collapsed_file.write(self.sampler.collapsed())
+        self.profile.dump_stats(f"{base}.prof")
+        return summary
+
+
+def list_profiles(directory=PROFILE_DIR):
+    """List stored profile ids, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    ids = [name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json')]
+    return sorted(ids, reverse=True)
+
+
+def load_profile(profile_id, kind='json', directory=PROFILE_DIR):
+    """Load a stored profile summary (json) or its collapsed stacks; None if missing"""
+    if not PROFILE_ID_PATTERN.match(profile_id or ''):
+        return None
+    path = os.path.join(directory, f"{profile_id}.{kind}")
+    if not os.path.exists(path):
+        return None
+    with open(path) as profile_file:
+        return json.load(profile_file) if kind == 'json' else profile_file.read()
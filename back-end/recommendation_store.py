@@ -0,0 +1,120 @@
+"""
+BizEye Recommendation Store
+Generated recommendations persisted in SQLite per category group, keyed by a content hash of its problem reviews
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from monitoring import REGISTRY
+
+RECOMMENDATION_STORE_PATH = os.environ.get('BIZEYE_RECOMMENDATION_STORE', 'recommendations.sqlite3')
+# Content versions kept per category group (filtered views of a group have their own hashes)
+KEEP_PER_GROUP = int(os.environ.get('BIZEYE_RECOMMENDATION_STORE_KEEP', '32'))
+
+# Columns of the problem reviews that generated recommendations depend on
+HASHED_COLUMNS = ('review', 'sentiment', 'sentiment_score', 'review_cluster')
+
+LOOKUPS = REGISTRY.counter(
+    'bizeye_recommendation_store_lookups_total', 'Recommendation store lookups by result (hit or miss)',
+    ('result',))
+
+
+def _json_default(value):
+    # numpy scalars left in generated recommendations
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def content_hash(problem_reviews, generator):
+    """SHA-256 over the problem reviews' text, sentiment and cluster columns plus the generator in use"""
+    digest = hashlib.sha256(generator.encode())
+    for column in HASHED_COLUMNS:
+        if column not in problem_reviews.columns:
+            continue
+        digest.update(column.encode())
+        values = problem_reviews[column]
+        if values.dtype != object and not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(object)
+        digest.update(pd.util.hash_pandas_object(values, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class RecommendationStore:
+    """SQLite table of generated recommendations per (category group, content hash)
+
+    A group's entry stays valid for as long as its problem reviews are
+    unchanged, across uploads, appends and restarts. Each call opens its own
+    connection, so the store can be shared by threads and worker processes.
+    """
+
+    def __init__(self, path=RECOMMENDATION_STORE_PATH):
+        self.path = os.path.abspath(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS recommendations ('
+                ' category_group TEXT NOT NULL,'
+                ' content_hash TEXT NOT NULL,'
+                ' recommendations TEXT NOT NULL,'
+                ' created_at TEXT NOT NULL,'
+                ' PRIMARY KEY (category_group, content_hash))')
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, category_group, digest):
+        """Stored recommendations for a group's content hash, or None"""
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT recommendations FROM recommendations WHERE category_group = ? AND content_hash = ?',
+                (category_group, digest)).fetchone()
+        LOOKUPS.inc(result='hit' if row is not None else 'miss')
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, category_group, digest, recommendations):
+        """Store a group's recommendations and drop its oldest content versions"""
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?)',
+                (category_group, digest, json.dumps(recommendations, default=_json_default), datetime.now().isoformat()))
+            connection.execute(
+                'DELETE FROM recommendations WHERE category_group = ? AND content_hash NOT IN ('
+                ' SELECT content_hash FROM recommendations WHERE category_group = ?'
+                ' ORDER BY created_at DESC LIMIT ?)',
+                (category_group, category_group, KEEP_PER_GROUP))
+
+    def clear(self):
+        with self._lock, self._connect() as connection:
+            connection.execute('DELETE FROM recommendations')
+
+    def stats(self):
+        with self._connect() as connection:
+            entries, groups = connection.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT category_group) FROM recommendations').fetchone()
+        return {
+            'path': self.path,
+            'entries': entries,
+            'groups': groups,
+            'hits': LOOKUPS.value(result='hit'),
+            'misses': LOOKUPS.value(result='miss')
+        }
@@ -0,0 +1,384 @@
+"""
+BizEye Review Search
+Inverted index over review text with boolean/phrase queries and BM25 ranking
+"""
+
+import bisect
+import copy
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_QUERY_TOKEN = re.compile(r'"[^"]*"?|[()]|[^\s()"]+')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a text"""
+    return _TOKEN.findall(str(text).lower())
+
+
+def _contains_phrase(tokens, phrase):
+    first, length = phrase[0], len(phrase)
+    for start in range(len(tokens) - length + 1):
+        if tokens[start] == first and tokens[start:start + length] == phrase:
+            return True
+    return False
+
+# =============================================================================
+# QUERY PARSING
+# =============================================================================
+
+def _lex(query):
+    tokens = []
+    for raw in _QUERY_TOKEN.findall(query):
+        if raw.startswith('"'):
+            tokens.append(('phrase', tokenize(raw.strip('"'))))
+        elif raw in ('(', ')'):
+            tokens.append((raw, None))
+        elif raw in _OPERATORS:
+            tokens.append((raw, None))
+        elif raw.startswith('-') and len(raw) > 1:
+            tokens.append(('NOT', None))
+            tokens.append(('word', tokenize(raw[1:])))
+        else:
+            tokens.append(('word', tokenize(raw)))
+    return tokens
+
+
+class _QueryParser:
+    """Recursive descent parser; adjacent terms are joined with AND
+
+    Grammar:
+        or_expr  := and_expr ('OR' and_expr)*
+        and_expr := not_expr (['AND'] not_expr)*
+        not_expr := 'NOT' not_expr | atom
+        atom     := word | "phrase" | '(' or_expr ')'
+    """
+
+    def __init__(self, query):
+        self.tokens = _lex(query)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Search query is empty")
+        node = self._or_expr()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected '{self._peek()}' in search query")
+        return node
+
+    def _or_expr(self):
+        node = self._and_expr()
+        while self._peek() == 'OR':
+            self._take()
+            node = ('or', node, self._and_expr())
+        return node
+
+    def _and_expr(self):
+        node = self._not_expr()
+        while self._peek() not in (None, 'OR', ')'):
+            if self._peek() == 'AND':
+                self._take()
+            node = ('and', node, self._not_expr())
+        return node
+
+    def _not_expr(self):
+        if self._peek() == 'NOT':
+            self._take()
+            return ('not', self._not_expr())
+        return self._atom()
+
+    def _atom(self):
+        kind = self._peek()
+        if kind is None:
+            raise ValueError("Search query ends unexpectedly")
+        if kind == '(':
+            self._take()
+            node = self._or_expr()
+            if self._peek() != ')':
+                raise ValueError("Missing ')' in search query")
+            self._take()
+            return node
+        if kind in ('word', 'phrase'):
+            words = self._take()[1]
+            if not words:
+                return ('all',)
+            # Hyphenated words such as "wi-fi" are matched as phrases
+            return ('term', words[0]) if len(words) == 1 else ('phrase', words)
+        raise ValueError(f"Unexpected '{kind}' in search query")
+
+
+def parse_query(query):
+    """Parse a boolean/phrase query into a node tree"""
+    return _QueryParser(query).parse()
+
+
+def _scoring_terms(node, negated=False):
+    """Terms that contribute to BM25 (those not under a NOT)"""
+    kind = node[0]
+    if kind == 'term':
+        return [] if negated else [node[1]]
+    if kind == 'phrase':
+        return [] if negated else list(node[1])
+    if kind == 'not':
+        return _scoring_terms(node[1], not negated)
+    if kind in ('and', 'or'):
+        return _scoring_terms(node[1], negated) + _scoring_terms(node[2], negated)
+    return []
+
+# =============================================================================
+# INVERTED INDEX
+# =============================================================================
+
+def _merge_tail(segments, size, merge):
+    """Merge trailing segments while the newest is at least as large as the one before
+
+    Segment sizes then roughly double from newest to oldest, so there are
+    O(log n) of them and every item is copied O(log n) times in total.
+    """
+    segments = list(segments)
+    while len(segments) > 1 and size(segments[-1]) >= size(segments[-2]):
+        segments[-2:] = [merge(segments[-2], segments[-1])]
+    return segments
+
+
+def _merge_documents(first, second):
+    return first[0], {**first[1], **second[1]}, first[2] + second[2]
+
+
+def _merge_postings(first, second):
+    return np.concatenate([first[0], second[0]]), np.concatenate([first[1], second[1]])
+
+
+class ReviewSearchIndex:
+    """Inverted index over distinct review texts with row-level dates
+
+    Identical review texts share one document, so postings and phrase checks
+    scale with distinct content; BM25 statistics still count every row.
+    Rows are stored in dataset order so results map back with ``iloc``.
+    Documents and postings are kept in segments that are never modified
+    once built: ``add()`` only builds segments for new documents and
+    touched terms, and ``copy()`` shares the existing ones.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._documents = []               # (first document id, {review text: document id}, (review texts)) segments
+        self._n_docs = 0
+        self._postings = {}                # term -> ((document ids, term frequencies) array segments)
+        self._postings_cache = {}          # term -> (ids array, tf array)
+        self._doc_lengths = np.empty(0, dtype=np.float32)
+        self._row_docs = np.empty(0, dtype=np.int32)
+        self._row_counts = np.empty(0, dtype=np.int64)
+        self._total_row_length = 0.0
+        self._avg_row_length = 0.0
+        self._dates = np.empty(0, dtype='datetime64[ns]')
+
+    def __len__(self):
+        return len(self._row_docs)
+
+    def _doc_id(self, text):
+        for _, doc_ids, _ in reversed(self._documents):
+            doc_id = doc_ids.get(text)
+            if doc_id is not None:
+                return doc_id
+        return None
+
+    def _text(self, doc_id):
+        segment = bisect.bisect_right([first for first, _, _ in self._documents], doc_id) - 1
+        first, _, texts = self._documents[segment]
+        return texts[doc_id - first]
+
+    def add(self, data):
+        """Index the rows of a prepared dataset frame, appended after existing rows"""
+        n_rows = len(data)
+        if 'review' in data.columns:
+            reviews = data['review'].fillna('').astype(str)
+        else:
+            reviews = pd.Series([''] * n_rows)
+        codes, uniques = pd.factorize(reviews)
+
+        with self._lock:
+            doc_ids = np.empty(len(uniques), dtype=np.int32)
+            new_doc_ids, new_texts, new_lengths, new_postings = {}, [], [], {}
+            for idx, text in enumerate(uniques):
+                doc_id = self._doc_id(text)
+                if doc_id is None:
+                    doc_id = self._n_docs + len(new_texts)
+                    tokens = tokenize(text)
+                    for term, tf in Counter(tokens).items():
+                        ids, tfs = new_postings.setdefault(term, ([], []))
+                        ids.append(doc_id)
+                        tfs.append(tf)
+                    new_doc_ids[text] = doc_id
+                    new_texts.append(text)
+                    new_lengths.append(len(tokens))
+                doc_ids[idx] = doc_id
+
+            if new_texts:
+                self._documents = _merge_tail(self._documents + [(self._n_docs, new_doc_ids, tuple(new_texts))],
+                                              lambda segment: len(segment[2]), _merge_documents)
+                self._n_docs += len(new_texts)
+            for term, (ids, tfs) in new_postings.items():
+                segment = (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+                self._postings[term] = tuple(_merge_tail(self._postings.get(term, ()) + (segment,),
+                                                         lambda segment: len(segment[0]), _merge_postings))
+                self._postings_cache.pop(term, None)
+
+            row_docs = doc_ids[codes] if n_rows else np.empty(0, np.int32)
+            self._doc_lengths = np.concatenate([self._doc_lengths, np.asarray(new_lengths, dtype=np.float32)])
+            self._row_docs = np.concatenate([self._row_docs, row_docs])
+            counts = np.bincount(row_docs, minlength=self._n_docs)
+            counts[:len(self._row_counts)] += self._row_counts
+            self._row_counts = counts
+            self._total_row_length += float(self._doc_lengths[row_docs].sum())
+            self._avg_row_length = self._total_row_length / len(self._row_docs) if len(self._row_docs) else 0.0
+
+            if 'date' in data.columns:
+                dates = pd.to_datetime(data['date'], errors='coerce').values.astype('datetime64[ns]')
+            else:
+                dates = np.full(n_rows, np.datetime64('NaT'), dtype='datetime64[ns]')
+            self._dates = np.concatenate([self._dates, dates])
+
+    def copy(self):
+        """Independent copy that can be extended while readers keep using this index"""
+        with self._lock:
+            clone = copy.copy(self)
+            clone._lock = threading.RLock()
+            # Segments and arrays are replaced, never modified, on add so they can be shared
+            clone._documents = list(self._documents)
+            clone._postings = dict(self._postings)
+            clone._postings_cache = dict(self._postings_cache)
+        return clone
+
+    def _term_postings(self, term):
+        cached = self._postings_cache.get(term)
+        if cached is None:
+            segments = self._postings.get(term, ())
+            if len(segments) == 1:
+                cached = segments[0]
+            elif segments:
+                cached = (np.concatenate([ids for ids, _ in segments]), np.concatenate([tfs for _, tfs in segments]))
+            else:
+                cached = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+            self._postings_cache[term] = cached
+        return cached
+
+    # -------------------------------------------------------------------------
+    # Query evaluation
+    # -------------------------------------------------------------------------
+
+    def _match(self, node):
+        """Boolean mask over documents matching a query node"""
+        kind = node[0]
+        n_docs = self._n_docs
+        if kind == 'all':
+            return np.ones(n_docs, dtype=bool)
+        if kind == 'term':
+            mask = np.zeros(n_docs, dtype=bool)
+            mask[self._term_postings(node[1])[0]] = True
+            return mask
+        if kind == 'phrase':
+            mask = np.ones(n_docs, dtype=bool)
+            for term in set(node[1]):
+                term_mask = np.zeros(n_docs, dtype=bool)
+                term_mask[self._term_postings(term)[0]] = True
+                mask &= term_mask
+            # Verify word order only for documents that contain every word
+            for doc_id in np.flatnonzero(mask):
+                if not _contains_phrase(tokenize(self._text(doc_id)), node[1]):
+                    mask[doc_id] = False
+            return mask
+        if kind == 'not':
+            return ~self._match(node[1])
+        if kind == 'and':
+            return self._match(node[1]) & self._match(node[2])
+        if kind == 'or':
+            return self._match(node[1]) | self._match(node[2])
+        raise ValueError(f"Unknown query node: {kind}")
+
+    def _bm25(self, terms, n_rows):
+        scores = np.zeros(self._n_docs, dtype=np.float32)
+        avg_length = self._avg_row_length or 1.0
+        for term in set(terms):
+            ids, tfs = self._term_postings(term)
+            if not len(ids):
+                continue
+            df = float(self._row_counts[ids].sum())
+            idf = np.log(1.0 + (n_rows - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[ids] / avg_length)
+            scores[ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+        return scores
+
+    def search(self, query, rows=None, date_from=None, date_to=None, limit=20, offset=0, n_rows=None):
+        """Rank matching rows by BM25
+
+        ``rows`` optionally restricts the search to sorted row positions
+        (e.g. resolved from the dimension filters). Returns total match
+        count, the row positions and scores of the requested page, and the
+        terms used for ranking (for highlighting). ``n_rows`` restricts
+        results to the first rows of the index so a caller holding an older
+        dataset snapshot never sees newer rows.
+        """
+        node = parse_query(query)
+        terms = _scoring_terms(node)
+
+        with self._lock:
+            n_rows = len(self._row_docs) if n_rows is None else min(n_rows, len(self._row_docs))
+            if rows is None:
+                positions = np.arange(n_rows)
+            else:
+                positions = np.asarray(rows, dtype=np.int64)
+                positions = positions[positions < n_rows]
+            doc_mask = self._match(node)
+            doc_scores = self._bm25(terms, n_rows) if terms else np.zeros(self._n_docs, dtype=np.float32)
+
+            row_docs = self._row_docs[positions]
+            row_mask = doc_mask[row_docs]
+            if date_from is not None:
+                row_mask &= self._dates[positions] >= np.datetime64(date_from, 'ns')
+            if date_to is not None:
+                row_mask &= self._dates[positions] <= np.datetime64(date_to, 'ns')
+
+        positions, row_docs = positions[row_mask], row_docs[row_mask]
+        scores = doc_scores[row_docs]
+        wanted = offset + limit
+        if wanted < len(positions):
+            # Keep every row tied with the last wanted score so pages stay stable
+            cutoff = np.partition(-scores, wanted - 1)[wanted - 1]
+            keep = -scores <= cutoff
+            positions, scores = positions[keep], scores[keep]
+        order = np.lexsort((positions, -scores))[offset:wanted]
+
+        return {
+            'total': int(row_mask.sum()),
+            'positions': positions[order],
+            'scores': scores[order],
+            'terms': sorted(set(terms))
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': len(self._row_docs),
+                'documents': self._n_docs,
+                'terms': len(self._postings)
+            }
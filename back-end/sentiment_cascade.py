@@ -0,0 +1,157 @@
+"""
+BizEye Sentiment Cascade
+Lexicon scoring for clear-cut reviews; only reviews in the ambiguous polarity band reach the transformer
+"""
+
+import os
+import random
+import threading
+
+from monitoring import REGISTRY
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+except ImportError:
+    SentimentIntensityAnalyzer = None
+
+try:
+    from textblob import TextBlob
+except ImportError:
+    TextBlob = None
+
+# 'transformer' scores every review with the model; 'cascade' lets the lexicon label the clear-cut ones
+SENTIMENT_MODE = os.environ.get('BIZEYE_SENTIMENT_MODE', 'transformer')
+LEXICON = os.environ.get('BIZEYE_SENTIMENT_LEXICON', 'vader')
+# Lexicon polarity (-1..1) at or below the lower bound is negative, at or above the upper bound positive;
+# reviews in between go to the transformer
+CASCADE_BAND = tuple(float(bound) for bound in os.environ.get('BIZEYE_CASCADE_BAND', '-0.5,0.5').split(','))
+# Share of lexicon labels also scored by the transformer to measure agreement
+AUDIT_RATE = float(os.environ.get('BIZEYE_CASCADE_AUDIT_RATE', '0.02'))
+# Symmetric bands compared when evaluating against full-transformer labels
+EVALUATION_BANDS = tuple((-width, width) for width in (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9))
+# Most distinct reviews one evaluation request scores with the transformer
+MAX_EVALUATION_REVIEWS = 5000
+
+ROUTED = REGISTRY.counter(
+    'bizeye_sentiment_cascade_routed_total', 'Reviews labelled by the lexicon or sent to the transformer',
+    ('route',))
+AUDITS = REGISTRY.counter(
+    'bizeye_sentiment_cascade_audits_total', 'Lexicon labels checked against the transformer by result (agree or disagree)',
+    ('result',))
+
+
+def load_lexicon(name=LEXICON):
+    """Polarity function (text -> -1..1) of a lexicon scorer, or None when its package is not installed"""
+    if name == 'vader' and SentimentIntensityAnalyzer is not None:
+        analyzer = SentimentIntensityAnalyzer()
+        return lambda text: analyzer.polarity_scores(text)['compound']
+    if name == 'textblob' and TextBlob is not None:
+        return lambda text: TextBlob(text).sentiment.polarity
+    return None
+
+
+def band_label(polarity, band):
+    """Lexicon label of a polarity outside the band, None inside it"""
+    lower, upper = band
+    if polarity <= lower:
+        return 'negative'
+    if polarity >= upper:
+        return 'positive'
+    return None
+
+
+def lexicon_confidence(polarity):
+    """Polarity strength on the 0.5-1 scale of the transformer's confidence"""
+    return 0.5 + abs(polarity) / 2
+
+
+class SentimentCascade:
+    """Lexicon first pass in front of the transformer
+
+    ``triage(texts)`` labels the texts whose lexicon polarity falls outside
+    the band and leaves the rest for the transformer. A random
+    ``audit_rate`` share of the lexicon labels is scored by the transformer
+    too; the confusion between the two is kept so the accuracy cost of the
+    band can be read off while it runs.
+    """
+
+    def __init__(self, polarity, band=CASCADE_BAND, audit_rate=AUDIT_RATE, seed=None):
+        self.polarity = polarity
+        self.band = band
+        self.audit_rate = audit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._confusion = {}   # (lexicon label, transformer label) -> audited reviews
+
+    def triage(self, texts):
+        """(labels, audit positions): (label, confidence) per text or None for the transformer,
+        plus the positions of lexicon labels to check against the transformer"""
+        labels, audit = [], []
+        for position, text in enumerate(texts):
+            polarity = self.polarity(text)
+            label = band_label(polarity, self.band)
+            if label is None:
+                labels.append(None)
+                continue
+            labels.append((label, lexicon_confidence(polarity)))
+            if self._random.random() < self.audit_rate:
+                audit.append(position)
+        decided = sum(label is not None for label in labels)
+        ROUTED.inc(decided, route='lexicon')
+        ROUTED.inc(len(labels) - decided, route='transformer')
+        return labels, audit
+
+    def record_audit(self, lexicon_label, transformer_label):
+        with self._lock:
+            key = (lexicon_label, transformer_label)
+            self._confusion[key] = self._confusion.get(key, 0) + 1
+        AUDITS.inc(result='agree' if lexicon_label == transformer_label else 'disagree')
+
+    def stats(self):
+        lexicon, transformer = ROUTED.value(route='lexicon'), ROUTED.value(route='transformer')
+        with self._lock:
+            confusion = dict(self._confusion)
+        audited = sum(confusion.values())
+        agreed = sum(count for (lexicon_label, transformer_label), count in confusion.items()
+                     if lexicon_label == transformer_label)
+        lexicon_share = lexicon / (lexicon + transformer) if lexicon + transformer else 0.0
+        audit_agreement = agreed / audited if audited else None
+        return {
+            'band': {'lower': self.band[0], 'upper': self.band[1]},
+            'audit_rate': self.audit_rate,
+            'reviews': {
+                'lexicon': int(lexicon),
+                'transformer': int(transformer),
+                'lexicon_share': round(lexicon_share, 4)
+            },
+            'audit': {
+                'audited': audited,
+                'agreement': round(audit_agreement, 4) if audit_agreement is not None else None,
+                'confusion': {f'{lexicon_label}->{transformer_label}': count
+                              for (lexicon_label, transformer_label), count in sorted(confusion.items())}
+            },
+            # Reviews in the band get the transformer label, so only lexicon labels can disagree
+            'estimated_agreement': round(1 - lexicon_share * (1 - audit_agreement), 4) if audit_agreement is not None else None
+        }
+
+
+def evaluate_bands(polarities, transformer_labels, bands):
+    """Agreement with the full-transformer labels and share of reviews sent to the transformer per band"""
+    results = []
+    total = len(polarities)
+    for band in bands:
+        routed = agreed = 0
+        for polarity, expected in zip(polarities, transformer_labels):
+            label = band_label(polarity, band)
+            if label is None:
+                routed += 1
+                agreed += 1
+            elif label == expected:
+                agreed += 1
+        results.append({
+            'lower': band[0],
+            'upper': band[1],
+            'transformer_share': round(routed / total, 4) if total else 0.0,
+            'agreement': round(agreed / total, 4) if total else None
+        })
+    return results
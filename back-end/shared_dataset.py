@@ -0,0 +1,141 @@
+"""
+BizEye Shared Dataset
+Generations of the processed dataset published as memory-mapped Arrow IPC files shared by all workers
+"""
+
+import fcntl
+import glob
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Directory holding the generations; use tmpfs (e.g. /dev/shm/bizeye) to keep them in shared memory
+SHARED_DATASET_DIR = os.environ.get('BIZEYE_SHARED_DATASET_DIR')
+# Older generations kept on disk for workers still finishing requests on them
+KEEP_GENERATIONS = 2
+
+POINTER_FILE = 'CURRENT'
+LOCK_FILE = 'publish.lock'
+
+
+def _arrow_string(arrow_type):
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+class SharedDataset:
+    """Read-only dataset generations shared between pre-forked workers
+
+    ``publish`` writes a frame as an Arrow IPC file and then atomically
+    replaces the ``CURRENT`` pointer, so readers only ever see complete
+    generations. ``attach`` memory-maps the current generation: the pages are
+    shared through the OS page cache, and string and null-free numeric columns
+    reference the mapping without copies.
+    """
+
+    def __init__(self, directory=SHARED_DATASET_DIR):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._local = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write_atomic(self, name, write):
+        tmp_path = self._path(f'.{name}.{os.getpid()}.tmp')
+        write(tmp_path)
+        os.replace(tmp_path, self._path(name))
+
+    @contextmanager
+    def lock(self):
+        """Exclusive publish lock shared by every worker process"""
+        with self._local, open(self._path(LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def current(self):
+        """Pointer to the current generation: ``{'generation', 'file', 'rows'}``"""
+        try:
+            with open(self._path(POINTER_FILE)) as pointer:
+                return json.load(pointer)
+        except (OSError, ValueError):
+            return {'generation': 0, 'file': None, 'rows': 0}
+
+    def _set_current(self, generation, filename, rows):
+        def write(path):
+            with open(path, 'w') as pointer:
+                json.dump({'generation': generation, 'file': filename, 'rows': rows}, pointer)
+        self._write_atomic(POINTER_FILE, write)
+
+    def publish(self, data):
+        """Write a new generation and make it current; returns the generation number
+
+        Call while holding ``lock()``.
+        """
+        frame = data.copy(deep=False)
+        for column in frame.columns:
+            if frame[column].dtype == object:
+                # Arrow needs one type per column; mixed object columns are stored as text
+                frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str))
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+        generation = self.current()['generation'] + 1
+        filename = f'generation-{generation:06d}.arrow'
+
+        def write(path):
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        self._write_atomic(filename, write)
+        self._set_current(generation, filename, len(frame))
+        self._prune(generation)
+        return generation
+
+    def clear(self):
+        """Publish an empty generation; call while holding ``lock()``"""
+        generation = self.current()['generation'] + 1
+        self._set_current(generation, None, 0)
+        self._prune(generation)
+        return generation
+
+    def _prune(self, generation):
+        # Unlinking is safe for workers that still map an old file; its pages live until they unmap it
+        for path in glob.glob(self._path('generation-*.arrow')):
+            number = int(os.path.basename(path)[len('generation-'):-len('.arrow')])
+            if number <= generation - KEEP_GENERATIONS:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def attach(self, pointer=None):
+        """Memory-map a generation (the current one by default) as a DataFrame, or None if it is empty"""
+        pointer = pointer or self.current()
+        if not pointer.get('file'):
+            return None
+        source = pa.memory_map(self._path(pointer['file']), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True, types_mapper=_arrow_string)
+
+    def stats(self):
+        pointer = self.current()
+        path = self._path(pointer['file']) if pointer.get('file') else None
+        return {
+            'directory': self.directory,
+            'generation': pointer['generation'],
+            'rows': pointer.get('rows', 0),
+            'bytes': os.path.getsize(path) if path and os.path.exists(path) else 0
+        }
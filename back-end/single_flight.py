@@ -0,0 +1,70 @@
+"""
+BizEye Single Flight
+Coalesces concurrent identical computations so they run once and share the result
+"""
+
+import threading
+from concurrent.futures import Future
+
+from monitoring import REGISTRY
+
+FLIGHTS = REGISTRY.counter(
+    'bizeye_single_flight_executions_total', 'Computations started by a single-flight group',
+    ('group',))
+COALESCED = REGISTRY.counter(
+    'bizeye_single_flight_coalesced_total', 'Calls that waited on an identical in-flight computation',
+    ('group',))
+IN_FLIGHT = REGISTRY.gauge(
+    'bizeye_single_flight_in_flight', 'Computations currently running in a single-flight group',
+    ('group',))
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it is running wait for the leader and get
+    the same result or exception. Nothing is cached once the flight lands.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        """Return ``(result, shared)``; ``shared`` is True when another caller computed it"""
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+
+        if not leader:
+            COALESCED.inc(group=self.name)
+            return future.result(), True
+
+        FLIGHTS.inc(group=self.name)
+        IN_FLIGHT.inc(group=self.name)
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            IN_FLIGHT.dec(group=self.name)
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._flights)
+        return {
+            'executions': FLIGHTS.value(group=self.name),
+            'coalesced': COALESCED.value(group=self.name),
+            'in_flight': in_flight
+        }
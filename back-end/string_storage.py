@@ -0,0 +1,48 @@
+"""
+BizEye String Storage
+Arrow-backed string columns for the in-memory dataset
+"""
+
+import os
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+ARROW_STRING_DTYPE = 'string[pyarrow]'
+ARROW_STRINGS_ENABLED = pyarrow is not None and os.environ.get('BIZEYE_ARROW_STRINGS', '1') != '0'
+
+# Free text plus the string dimensions that filters compare against
+STRING_COLUMNS = ('review', 'Reviews', 'product_name', 'Product Name', 'product_category', 'Product Category',
+                  'Region', 'Payment Method', 'sentiment')
+
+
+def use_arrow_strings(data, columns=STRING_COLUMNS):
+    """Convert object text columns to Arrow strings in place
+
+    Arrow keeps each column as one contiguous UTF-8 buffer plus offsets
+    instead of a Python object per value, and ``==``/``isin``/``.str``
+    operations on it run as pyarrow compute kernels. Missing values become
+    ``pd.NA``.
+    """
+    if not ARROW_STRINGS_ENABLED:
+        return data
+    for column in columns:
+        if column in data.columns and data[column].dtype == object:
+            data[column] = data[column].astype(ARROW_STRING_DTYPE)
+    return data
+
+
+def string_memory_report(data, columns=STRING_COLUMNS):
+    """Bytes used by each text column stored as Python objects and as Arrow strings"""
+    report = {}
+    for column in columns:
+        if column not in data.columns:
+            continue
+        values = data[column]
+        entry = {'object_bytes': int(values.astype(object).memory_usage(deep=True, index=False))}
+        if pyarrow is not None:
+            entry['arrow_bytes'] = int(values.astype(ARROW_STRING_DTYPE).memory_usage(deep=True, index=False))
+        report[column] = entry
+    return report
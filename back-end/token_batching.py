@@ -0,0 +1,132 @@
+"""
+BizEye Token Batching
+Sentiment inputs tokenized once, truncated to the model limit and batched by padded tokens instead of row count
+"""
+
+import os
+
+import numpy as np
+
+from monitoring import REGISTRY
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Longest token sequence a review keeps (DistilBERT's position limit); longer reviews are truncated
+MAX_SEQUENCE_LENGTH = int(os.environ.get('BIZEYE_SENTIMENT_MAX_TOKENS', '512'))
+# Padded tokens (rows x longest row) per forward pass; short reviews share large batches, long ones small
+TOKEN_BUDGET = int(os.environ.get('BIZEYE_SENTIMENT_TOKEN_BUDGET', '8192'))
+
+TOKENS = REGISTRY.counter(
+    'bizeye_inference_tokens_total', 'Tokens fed to a model by kind (real, or padding added to fill a batch)',
+    ('model', 'kind'))
+TRUNCATED = REGISTRY.counter(
+    'bizeye_inference_truncated_total', 'Texts that filled the maximum sequence length (truncated or exactly at it)',
+    ('model',))
+PADDING_RATIO = REGISTRY.histogram(
+    'bizeye_inference_padding_ratio', 'Share of padding tokens in each forward pass',
+    ('model',), buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0))
+
+
+def plan_batches(lengths, max_tokens):
+    """Lists of positions, shortest inputs first, whose padded size (rows x longest) stays within ``max_tokens``
+
+    Sorting by length keeps similar lengths together, so each batch pads
+    only up to its own longest input. A single input longer than the
+    budget still gets a batch of its own.
+    """
+    batches, batch = [], []
+    for position in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Inputs arrive in ascending length, so this one sets the batch's padded width
+        if batch and (len(batch) + 1) * lengths[position] > max_tokens:
+            batches.append(batch)
+            batch = []
+        batch.append(position)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def pad_batch(sequences, pad_id):
+    """(input ids, attention mask) arrays of token sequences right-padded to the longest"""
+    width = max(len(sequence) for sequence in sequences)
+    input_ids = np.full((len(sequences), width), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+    for row, sequence in enumerate(sequences):
+        input_ids[row, :len(sequence)] = sequence
+        attention_mask[row, :len(sequence)] = 1
+    return input_ids, attention_mask
+
+
+class TokenBatcher:
+    """Sequence classification over texts tokenized once and batched by token budget
+
+    ``__call__(texts)`` truncates every text to ``max_length`` tokens, plans
+    length-sorted batches within ``max_tokens`` padded tokens, runs
+    ``forward(input_ids, attention_mask)`` (class probabilities per row) on
+    each and returns pipeline-style ``{'label', 'score'}`` results in the
+    original order. Real and padding tokens are counted per model.
+    """
+
+    def __init__(self, name, tokenizer, forward, labels, max_length=MAX_SEQUENCE_LENGTH, max_tokens=TOKEN_BUDGET):
+        self.name = name
+        self.tokenizer = tokenizer
+        self.forward = forward
+        self.labels = labels
+        self.max_length = max_length
+        self.max_tokens = max(max_tokens, max_length)
+        self.pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+
+    @classmethod
+    def from_pipeline(cls, name, pipeline, max_length=MAX_SEQUENCE_LENGTH, max_tokens=TOKEN_BUDGET):
+        """Batcher over a transformers text-classification pipeline's tokenizer and model (None without torch)"""
+        tokenizer, model = getattr(pipeline, 'tokenizer', None), getattr(pipeline, 'model', None)
+        if torch is None or tokenizer is None or model is None:
+            return None
+        # Never exceed the model's own position limit
+        model_limit = getattr(model.config, 'max_position_embeddings', None)
+        if model_limit:
+            max_length = min(max_length, model_limit)
+
+        def forward(input_ids, attention_mask):
+            with torch.no_grad():
+                logits = model(input_ids=torch.as_tensor(input_ids, device=model.device),
+                               attention_mask=torch.as_tensor(attention_mask, device=model.device)).logits
+            return logits.softmax(dim=-1).cpu().numpy()
+
+        return cls(name, tokenizer, forward, model.config.id2label, max_length, max_tokens)
+
+    def __call__(self, texts):
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+        lengths = [len(ids) for ids in encoded]
+        TRUNCATED.inc(sum(length >= self.max_length for length in lengths), model=self.name)
+
+        results = [None] * len(encoded)
+        for batch in plan_batches(lengths, self.max_tokens):
+            input_ids, attention_mask = pad_batch([encoded[position] for position in batch], self.pad_id)
+            real = int(attention_mask.sum())
+            padding = attention_mask.size - real
+            TOKENS.inc(real, model=self.name, kind='real')
+            TOKENS.inc(padding, model=self.name, kind='padding')
+            PADDING_RATIO.observe(padding / attention_mask.size, model=self.name)
+
+            probabilities = self.forward(input_ids, attention_mask)
+            for position, row in zip(batch, probabilities):
+                best = int(row.argmax())
+                results[position] = {'label': self.labels[best], 'score': float(row[best])}
+        return results
+
+    def stats(self):
+        real = TOKENS.value(model=self.name, kind='real')
+        padding = TOKENS.value(model=self.name, kind='padding')
+        return {
+            'max_length': self.max_length,
+            'max_tokens': self.max_tokens,
+            'tokens': int(real),
+            'padding_tokens': int(padding),
+            'padding_waste': round(padding / (real + padding), 4) if real + padding else 0.0,
+            'truncated': int(TRUNCATED.value(model=self.name))
+        }
+
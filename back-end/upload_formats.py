@@ -0,0 +1,173 @@
+"""
+BizEye Upload Formats
+Reads uploaded datasets from CSV, NDJSON (optionally gzip or zstd compressed) and Parquet files
+"""
+
+import gzip
+import io
+import json
+import os
+
+import pandas as pd
+
+from csv_reader import (BLOCK_SIZE, MALFORMED_LINES, SAMPLE_BYTES, open_decompressed, read_csv, sniff_sample,
+                        text_temporal_columns)
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pajson
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pajson = pq = None
+
+# Stream compressions accepted on top of the text formats, with their Arrow codec names
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+FORMAT_SUFFIXES = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.parquet': 'parquet'
+}
+SUPPORTED_UPLOADS = "CSV, NDJSON (.ndjson/.jsonl) or Parquet; CSV and NDJSON may be gzip (.gz) or zstd (.zst) compressed"
+
+
+def upload_format(filename):
+    """(format, suffix to save the upload with) of a file name, or (None, None) when it is not supported"""
+    name = filename.lower()
+    compression = next((suffix for suffix in COMPRESSION_SUFFIXES if name.endswith(suffix)), '')
+    extension = os.path.splitext(name[:len(name) - len(compression)])[1]
+    fmt = FORMAT_SUFFIXES.get(extension)
+    # Parquet compresses its own pages
+    if fmt is None or (fmt == 'parquet' and compression):
+        return None, None
+    return fmt, extension + compression
+
+
+def decompress_stream(stream, suffix):
+    """Binary stream of a file's content given its (possibly compressed) raw stream and upload suffix"""
+    compression = next((codec for ext, codec in COMPRESSION_SUFFIXES.items() if suffix.endswith(ext)), None)
+    if compression is None:
+        return stream
+    if pa is not None:
+        return pa.input_stream(stream, compression=compression)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream)
+    raise RuntimeError(f"{compression} uploads require pyarrow")
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Raw stream that serves bytes already read from another stream before the rest of it"""
+
+    def __init__(self, prefix, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if len(self._prefix):
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _read_sample(stream, size=SAMPLE_BYTES):
+    parts, remaining = [], size
+    while remaining > 0:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b''.join(parts)
+
+
+def _ndjson_chunks(stream, chunk_rows):
+    """Frames of up to ``chunk_rows`` records, skipping lines that are not JSON objects"""
+    records, malformed = [], 0
+    with io.TextIOWrapper(stream, encoding='utf-8', errors='replace') as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                malformed += 1
+                continue
+            records.append(record)
+            if len(records) >= chunk_rows:
+                yield pd.DataFrame.from_records(records), malformed
+                records, malformed = [], 0
+    if records or malformed:
+        yield pd.DataFrame.from_records(records), malformed
+
+
+def _read_ndjson(filepath):
+    if pajson is not None:
+        try:
+            table = pajson.read_json(filepath, read_options=pajson.ReadOptions(use_threads=True, block_size=BLOCK_SIZE))
+            return text_temporal_columns(table).to_pandas(), 0
+        except pa.ArrowInvalid as e:
+            print(f"Arrow JSON parse failed, reading line by line instead: {e}")
+    frames, malformed = [], 0
+    for chunk, skipped in _ndjson_chunks(open_decompressed(filepath), 100_000):
+        frames.append(chunk)
+        malformed += skipped
+    MALFORMED_LINES.inc(malformed)
+    return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), malformed
+
+
+def _read_parquet(filepath):
+    if pq is None:
+        raise RuntimeError("Parquet uploads require pyarrow")
+    return text_temporal_columns(pq.read_table(filepath)).to_pandas(), 0
+
+
+def read_upload(filepath, fmt):
+    """Parse a saved upload into a frame; returns (frame, malformed lines skipped or None when not counted)"""
+    if fmt == 'csv':
+        return read_csv(filepath)
+    if fmt == 'ndjson':
+        return _read_ndjson(filepath)
+    if fmt == 'parquet':
+        return _read_parquet(filepath)
+    raise ValueError(f"Unsupported upload format: {fmt}")
+
+
+def stream_chunks(stream, fmt, chunk_rows):
+    """Frames of up to ``chunk_rows`` rows parsed from the decompressed stream of a CSV or NDJSON file"""
+    if fmt == 'csv':
+        # Sniff from the head of the stream, then hand the parser those bytes again
+        sample = _read_sample(stream)
+        encoding, delimiter = sniff_sample(sample)
+        csv_file = io.BufferedReader(_PrefixedStream(sample, stream))
+        yield from pd.read_csv(csv_file, chunksize=chunk_rows, sep=delimiter, encoding=encoding,
+                               on_bad_lines='skip', encoding_errors='replace')
+    elif fmt == 'ndjson':
+        for chunk, malformed in _ndjson_chunks(stream, chunk_rows):
+            MALFORMED_LINES.inc(malformed)
+            if len(chunk):
+                yield chunk
+    else:
+        raise ValueError(f"Format {fmt} cannot be parsed from a stream")
+
+
+def upload_chunks(filepath, fmt, chunk_rows):
+    """Frames of up to ``chunk_rows`` rows of a saved upload, read without loading the whole file"""
+    if fmt in ('csv', 'ndjson'):
+        with open_decompressed(filepath) as stream:
+            yield from stream_chunks(stream, fmt, chunk_rows)
+    elif fmt == 'parquet':
+        if pq is None:
+            raise RuntimeError("Parquet uploads require pyarrow")
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=chunk_rows):
+            yield text_temporal_columns(pa.Table.from_batches([batch])).to_pandas()
+    else:
+        raise ValueError(f"Unsupported upload format: {fmt}")
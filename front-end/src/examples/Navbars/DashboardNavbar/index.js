@@ -186,12 +186,12 @@ function DashboardNavbar({ absolute, light, isMini, onDatasetUploaded }) {
         <DialogContent>
           <MDBox mt={2}>
             <MDTypography variant="body2" color="text" mb={2}>
-              Upload a CSV file containing sales data or customer reviews for analysis.
+              Upload a CSV, NDJSON or Parquet file (CSV and NDJSON may be .gz or .zst compressed) containing sales data or customer reviews for analysis.
             </MDTypography>
             <input
               ref={fileInputRef}
               type="file"
-              accept=".csv"
+              accept=".csv,.ndjson,.jsonl,.parquet,.gz,.zst"
               onChange={handleFileUpload}
               style={{ display: "none" }}
             />